@@ -4,48 +4,25 @@ from __future__ import annotations
 
 import json
 import logging
-import os
 import re
 import textwrap
 from typing import Optional
 
-import requests
-
 from .parser import ParsedDocument
 from .chunker import TextChunker, TextChunk
+from src.llm.client import PRIORITY_LOW, get_llm_client
 from src.tree.state import Claim
 
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
-# Gemini REST (identical helper to nodes.py — kept local to avoid coupling)
+# LLM helper (shared client — same cache, quota and retry policy as the graph)
 # ---------------------------------------------------------------------------
 
-_GEMINI_URL = (
-    "https://generativelanguage.googleapis.com/v1beta/models/"
-    "gemini-1.5-flash:generateContent"
-)
-
-
 def _call_gemini(prompt: str, max_tokens: int = 512) -> Optional[str]:
-    api_key = os.getenv("GEMINI_API_KEY", "")
-    if not api_key or api_key.startswith("your_"):
-        return None
-    try:
-        resp = requests.post(
-            f"{_GEMINI_URL}?key={api_key}",
-            json={
-                "contents": [{"parts": [{"text": prompt}]}],
-                "generationConfig": {"maxOutputTokens": max_tokens, "temperature": 0.2},
-            },
-            timeout=30,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        return data["candidates"][0]["content"]["parts"][0]["text"]
-    except Exception as exc:
-        logger.warning("Gemini call failed: %s", exc)
-        return None
+    return get_llm_client().generate(
+        prompt, max_tokens=max_tokens, temperature=0.2, priority=PRIORITY_LOW
+    )
 
 
 def _parse_json_list(text: str) -> list[str]:
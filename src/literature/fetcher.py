@@ -8,8 +8,10 @@ import json
 import time
 import hashlib
 import logging
+import threading
 import requests
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Optional
 from dataclasses import dataclass, asdict
@@ -143,11 +145,14 @@ class FAISSCache:
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self._embedder = None
+        self._embedder_lock = threading.Lock()
 
     def _get_embedder(self):
-        if self._embedder is None:
-            from sentence_transformers import SentenceTransformer
-            self._embedder = SentenceTransformer("all-MiniLM-L6-v2")
+        # Loaded once and shared by every thread using this cache (fetch_many)
+        with self._embedder_lock:
+            if self._embedder is None:
+                from sentence_transformers import SentenceTransformer
+                self._embedder = SentenceTransformer("all-MiniLM-L6-v2")
         return self._embedder
 
     def _cache_key(self, query: str) -> str:
@@ -259,6 +264,29 @@ class LiteraturePipeline:
 
         return all_papers
 
+    def fetch_many(
+        self, queries: list[str], max_workers: int = 4, limit_per_source: int = 25
+    ) -> dict[str, list[Paper]]:
+        """
+        Fetch several queries concurrently, sharing this pipeline's HTTP
+        fetchers, FAISS cache and embedder.
+
+        Returns a dict query -> papers.  A query whose fetch raises is logged
+        and left out of the result; it never blocks the other queries.
+        """
+        results: dict[str, list[Paper]] = {}
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = {
+                pool.submit(self.fetch, q, limit_per_source): q for q in dict.fromkeys(queries)
+            }
+            for future in as_completed(futures):
+                query = futures[future]
+                try:
+                    results[query] = future.result()
+                except Exception as e:
+                    logger.warning(f"Fetch failed for '{query}': {e}")
+        return results
+
     def generate_digest(self, papers: list[Paper], max_papers: int = 10) -> str:
         """Generate 1-page domain digest from top papers."""
         top = papers[:max_papers]
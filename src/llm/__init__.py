@@ -0,0 +1,12 @@
+"""
+LLM package: shared plumbing for every Gemini call site.
+
+Public API
+----------
+    from src.llm.client import LLMClient, get_llm_client
+    from src.llm.cache import LLMResponseCache, get_llm_cache
+"""
+from .cache import LLMResponseCache, get_llm_cache
+from .client import LLMClient, ModelLimits, get_llm_client
+
+__all__ = ["LLMClient", "ModelLimits", "get_llm_client", "LLMResponseCache", "get_llm_cache"]
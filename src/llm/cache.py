@@ -0,0 +1,195 @@
+"""
+src/llm/cache.py
+----------------
+Persistent, content-addressed cache for LLM responses.
+
+Identical prompts recur across runs (same topic, same corpus) and across
+documents (the same claim fact-checked twice).  Every ``_call_gemini`` call
+site looks the prompt up here first and only pays network latency and token
+cost on a miss.
+
+Design
+------
+- Key = SHA-256 of ``{model, generation_config, prompt}`` (canonical JSON),
+  so a change of model or temperature never returns a stale answer.
+- Stored in a single SQLite file under ``LLM_CACHE_DIR`` (stdlib only, safe
+  to share between the thread pools used by the graph nodes).
+- Entries older than ``ttl_seconds`` are treated as misses and dropped.
+- At most ``max_entries`` rows are kept; least-recently-used rows are
+  evicted first.
+- Hit / miss / eviction counters are exposed through ``stats()``.
+
+Configuration (environment)
+---------------------------
+    LLM_CACHE_DIR          directory for the SQLite file (default cache/llm;
+                           set to "off" to disable caching)
+    LLM_CACHE_TTL_S        time-to-live in seconds (default 7 days)
+    LLM_CACHE_MAX_ENTRIES  eviction bound (default 20 000)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_TTL_S = 7 * 24 * 3600
+_DEFAULT_MAX_ENTRIES = 20_000
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed LLM response store with TTL and LRU eviction.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Directory holding ``responses.sqlite``.
+    ttl_seconds : float
+        Entries older than this are ignored and deleted on access.
+    max_entries : int
+        Upper bound on stored responses.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = "cache/llm",
+        ttl_seconds: float = _DEFAULT_TTL_S,
+        max_entries: int = _DEFAULT_MAX_ENTRIES,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.cache_dir / "responses.sqlite"), check_same_thread=False
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " response TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, generation_config: dict[str, Any], prompt: str) -> str:
+        """Content address for one request."""
+        payload = json.dumps(
+            {"model": model, "generation_config": generation_config, "prompt": prompt},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for *key*, or None (counted as a miss)."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, response: str) -> None:
+        """Store *response* under *key*, evicting LRU rows past ``max_entries``."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created, last_access)"
+                " VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            excess = count - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    " SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        return count
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> dict[str, Any]:
+        """Hit/miss counters for this process plus the current entry count."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Process-wide instance shared by every call site
+# ---------------------------------------------------------------------------
+
+_caches: dict[str, LLMResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """
+    Return the shared cache for the configured ``LLM_CACHE_DIR``.
+
+    Returns None when caching is disabled or the cache cannot be opened —
+    callers then simply go to the network.
+    """
+    cache_dir = os.getenv("LLM_CACHE_DIR", "cache/llm")
+    if not cache_dir or cache_dir.lower() == "off":
+        return None
+    with _caches_lock:
+        cache = _caches.get(cache_dir)
+        if cache is None:
+            try:
+                cache = LLMResponseCache(
+                    cache_dir,
+                    ttl_seconds=float(os.getenv("LLM_CACHE_TTL_S", _DEFAULT_TTL_S)),
+                    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", _DEFAULT_MAX_ENTRIES)),
+                )
+            except Exception as exc:
+                logger.warning("LLM cache disabled (%s)", exc)
+                return None
+            _caches[cache_dir] = cache
+        return cache
@@ -0,0 +1,429 @@
+"""
+src/llm/client.py
+-----------------
+The single LLM client every node and the ingestion extractor go through.
+
+Why
+---
+The graph now fans LLM calls out over thread pools (executor angles,
+concurrent / batched fact-checking).  Without coordination, parallel runs
+burst past Gemini's RPM/TPM quota and collapse into 429 storms.  The client
+owns that coordination in one place:
+
+- **Response cache** — ``LLMResponseCache`` lookup before anything else.
+- **Per-model scheduler** — a priority queue in front of a concurrency cap
+  and sliding-window RPM / TPM limits.  Higher-priority (lower number)
+  requests are admitted first; equal priorities are FIFO.
+- **Retries** — 429 / 5xx / network errors retry with full-jitter
+  exponential backoff (``Retry-After`` honoured); the concurrency slot is
+  released while sleeping.
+- **Deadlines** — an optional absolute ``deadline`` bounds the whole call:
+  the queue wait, every attempt's HTTP timeout and the backoff sleeps.
+- **Accounting** — per-call latency, queue wait, attempts and prompt /
+  output token counts (from ``usageMetadata`` when Gemini returns it).
+
+Never raises: ``generate`` returns None on failure so callers fall back to
+their heuristics exactly as before.
+
+Configuration (environment)
+---------------------------
+    LLM_MAX_CONCURRENCY   in-flight requests per model   (default 4)
+    GEMINI_RPM            requests per minute per model  (default 15)
+    GEMINI_TPM            tokens per minute per model    (default 1 000 000)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+import requests
+
+from .cache import LLMResponseCache, get_llm_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gemini-1.5-flash"
+_GEMINI_URL_TEMPLATE = (
+    "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+)
+
+# Lower number = served first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+_WINDOW_S = 60.0
+
+
+@dataclass
+class ModelLimits:
+    """Quota for one model."""
+    max_concurrency: int = 4
+    rpm: int = 15
+    tpm: int = 1_000_000
+
+    @classmethod
+    def from_env(cls) -> "ModelLimits":
+        """Limits from the environment; a malformed value falls back to its default."""
+        return cls(
+            max_concurrency=_env_int("LLM_MAX_CONCURRENCY", cls.max_concurrency),
+            rpm=_env_int("GEMINI_RPM", cls.rpm),
+            tpm=_env_int("GEMINI_TPM", cls.tpm),
+        )
+
+
+def _env_int(name: str, default: int) -> int:
+    """Positive integer from env var *name*, or *default* (logged) if unset or invalid."""
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        value = int(raw)
+        if value <= 0:
+            raise ValueError("must be positive")
+    except ValueError:
+        logger.warning("Ignoring %s=%r (expected a positive integer); using %d", name, raw, default)
+        return default
+    return value
+
+
+@dataclass
+class LLMCallRecord:
+    """Accounting for one ``generate`` call."""
+    model: str
+    priority: int
+    prompt_tokens: int
+    output_tokens: int
+    latency_ms: float        # total wall time, including queueing and retries
+    queued_ms: float         # time spent waiting for the scheduler
+    attempts: int
+    cached: bool
+    success: bool
+
+
+class _RetryableError(Exception):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _ModelScheduler:
+    """Priority-ordered admission under concurrency + RPM/TPM limits."""
+
+    def __init__(self, limits: ModelLimits):
+        self.limits = limits
+        self._cond = threading.Condition()
+        self._queue: list[tuple[int, int]] = []          # (priority, seq) heap
+        self._seq = itertools.count()
+        self._active = 0
+        self._requests: deque[float] = deque()          # admission times
+        self._tokens: deque[list] = deque()             # [time, tokens]
+
+    def acquire(
+        self, priority: int, est_tokens: int, deadline: Optional[float] = None
+    ) -> Optional[list]:
+        """
+        Block until this request may start; returns its token record.
+
+        Returns None, leaving the queue, if *deadline* (``time.monotonic()``)
+        passes first.
+        """
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            while True:
+                wait_s = None
+                if self._queue[0] == ticket and self._active < self.limits.max_concurrency:
+                    wait_s = self._rate_wait(est_tokens)
+                    if wait_s <= 0:
+                        heapq.heappop(self._queue)
+                        self._active += 1
+                        now = time.monotonic()
+                        self._requests.append(now)
+                        record = [now, est_tokens]
+                        self._tokens.append(record)
+                        self._cond.notify_all()
+                        return record
+                if deadline is not None:
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        self._queue.remove(ticket)
+                        heapq.heapify(self._queue)
+                        self._cond.notify_all()
+                        return None
+                    wait_s = left if wait_s is None else min(wait_s, left)
+                self._cond.wait(wait_s)
+
+    def release(self, record: list, actual_tokens: Optional[int] = None) -> None:
+        with self._cond:
+            self._active -= 1
+            if actual_tokens is not None:
+                record[1] = actual_tokens
+            self._cond.notify_all()
+
+    def _rate_wait(self, est_tokens: int) -> float:
+        """Seconds until one more request of *est_tokens* fits the windows."""
+        now = time.monotonic()
+        while self._requests and now - self._requests[0] >= _WINDOW_S:
+            self._requests.popleft()
+        while self._tokens and now - self._tokens[0][0] >= _WINDOW_S:
+            self._tokens.popleft()
+
+        wait_s = 0.0
+        if len(self._requests) >= self.limits.rpm:
+            wait_s = max(wait_s, _WINDOW_S - (now - self._requests[0]))
+        used = sum(t for _, t in self._tokens)
+        if self._tokens and used + est_tokens > self.limits.tpm:
+            # Wait for enough of the window to drain
+            freed = 0
+            for ts, tokens in self._tokens:
+                freed += tokens
+                if used - freed + est_tokens <= self.limits.tpm:
+                    wait_s = max(wait_s, _WINDOW_S - (now - ts))
+                    break
+        return wait_s
+
+
+class LLMClient:
+    """
+    Shared, quota-aware Gemini client.
+
+    Parameters
+    ----------
+    limits : dict[str, ModelLimits] | None
+        Per-model quotas; models not listed use ``default_limits``.
+    default_limits : ModelLimits | None
+        Defaults to ``ModelLimits.from_env()``.
+    max_retries : int
+        Retries after the first attempt for retryable failures.
+    backoff_base_s, backoff_max_s : float
+        Full-jitter backoff: sleep ~ U(0, min(max, base · 2^attempt)).
+    cache : LLMResponseCache | None | "env"
+        Response cache; ``"env"`` (default) resolves ``get_llm_cache()`` per call.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[dict[str, ModelLimits]] = None,
+        default_limits: Optional[ModelLimits] = None,
+        max_retries: int = 3,
+        backoff_base_s: float = 1.0,
+        backoff_max_s: float = 20.0,
+        cache="env",
+    ):
+        self._limits = dict(limits or {})
+        self._default_limits = default_limits or ModelLimits.from_env()
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self._cache = cache
+        self._schedulers: dict[str, _ModelScheduler] = {}
+        self._lock = threading.Lock()
+        self.records: deque[LLMCallRecord] = deque(maxlen=5000)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def generate(
+        self,
+        prompt: str,
+        *,
+        model: str = DEFAULT_MODEL,
+        max_tokens: int = 1024,
+        temperature: float = 0.3,
+        timeout: float = 30,
+        priority: int = PRIORITY_NORMAL,
+        deadline: Optional[float] = None,
+    ) -> Optional[str]:
+        """
+        Return the model's text for *prompt*, or None on failure / no API key.
+
+        *timeout* bounds each HTTP attempt, not the call: queueing for the
+        scheduler and retries with backoff come on top of it.  *deadline*
+        (a ``time.monotonic()`` value) bounds the whole call — it gives up
+        waiting in the queue, shortens the attempt and skips any retry whose
+        backoff would end past it.
+        """
+        api_key = os.getenv("GEMINI_API_KEY", "")
+        if not api_key or api_key.startswith("your_"):
+            return None
+
+        start = time.perf_counter()
+        generation_config = {"maxOutputTokens": max_tokens, "temperature": temperature}
+        cache = get_llm_cache() if self._cache == "env" else self._cache
+        cache_key = LLMResponseCache.make_key(model, generation_config, prompt)
+        if cache is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                self._record(LLMCallRecord(
+                    model=model, priority=priority, prompt_tokens=0, output_tokens=0,
+                    latency_ms=(time.perf_counter() - start) * 1000, queued_ms=0.0,
+                    attempts=0, cached=True, success=True,
+                ))
+                return cached
+
+        scheduler = self._scheduler(model)
+        est_tokens = len(prompt) // 4 + max_tokens
+        queued_ms = 0.0
+        attempts = 0
+        prompt_tokens = output_tokens = 0
+        text: Optional[str] = None
+
+        while True:
+            wait_start = time.perf_counter()
+            slot = scheduler.acquire(priority, est_tokens, deadline)
+            queued_ms += (time.perf_counter() - wait_start) * 1000
+            if slot is None:
+                logger.warning("Gemini call dropped: deadline passed while queued")
+                break
+            attempts += 1
+            attempt_timeout = timeout
+            if deadline is not None:
+                attempt_timeout = max(0.0, min(timeout, deadline - time.monotonic()))
+            actual_tokens = None
+            retry: Optional[_RetryableError] = None
+            try:
+                text, prompt_tokens, output_tokens = self._post(
+                    api_key, model, prompt, generation_config, attempt_timeout
+                )
+                actual_tokens = (prompt_tokens + output_tokens) or None
+            except _RetryableError as exc:
+                retry = exc
+            except Exception as exc:
+                logger.warning("Gemini call failed: %s", exc)
+            finally:
+                scheduler.release(slot, actual_tokens)
+
+            if retry is None or attempts > self.max_retries:
+                if retry is not None:
+                    logger.warning("Gemini call failed after %d attempts: %s", attempts, retry)
+                break
+            delay = self._backoff(attempts, retry.retry_after)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                logger.warning(
+                    "Gemini call failed after %d attempts: %s (no time left to retry)",
+                    attempts, retry,
+                )
+                break
+            logger.info("Gemini: %s — retrying in %.2fs (attempt %d)", retry, delay, attempts)
+            time.sleep(delay)
+
+        if text is not None and cache is not None:
+            cache.set(cache_key, text)
+        self._record(LLMCallRecord(
+            model=model, priority=priority, prompt_tokens=prompt_tokens,
+            output_tokens=output_tokens, latency_ms=(time.perf_counter() - start) * 1000,
+            queued_ms=queued_ms, attempts=attempts, cached=False, success=text is not None,
+        ))
+        return text
+
+    async def agenerate(self, prompt: str, **kwargs) -> Optional[str]:
+        """
+        Awaitable ``generate`` for asyncio callers.
+
+        The blocking HTTP call runs on a worker thread, so it goes through
+        the same cache, scheduler and quota as synchronous callers.
+        """
+        return await asyncio.to_thread(self.generate, prompt, **kwargs)
+
+    def stats(self) -> dict:
+        """Aggregate accounting over the retained call records."""
+        with self._lock:
+            records = list(self.records)
+        live = [r for r in records if not r.cached]
+        latencies = sorted(r.latency_ms for r in live)
+
+        def pct(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 1)
+
+        return {
+            "calls": len(records),
+            "cached": len(records) - len(live),
+            "failures": sum(1 for r in records if not r.success),
+            "retries": sum(max(r.attempts - 1, 0) for r in live),
+            "prompt_tokens": sum(r.prompt_tokens for r in live),
+            "output_tokens": sum(r.output_tokens for r in live),
+            "latency_p50_ms": pct(0.50),
+            "latency_p95_ms": pct(0.95),
+            "queued_ms_total": round(sum(r.queued_ms for r in live), 1),
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _scheduler(self, model: str) -> _ModelScheduler:
+        with self._lock:
+            if model not in self._schedulers:
+                self._schedulers[model] = _ModelScheduler(
+                    self._limits.get(model, self._default_limits)
+                )
+            return self._schedulers[model]
+
+    def _post(
+        self, api_key: str, model: str, prompt: str, generation_config: dict, timeout: float
+    ) -> tuple[str, int, int]:
+        try:
+            resp = requests.post(
+                f"{_GEMINI_URL_TEMPLATE.format(model=model)}?key={api_key}",
+                json={
+                    "contents": [{"parts": [{"text": prompt}]}],
+                    "generationConfig": generation_config,
+                },
+                timeout=timeout,
+            )
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            raise _RetryableError(f"network error: {exc}") from exc
+
+        status = getattr(resp, "status_code", 200)
+        if isinstance(status, int) and status in _RETRYABLE_STATUS:
+            retry_after = None
+            try:
+                retry_after = float(resp.headers.get("Retry-After"))
+            except (TypeError, ValueError, AttributeError):
+                pass
+            raise _RetryableError(f"HTTP {status}", retry_after)
+        resp.raise_for_status()
+        data = resp.json()
+        text = data["candidates"][0]["content"]["parts"][0]["text"]
+        usage = data.get("usageMetadata") or {}
+        prompt_tokens = int(usage.get("promptTokenCount", len(prompt) // 4))
+        output_tokens = int(usage.get("candidatesTokenCount", len(text) // 4))
+        return text, prompt_tokens, output_tokens
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max_s)
+        cap = min(self.backoff_max_s, self.backoff_base_s * (2 ** (attempt - 1)))
+        return random.uniform(0, cap)
+
+    def _record(self, record: LLMCallRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+
+
+_client: Optional[LLMClient] = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """Process-wide client shared by every call site (and every run)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
+        return _client
@@ -2,5 +2,20 @@
 Sandbox package: E2B cloud code execution with local fallback.
 """
 from .executor import SandboxExecutor, SandboxResult, SANDBOX_PRELUDE
+from .cache import SandboxResultCache, get_sandbox_cache
+from .templates import AnalysisTemplate, get_template, register_template
+from .limits import ResourceLimits
+from .artifacts import ArtifactHandle
 
-__all__ = ["SandboxExecutor", "SandboxResult", "SANDBOX_PRELUDE"]
+__all__ = [
+    "SandboxExecutor",
+    "SandboxResult",
+    "SANDBOX_PRELUDE",
+    "SandboxResultCache",
+    "get_sandbox_cache",
+    "AnalysisTemplate",
+    "get_template",
+    "register_template",
+    "ResourceLimits",
+    "ArtifactHandle",
+]
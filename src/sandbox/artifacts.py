@@ -0,0 +1,285 @@
+"""
+src/sandbox/artifacts.py
+------------------------
+Out-of-band transfer of files a sandbox snippet produces.
+
+Each job runs with its own empty output directory — its working directory
+on local runs and in E2B code contexts, and always named by ``OUTPUT_ENV``
+— so a snippet saves a plot or CSV with a relative path, or under
+``os.environ["SANDBOX_OUTPUT_DIR"]``.  After the job, the files are left
+(or, from E2B, downloaded) in a run-scoped directory on the host and the
+result carries ``ArtifactHandle``s: path, size and SHA-256 only.  Contents
+are read lazily, so neither ``SandboxResult`` nor ``ResearchState`` ever
+holds artifact bytes.
+
+Layout::
+
+    <SANDBOX_ARTIFACT_DIR>/<run id>/<job id>/<file>
+
+A job that writes nothing leaves no directory behind (nor does a run
+whose jobs all wrote nothing).  Files past the per-job caps (count and
+total bytes) are deleted and logged instead of collected; symlinks and
+special files are never followed.
+
+Retention
+---------
+Run directories live as long as the cached results that point at them:
+creating a store prunes run directories under the root untouched for
+longer than ``SANDBOX_ARTIFACT_TTL_S`` (default: the sandbox result
+cache's TTL), at most once an hour per root.  Only directories made of
+``job-*`` subdirectories are considered, so a root shared with other
+output is safe.  A cached result whose files were pruned is simply re-run.
+
+Configuration (environment)
+---------------------------
+    SANDBOX_ARTIFACT_DIR        root for run directories (default outputs/sandbox)
+    SANDBOX_ARTIFACT_TTL_S      seconds a run directory is kept (default
+                                SANDBOX_CACHE_TTL_S, 7 days; "off" keeps them)
+    SANDBOX_MAX_ARTIFACTS       files kept per job (default 32)
+    SANDBOX_MAX_ARTIFACT_MB     bytes kept per job (default 64)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Set to the job's output directory in every snippet's environment
+OUTPUT_ENV = "SANDBOX_OUTPUT_DIR"
+
+_DEFAULT_MAX_FILES = 32
+_DEFAULT_MAX_MB = 64
+_DEFAULT_TTL_S = 7 * 24 * 3600  # the sandbox result cache's default
+_PRUNE_INTERVAL_S = 3600
+_CHUNK = 1 << 20
+
+
+@dataclass(frozen=True)
+class ArtifactHandle:
+    """A file produced by a sandbox job, stored on the host; read on demand."""
+    name: str    # path relative to the job's output directory
+    path: str    # absolute path on the host
+    size: int
+    sha256: str
+
+    def open(self) -> BinaryIO:
+        return open(self.path, "rb")
+
+    def read_bytes(self) -> bytes:
+        with self.open() as f:
+            return f.read()
+
+    def read_text(self, encoding: str = "utf-8") -> str:
+        return self.read_bytes().decode(encoding)
+
+    def exists(self) -> bool:
+        """True while the stored file is still there with its recorded size."""
+        try:
+            return os.path.getsize(self.path) == self.size
+        except OSError:
+            return False
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _env_cap(name: str, default: float) -> float:
+    """Non-negative number from env var *name*, or *default* (logged) if unset or invalid."""
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        value = float(raw)
+        if value < 0:
+            raise ValueError("negative")
+    except ValueError:
+        logger.warning("Ignoring %s=%r (expected a number >= 0); using %g", name, raw, default)
+        return default
+    return value
+
+
+def _artifact_ttl_s() -> Optional[float]:
+    """Run directory retention from the environment; None keeps them forever."""
+    raw = os.getenv("SANDBOX_ARTIFACT_TTL_S") or os.getenv("SANDBOX_CACHE_TTL_S")
+    if raw is None or not raw.strip():
+        return _DEFAULT_TTL_S
+    if raw.strip().lower() == "off":
+        return None
+    try:
+        return float(raw)
+    except ValueError:
+        logger.warning("Ignoring artifact TTL %r (expected seconds); using %d", raw, _DEFAULT_TTL_S)
+        return _DEFAULT_TTL_S
+
+
+def _is_run_dir(path: Path) -> bool:
+    try:
+        if not path.is_dir() or path.is_symlink():
+            return False
+        children = list(path.iterdir())
+        return bool(children) and all(c.is_dir() and c.name.startswith("job-") for c in children)
+    except OSError:
+        return False
+
+
+def prune_run_dirs(root: str, ttl_seconds: float, keep: Optional[Path] = None) -> int:
+    """Delete run directories under *root* untouched for *ttl_seconds*; returns how many."""
+    cutoff = time.time() - ttl_seconds
+    removed = 0
+    try:
+        entries = list(Path(root).iterdir())
+    except OSError:
+        return 0
+    for path in entries:
+        try:
+            stale = path.stat().st_mtime < cutoff
+        except OSError:
+            continue
+        if stale and path != keep and _is_run_dir(path):
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    if removed:
+        logger.info("Sandbox artifacts: pruned %d run directories older than %.0fs", removed, ttl_seconds)
+    return removed
+
+
+_last_pruned: dict[Path, float] = {}
+_prune_lock = threading.Lock()
+
+
+class ArtifactStore:
+    """
+    One run's artifact directory: hands out per-job output directories and
+    turns what jobs leave in them into ``ArtifactHandle``s, within the caps.
+    Creating one prunes stale run directories under *root* (see Retention);
+    *ttl_seconds* overrides ``SANDBOX_ARTIFACT_TTL_S``.
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        run_id: Optional[str] = None,
+        max_files: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+    ):
+        root = root or os.getenv("SANDBOX_ARTIFACT_DIR", "outputs/sandbox")
+        self.root = Path(root).resolve()
+        self.run_dir = self.root / (run_id or uuid.uuid4().hex[:12])
+        self.max_files = (
+            max_files if max_files is not None
+            else int(_env_cap("SANDBOX_MAX_ARTIFACTS", _DEFAULT_MAX_FILES))
+        )
+        self.max_bytes = (
+            max_bytes if max_bytes is not None
+            else int(_env_cap("SANDBOX_MAX_ARTIFACT_MB", _DEFAULT_MAX_MB) * 1024 * 1024)
+        )
+        self._lock = threading.Lock()  # job_dir() vs. removing an empty run dir
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else _artifact_ttl_s()
+        if self.ttl_seconds is not None:
+            self._prune()
+
+    def _prune(self) -> None:
+        """Prune stale run directories under the root, at most once per interval."""
+        now = time.monotonic()
+        with _prune_lock:
+            last = _last_pruned.get(self.root)
+            if last is not None and now - last < _PRUNE_INTERVAL_S:
+                return
+            _last_pruned[self.root] = now
+        prune_run_dirs(str(self.root), self.ttl_seconds, keep=self.run_dir)
+
+    def job_dir(self) -> str:
+        """A fresh, empty output directory for one job."""
+        with self._lock:
+            self.run_dir.mkdir(parents=True, exist_ok=True)
+            return tempfile.mkdtemp(prefix="job-", dir=self.run_dir)
+
+    def collect(self, job_dir: str) -> dict[str, ArtifactHandle]:
+        """Handles for the regular files in *job_dir*; drops the rest and empty dirs."""
+        root = Path(job_dir)
+        handles: dict[str, ArtifactHandle] = {}
+        total = 0
+        for path in sorted(p for p in root.rglob("*") if not p.is_dir() or p.is_symlink()):
+            name = path.relative_to(root).as_posix()
+            info = path.lstat()
+            if not stat.S_ISREG(info.st_mode):
+                logger.warning("Sandbox artifact %s is not a regular file; dropped", name)
+                path.unlink(missing_ok=True)
+                continue
+            if len(handles) >= self.max_files or total + info.st_size > self.max_bytes:
+                logger.warning(
+                    "Sandbox artifact %s (%d bytes) exceeds the per-job caps "
+                    "(%d files, %d bytes); dropped", name, info.st_size, self.max_files, self.max_bytes,
+                )
+                path.unlink(missing_ok=True)
+                continue
+            total += info.st_size
+            handles[name] = ArtifactHandle(
+                name=name, path=str(path), size=info.st_size, sha256=_sha256(path)
+            )
+        if not handles:
+            shutil.rmtree(root, ignore_errors=True)
+            with self._lock:
+                try:
+                    self.run_dir.rmdir()
+                except OSError:
+                    pass  # other jobs' directories are still there
+        return handles
+
+    def download(
+        self,
+        job_dir: str,
+        entries: Iterable[tuple[str, int]],
+        read: Callable[[str], bytes],
+    ) -> dict[str, ArtifactHandle]:
+        """
+        Copy remote files into *job_dir* and collect them.  *entries* are
+        ``(relative name, size)``; files that would break the caps are
+        skipped before transfer.  *read* fetches one file's bytes.
+        """
+        root = Path(job_dir)
+        count = total = 0
+        for name, size in entries:
+            target = (root / name).resolve()
+            if root.resolve() not in target.parents:
+                logger.warning("Sandbox artifact %s escapes the output directory; skipped", name)
+                continue
+            if count >= self.max_files or total + size > self.max_bytes:
+                logger.warning("Sandbox artifact %s (%d bytes) exceeds the per-job caps; skipped", name, size)
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(read(name))
+            count += 1
+            total += size
+        return self.collect(job_dir)
+
+    @staticmethod
+    def restore(data: dict[str, Any]) -> dict[str, ArtifactHandle]:
+        """Handles from their ``to_dict`` form (e.g. a cached result)."""
+        return {name: ArtifactHandle(**fields) for name, fields in data.items()}
+
+    @staticmethod
+    def intact(handles: dict[str, ArtifactHandle]) -> bool:
+        """True if every handle's file is still there (a cached result is usable)."""
+        return all(handle.exists() for handle in handles.values())
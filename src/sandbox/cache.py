@@ -0,0 +1,239 @@
+"""
+src/sandbox/cache.py
+--------------------
+Persistent, content-addressed cache for sandbox results.
+
+``SANDBOX_PRELUDE`` seeds ``random`` and ``numpy``, so a snippet's output
+is a function of its code, its stdin and the runtime that executes it.  The executor
+node rebuilds the same analysis snippets on every run of a topic;
+``SandboxExecutor.run`` looks each one up here first and only pays
+sandbox time (and E2B spend) on a miss.
+
+Design
+------
+- Key = SHA-256 of ``{prelude, code, stdin, runtime}`` (canonical JSON),
+  where the runtime names the backend plus the interpreter / package
+  versions that run the code, so an upgrade never returns a stale result.
+- Only successful results are stored — failures may be transient.
+- Stored in a single SQLite file under ``SANDBOX_CACHE_DIR``, with the same
+  TTL / LRU eviction as the LLM response cache.
+- Snippets that aren't deterministic (wall-clock time, network, files)
+  opt out with ``run(code, cache=False)``.
+
+Configuration (environment)
+---------------------------
+    SANDBOX_CACHE_DIR          directory for the SQLite file (default
+                               cache/sandbox; set to "off" to disable)
+    SANDBOX_CACHE_TTL_S        time-to-live in seconds (default 7 days)
+    SANDBOX_CACHE_MAX_ENTRIES  eviction bound (default 5 000)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import asdict
+from importlib import metadata
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
+
+from .artifacts import ArtifactStore
+
+if TYPE_CHECKING:
+    from .executor import SandboxResult
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_TTL_S = 7 * 24 * 3600
+_DEFAULT_MAX_ENTRIES = 5_000
+
+# Packages whose version can change a snippet's output, per backend
+_RUNTIME_PACKAGES = {
+    "local": ("numpy",),
+    "e2b": ("e2b-code-interpreter",),
+}
+
+
+def runtime_fingerprint(mode: str) -> dict[str, Any]:
+    """Backend, interpreter and package versions that determine a snippet's output."""
+    versions = {}
+    for package in _RUNTIME_PACKAGES.get(mode, ()):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    # E2B runs the code on its own (template-pinned) interpreter
+    python = sys.version if mode == "local" else None
+    return {"backend": mode, "python": python, "packages": versions}
+
+
+class SandboxResultCache:
+    """
+    SQLite-backed sandbox result store with TTL and LRU eviction.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Directory holding ``results.sqlite``.
+    ttl_seconds : float
+        Entries older than this are ignored and deleted on access.
+    max_entries : int
+        Upper bound on stored results.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = "cache/sandbox",
+        ttl_seconds: float = _DEFAULT_TTL_S,
+        max_entries: int = _DEFAULT_MAX_ENTRIES,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.cache_dir / "results.sqlite"), check_same_thread=False
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY,"
+            " result TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(
+        prelude: str, code: str, runtime: dict[str, Any], stdin: Optional[str] = None
+    ) -> str:
+        """Content address for one execution (*stdin*: a template's payload)."""
+        entry = {"prelude": prelude, "code": code, "runtime": runtime}
+        if stdin is not None:
+            entry["stdin"] = stdin
+        payload = json.dumps(entry, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        """Return the stored ``SandboxResult`` fields for *key*, or None (a miss)."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE results SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def peek(self, key: str) -> bool:
+        """
+        True if *key* has a live entry whose artifacts are still on disk —
+        one the executor would serve.  Unlike ``get``, touches no counters
+        or LRU order.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl_seconds:
+            return False
+        output_files = json.loads(row[0]).get("output_files") or {}
+        return ArtifactStore.intact(ArtifactStore.restore(output_files))
+
+    def set(self, key: str, result: "SandboxResult") -> None:
+        """Store *result* under *key*, evicting LRU rows past ``max_entries``."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, result, created, last_access)"
+                " VALUES (?, ?, ?, ?)",
+                (key, json.dumps(asdict(result)), now, now),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+            excess = count - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM results WHERE key IN ("
+                    " SELECT key FROM results ORDER BY last_access ASC LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        return count
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+
+    def stats(self) -> dict[str, Any]:
+        """Hit/miss counters for this process plus the current entry count."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Process-wide instance shared by every executor
+# ---------------------------------------------------------------------------
+
+_caches: dict[str, SandboxResultCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_sandbox_cache() -> Optional[SandboxResultCache]:
+    """
+    Return the shared cache for the configured ``SANDBOX_CACHE_DIR``.
+
+    Returns None when caching is disabled or the cache cannot be opened —
+    executors then simply run every snippet.
+    """
+    cache_dir = os.getenv("SANDBOX_CACHE_DIR", "cache/sandbox")
+    if not cache_dir or cache_dir.lower() == "off":
+        return None
+    with _caches_lock:
+        cache = _caches.get(cache_dir)
+        if cache is None:
+            try:
+                cache = SandboxResultCache(
+                    cache_dir,
+                    ttl_seconds=float(os.getenv("SANDBOX_CACHE_TTL_S", _DEFAULT_TTL_S)),
+                    max_entries=int(os.getenv("SANDBOX_CACHE_MAX_ENTRIES", _DEFAULT_MAX_ENTRIES)),
+                )
+            except Exception as exc:
+                logger.warning("Sandbox cache disabled (%s)", exc)
+                return None
+            _caches[cache_dir] = cache
+        return cache
@@ -8,23 +8,66 @@ SandboxResult dataclass that the tree pipeline can inspect.
 
 import os
 import io
+import asyncio
+import hashlib
+import signal
+import uuid
 import sys
 import time
+import threading
 import logging
 import textwrap
 import traceback
 import subprocess
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Callable, Optional
 
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from .cache import SandboxResultCache, get_sandbox_cache, runtime_fingerprint
+from .templates import PAYLOAD_ENV, get_template
+from .artifacts import OUTPUT_ENV, ArtifactHandle, ArtifactStore
+from .limits import ResourceLimits, _env_int, rlimit_statement, usage_from_rusage
+from .pool import (
+    SessionPool,
+    DEFAULT_MAX_OUTPUT_BYTES,
+    BoundedCapture,
+    WarmPoolError,
+    get_session_pool,
+    get_warm_pool,
+    warm_pool_available,
+)
+
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
 # Cost constants (E2B pricing: ~$0.000014 / second of sandbox time)
 # ---------------------------------------------------------------------------
 _COST_PER_SECOND_USD = 0.000014
+# Local runs are priced from measured usage at E2B-equivalent rates (CPU
+# seconds plus resident GiB-seconds), so both backends share one budget scale
+_COST_PER_GB_SECOND_USD = 0.0000045
+# Worst-case E2B sandbox boot, reserved per snippet in case it needs a new session
+_E2B_BOOT_S = 5.0
+
+
+# A batch doesn't start a snippet with less than this left before its deadline
+_MIN_SNIPPET_S = 1.0
+
+
+def _snippet_timeout(timeout: float, deadline: Optional[float]) -> Optional[float]:
+    """*timeout* cut to what's left before *deadline*; None once too little is left."""
+    if deadline is None:
+        return timeout
+    left = deadline - time.monotonic()
+    return min(timeout, left) if left >= _MIN_SNIPPET_S else None
+
+
+def _local_cost_usd(cpu_ms: Optional[int], peak_rss_kb: Optional[int], elapsed_ms: int) -> float:
+    cpu_s = (cpu_ms or 0) / 1000.0
+    gb_s = (peak_rss_kb or 0) / (1024 * 1024) * elapsed_ms / 1000.0
+    return cpu_s * _COST_PER_SECOND_USD + gb_s * _COST_PER_GB_SECOND_USD
 
 # ---------------------------------------------------------------------------
 # Deterministic prelude injected before every user snippet
@@ -51,13 +94,22 @@ class SandboxResult:
     success: bool
     stdout: str
     stderr: str
-    output_files: dict[str, str]  # filename -> base64-encoded content
+    output_files: dict[str, ArtifactHandle]  # name -> handle (see artifacts.py)
     execution_time_ms: int
     error: Optional[str]
     cost_estimate_usd: float = 0.0
+    cached: bool = False  # served from SandboxResultCache (no sandbox time spent)
+    truncated: bool = False  # stdout/stderr hit the capture cap (see BoundedCapture)
+    skipped: bool = False  # never started: its batch ran out of time (run_batch deadline)
+    cpu_time_ms: Optional[int] = None  # measured user + system CPU (local runs)
+    peak_rss_kb: Optional[int] = None  # measured peak resident memory (local runs)
 
     def summary(self) -> str:
         status = "OK" if self.success else "FAIL"
+        if self.cached:
+            status += " cached"
+        if self.truncated:
+            status += " truncated"
         return (
             f"[{status}] {self.execution_time_ms}ms | "
             f"${self.cost_estimate_usd:.6f} | "
@@ -73,44 +125,167 @@ class _LocalExecutor:
     Runs code in an isolated subprocess using the current Python interpreter.
     Not a real sandbox — do not use for untrusted code in production.
     Only used when E2B_API_KEY is absent (dev / CI / test mode).
+
+    Snippets are forked from a warm pool of processes that have already
+    imported the prelude (see ``pool.py``); *pool_size* defaults to
+    ``SANDBOX_POOL_SIZE`` (2), and 0 — or a platform without ``fork`` —
+    means a fresh ``python -c`` subprocess per snippet.  Either way output
+    is streamed into ``BoundedCapture`` buffers of *max_output_bytes* per
+    stream rather than held whole; with *kill_on_output_cap* (default) a
+    snippet is killed as soon as either stream passes the cap and its
+    result fails as truncated.
+
+    Every job runs under *limits* (default ``ResourceLimits.from_env``,
+    CPU capped at the timeout; see ``limits.py``) and reports its measured
+    CPU time and peak RSS, which set its cost.  Its working directory is a
+    fresh output directory from *artifacts*, collected as ``output_files``.
     """
 
-    def __init__(self, timeout_seconds: int = 30):
+    def __init__(
+        self,
+        timeout_seconds: int = 30,
+        pool_size: Optional[int] = None,
+        max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+        limits: Optional[ResourceLimits] = None,
+        artifacts: Optional[ArtifactStore] = None,
+        kill_on_output_cap: bool = True,
+    ):
         self.timeout = timeout_seconds
+        self.max_output_bytes = max_output_bytes
+        self.kill_on_output_cap = kill_on_output_cap
+        self.artifacts = artifacts or ArtifactStore()
+        self.limits = limits or ResourceLimits.from_env(cpu_seconds=timeout_seconds)
+        self._rlimits = self.limits.rlimits()
+        if pool_size is None:
+            pool_size = _env_int("SANDBOX_POOL_SIZE", 2)
+        self._pool = (
+            get_warm_pool(SANDBOX_PRELUDE, pool_size)
+            if pool_size > 0 and warm_pool_available()
+            else None
+        )
+
+    def close(self) -> None:
+        """Stop the warm pool's idle zygotes (the shared pool itself stays open)."""
+        if self._pool is not None:
+            self._pool.drain()
+
+    def expected_cost_usd(self, execution_ms: float) -> float:
+        """Cost of a typical job lasting *execution_ms* (CPU-bound, ~100 MB resident)."""
+        return _local_cost_usd(int(execution_ms), 100 * 1024, int(execution_ms))
 
-    def run(self, code: str) -> SandboxResult:
+    def max_cost_usd(self, n: int = 1) -> float:
+        """Cost if *n* snippets all used their full CPU and memory caps until the timeout."""
+        cpu_s = min(self.limits.cpu_seconds or self.timeout, self.timeout)
+        memory_kb = (self.limits.memory_mb or ResourceLimits.memory_mb) * 1024
+        return n * _local_cost_usd(cpu_s * 1000, memory_kb, self.timeout * 1000)
+
+    def run(
+        self, code: str, stdin: Optional[str] = None, on_line: Optional[Callable] = None
+    ) -> SandboxResult:
         full_code = SANDBOX_PRELUDE + "\n" + code
+        if self._pool is not None:
+            try:
+                return self._run_warm(full_code, stdin, on_line=on_line)
+            except WarmPoolError as exc:
+                logger.warning("Warm sandbox pool failed (%s); using a fresh subprocess", exc)
+        return self._run_subprocess(full_code, stdin, on_line)
+
+    def run_batch(
+        self,
+        codes: list[str],
+        stdins: Optional[list[Optional[str]]] = None,
+        on_line: Optional[Callable] = None,
+        deadline: Optional[float] = None,
+    ) -> list[SandboxResult]:
+        """
+        Run *codes* on one checked-out zygote, each in its own fork (own
+        namespace, own timeout).  A pool failure part-way through hands the
+        rest of the batch to fresh subprocesses.  With a *deadline*
+        (``time.monotonic()``) each snippet's timeout is cut to the time
+        left, and the batch stops — returning fewer results — once too
+        little is left to start the next one.
+        """
+        jobs = list(zip(
+            [SANDBOX_PRELUDE + "\n" + code for code in codes],
+            stdins if stdins is not None else [None] * len(codes),
+        ))
+        results: list[SandboxResult] = []
+        if self._pool is not None:
+            try:
+                with self._pool.checkout() as zygote:
+                    for full_code, stdin in jobs:
+                        timeout = _snippet_timeout(self.timeout, deadline)
+                        if timeout is None:
+                            return results
+                        results.append(self._run_warm(full_code, stdin, zygote, on_line, timeout))
+            except WarmPoolError as exc:
+                logger.warning("Warm sandbox pool failed (%s); using fresh subprocesses", exc)
+        for full_code, stdin in jobs[len(results):]:
+            timeout = _snippet_timeout(self.timeout, deadline)
+            if timeout is None:
+                break
+            results.append(self._run_subprocess(full_code, stdin, on_line, timeout))
+        return results
+
+    def _run_warm(
+        self,
+        full_code: str,
+        stdin: Optional[str] = None,
+        zygote=None,
+        on_line=None,
+        timeout: Optional[float] = None,
+    ) -> SandboxResult:
         start = time.monotonic()
+        timeout = timeout or self.timeout
+        runner = zygote if zygote is not None else self._pool
+        job_dir = self.artifacts.job_dir()
         try:
-            result = subprocess.run(
-                [sys.executable, "-c", full_code],
-                capture_output=True,
-                text=True,
-                timeout=self.timeout,
+            returncode, stdout, stderr, timed_out, usage = runner.run(
+                full_code, timeout, stdin,
+                max_output_bytes=self.max_output_bytes, on_line=on_line, rlimits=self._rlimits,
+                cwd=job_dir, env={OUTPUT_ENV: job_dir}, kill_on_overflow=self.kill_on_output_cap,
             )
-            elapsed_ms = int((time.monotonic() - start) * 1000)
-            success = result.returncode == 0
-            return SandboxResult(
-                success=success,
-                stdout=result.stdout,
-                stderr=result.stderr,
-                output_files={},
-                execution_time_ms=elapsed_ms,
-                error=None if success else result.stderr.strip(),
-                cost_estimate_usd=0.0,  # local — no cost
+        finally:
+            output_files = self.artifacts.collect(job_dir)
+        return self._result(
+            start, returncode, stdout, stderr, timed_out, usage, output_files, timeout
+        )
+
+    def _run_subprocess(
+        self, full_code: str, stdin: Optional[str] = None, on_line=None,
+        timeout: Optional[float] = None,
+    ) -> SandboxResult:
+        start = time.monotonic()
+        timeout = timeout or self.timeout
+        job_dir = self.artifacts.job_dir()
+        try:
+            proc = subprocess.Popen(
+                [sys.executable, "-c", rlimit_statement(self._rlimits) + full_code],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=job_dir,
+                env={**os.environ, OUTPUT_ENV: job_dir},
             )
-        except subprocess.TimeoutExpired:
-            elapsed_ms = int((time.monotonic() - start) * 1000)
-            return SandboxResult(
-                success=False,
-                stdout="",
-                stderr="",
-                output_files={},
-                execution_time_ms=elapsed_ms,
-                error=f"Execution timed out after {self.timeout}s",
-                cost_estimate_usd=0.0,
+            on_overflow = (lambda: _kill_running(proc)) if self.kill_on_output_cap else None
+            stdout = BoundedCapture(self.max_output_bytes, "stdout", on_line, on_overflow)
+            stderr = BoundedCapture(self.max_output_bytes, "stderr", on_line, on_overflow)
+            threads = [
+                threading.Thread(target=_write_stdin, args=(proc.stdin, stdin), daemon=True),
+                threading.Thread(target=_pump, args=(proc.stdout, stdout), daemon=True),
+                threading.Thread(target=_pump, args=(proc.stderr, stderr), daemon=True),
+            ]
+            for thread in threads:
+                thread.start()
+            timed_out, usage = _reap(proc, timeout)
+            for thread in threads:
+                thread.join(timeout=1.0)  # a grandchild may hold the pipes open
+            return self._result(
+                start, proc.returncode, stdout, stderr, timed_out, usage,
+                self.artifacts.collect(job_dir), timeout,
             )
         except Exception as exc:
+            self.artifacts.collect(job_dir)  # removes the directory if empty
             elapsed_ms = int((time.monotonic() - start) * 1000)
             return SandboxResult(
                 success=False,
@@ -122,6 +297,122 @@ class _LocalExecutor:
                 cost_estimate_usd=0.0,
             )
 
+    def _result(
+        self,
+        start: float,
+        returncode: int,
+        stdout: BoundedCapture,
+        stderr: BoundedCapture,
+        timed_out: bool,
+        usage: dict,
+        output_files: dict[str, ArtifactHandle],
+        timeout: Optional[float] = None,
+    ) -> SandboxResult:
+        elapsed_ms = int((time.monotonic() - start) * 1000)
+        stderr_text = stderr.text()
+        success = returncode == 0 and not timed_out
+        truncated = stdout.truncated or stderr.truncated
+        if timed_out:
+            error = f"Execution timed out after {timeout or self.timeout:g}s"
+        elif truncated and self.kill_on_output_cap and returncode == -signal.SIGKILL:
+            error = f"Output exceeded {self.max_output_bytes} bytes; killed"
+        elif hasattr(signal, "SIGXCPU") and returncode == -signal.SIGXCPU:
+            error = f"CPU time limit exceeded ({self.limits.cpu_seconds}s)"
+        elif returncode < 0:
+            error = stderr_text.strip() or f"Killed by signal {-returncode}"
+        else:
+            error = None if success else stderr_text.strip()
+        cpu_ms, peak_rss_kb = usage.get("cpu_ms"), usage.get("maxrss_kb")
+        return SandboxResult(
+            success=success,
+            stdout=stdout.text(),
+            stderr=stderr_text,
+            output_files=output_files,
+            execution_time_ms=elapsed_ms,
+            error=error,
+            cost_estimate_usd=_local_cost_usd(cpu_ms, peak_rss_kb, elapsed_ms),
+            truncated=truncated,
+            cpu_time_ms=cpu_ms,
+            peak_rss_kb=peak_rss_kb,
+        )
+
+
+def _reap(proc: subprocess.Popen, timeout: float) -> tuple[bool, dict]:
+    """
+    Wait for *proc*, SIGKILLing it after *timeout*: ``(timed_out, usage)``.
+    Reaps with ``os.wait4`` where available to measure CPU time and peak RSS.
+    """
+    if not hasattr(os, "wait4"):
+        try:
+            proc.wait(timeout=timeout)
+            return False, usage_from_rusage(None)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            return True, usage_from_rusage(None)
+    killed = threading.Event()
+    lock = threading.Lock()
+
+    def kill():
+        # os.kill, not proc.kill(): Popen would poll (and could reap) the
+        # child underneath the wait4 below
+        with lock:
+            if proc.returncode is None:
+                killed.set()
+                try:
+                    os.kill(proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+    timer = threading.Timer(timeout, kill)
+    timer.daemon = True
+    timer.start()
+    try:
+        _, status, rusage = os.wait4(proc.pid, 0)
+    finally:
+        timer.cancel()
+    with lock:
+        proc.returncode = os.waitstatus_to_exitcode(status)
+    return killed.is_set(), usage_from_rusage(rusage)
+
+
+def _kill_running(proc: subprocess.Popen) -> None:
+    """SIGKILL *proc* unless it has already been reaped."""
+    if proc.returncode is None:
+        try:
+            os.kill(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def _write_stdin(pipe, text: Optional[str]) -> None:
+    """Feed a subprocess its stdin, then close it (EOF)."""
+    try:
+        pipe.write((text or "").encode())
+    except OSError:
+        pass  # child exited without reading everything
+    finally:
+        try:
+            pipe.close()
+        except OSError:
+            pass
+
+
+def _pump(pipe, capture: BoundedCapture) -> None:
+    """Stream a subprocess pipe into *capture* until EOF."""
+    try:
+        for chunk in iter(lambda: pipe.read1(65536), b""):
+            capture.feed(chunk)
+    finally:
+        capture.close()
+        pipe.close()
+
+
+def _message_bytes(message) -> bytes:
+    """One E2B streaming output message (``OutputMessage.line`` or text) as a line of bytes."""
+    line = str(getattr(message, "line", message))
+    return (line if line.endswith("\n") else line + "\n").encode()
+
 
 # ---------------------------------------------------------------------------
 # E2B cloud executor
@@ -130,11 +421,55 @@ class _E2BExecutor:
     """
     Runs code in an E2B cloud sandbox (https://e2b.dev).
     Requires E2B_API_KEY in the environment.
+
+    Sandboxes come from a process-wide ``SessionPool`` (``E2B_POOL_SIZE``,
+    default 2) instead of being booted per snippet, so boot time is paid
+    once per session; it, and the time sessions sit idle, is charged to
+    the next job's ``cost_estimate_usd`` (and so to the budget).  Each job
+    runs in a fresh code context (or after ``%reset -f`` on SDKs without
+    contexts), so no globals leak between snippets.  *sandbox_factory*
+    replaces ``Sandbox.create`` and gives the executor a private pool
+    (tests use a local stand-in).
+
+    Each job gets an empty remote output directory (its context's working
+    directory); files left there are downloaded into *artifacts* within
+    its caps and the remote copy is removed.
     """
 
-    def __init__(self, timeout_seconds: int = 60):
+    def __init__(
+        self,
+        timeout_seconds: int = 60,
+        sandbox_factory: Optional[Callable[[], object]] = None,
+        pool_size: Optional[int] = None,
+        max_lifetime_s: float = 300.0,
+        max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+        artifacts: Optional[ArtifactStore] = None,
+    ):
         self.timeout = timeout_seconds
+        self.max_output_bytes = max_output_bytes
+        self.artifacts = artifacts or ArtifactStore()
         self._validate_api_key()
+        if pool_size is None:
+            pool_size = _env_int("E2B_POOL_SIZE", 2, minimum=1)
+        pool_kwargs = {"size": max(1, pool_size), "max_lifetime_s": max_lifetime_s}
+        self._owns_pool = sandbox_factory is not None
+        if self._owns_pool:
+            self._pool = SessionPool(sandbox_factory, **pool_kwargs)
+        else:
+            # Sandbox lifetime must outlast the pool's recycling
+            lifetime = int(max_lifetime_s) + timeout_seconds
+            self._pool = get_session_pool(
+                ("e2b", pool_kwargs["size"], max_lifetime_s, lifetime),
+                lambda: self._sandbox_class().create(timeout=lifetime),
+                **pool_kwargs,
+            )
+
+    def close(self) -> None:
+        """Kill idle sessions; a private pool is closed, a shared one stays open."""
+        if self._owns_pool:
+            self._pool.close()
+        else:
+            self._pool.drain()
 
     def _validate_api_key(self):
         if not os.getenv("E2B_API_KEY"):
@@ -142,8 +477,20 @@ class _E2BExecutor:
                 "E2B_API_KEY not set. Get your key at https://e2b.dev"
             )
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=2, max=10))
-    def run(self, code: str) -> SandboxResult:
+    def expected_cost_usd(self, execution_ms: float) -> float:
+        """Spend for a job lasting *execution_ms*."""
+        return execution_ms / 1000.0 * _COST_PER_SECOND_USD
+
+    def max_cost_usd(self, n: int = 1) -> float:
+        """
+        Spend if *n* snippets all booted a sandbox and ran to the timeout,
+        plus the overhead accrued so far.
+        """
+        seconds = n * (self.timeout + _E2B_BOOT_S) + self._pool.pending_overhead_s()
+        return seconds * _COST_PER_SECOND_USD
+
+    @staticmethod
+    def _sandbox_class():
         try:
             from e2b_code_interpreter import Sandbox  # type: ignore
         except ImportError:
@@ -151,52 +498,338 @@ class _E2BExecutor:
                 "e2b-code-interpreter is not installed. "
                 "Run: pip install e2b-code-interpreter"
             )
+        return Sandbox
+
+    def _run_isolated(
+        self,
+        sbx,
+        code: str,
+        stdin: Optional[str] = None,
+        output: Optional[tuple[BoundedCapture, BoundedCapture]] = None,
+        out_dir: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ):
+        """
+        Run *code* on a pooled sandbox without seeing earlier jobs' state.
+        The kernel has no usable stdin, so *stdin* is uploaded as a file
+        whose path is passed in ``PAYLOAD_ENV`` (see ``templates.py``).
+        The SDK's streaming output callbacks feed the *output* captures
+        (stdout, stderr), so only capped output is kept; *out_dir* is the
+        job's remote output directory.  The payload file is removed
+        after the run so long-lived sessions don't accumulate them.
+        """
+        kwargs = {"timeout": timeout or self.timeout, "envs": {}}
+        context_kwargs = {}
+        if out_dir is not None:
+            kwargs["envs"][OUTPUT_ENV] = out_dir
+            context_kwargs["cwd"] = out_dir
+        if output is not None:
+            stdout, stderr = output
+            kwargs["on_stdout"] = lambda msg: stdout.feed(_message_bytes(msg))
+            kwargs["on_stderr"] = lambda msg: stderr.feed(_message_bytes(msg))
+        payload = None
+        if stdin is not None:
+            payload = f"/tmp/sandbox-payload-{hashlib.sha256(stdin.encode()).hexdigest()[:16]}.json"
+            sbx.files.write(payload, stdin)
+            kwargs["envs"][PAYLOAD_ENV] = payload
+        try:
+            if hasattr(sbx, "create_code_context"):
+                context = sbx.create_code_context(**context_kwargs)
+                try:
+                    return sbx.run_code(code, context=context, **kwargs)
+                finally:
+                    if hasattr(sbx, "remove_code_context"):
+                        sbx.remove_code_context(context)
+            sbx.run_code("%reset -f", timeout=self.timeout)
+            return sbx.run_code(code, **kwargs)
+        finally:
+            if payload is not None:
+                self._remove(sbx, payload)
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=2, max=10))
+    def run(
+        self, code: str, stdin: Optional[str] = None, on_line: Optional[Callable] = None
+    ) -> SandboxResult:
+        start = time.monotonic()
+        try:
+            with self._pool.session() as sbx:
+                return self._execute(sbx, code, stdin, on_line)
+        except ImportError:
+            raise
+        except Exception as exc:
+            return self._failed(start, exc)
+
+    def run_batch(
+        self,
+        codes: list[str],
+        stdins: Optional[list[Optional[str]]] = None,
+        on_line: Optional[Callable] = None,
+        deadline: Optional[float] = None,
+    ) -> list[SandboxResult]:
+        """
+        Run *codes* back to back on one pooled sandbox, each in a fresh code
+        context with its own timeout.  A snippet that breaks the sandbox
+        fails alone; the rest of the batch continues on a new session.
+        *deadline* is as for ``_LocalExecutor.run_batch``.
+        """
+        stdins = stdins if stdins is not None else [None] * len(codes)
+        results: list[SandboxResult] = []
+        while len(results) < len(codes):
+            if _snippet_timeout(self.timeout, deadline) is None:
+                break
+            start = time.monotonic()
+            try:
+                with self._pool.session() as sbx:
+                    while len(results) < len(codes):
+                        timeout = _snippet_timeout(self.timeout, deadline)
+                        if timeout is None:
+                            break
+                        start = time.monotonic()
+                        i = len(results)
+                        results.append(self._execute(sbx, codes[i], stdins[i], on_line, timeout))
+            except ImportError:
+                raise
+            except Exception as exc:
+                results.append(self._failed(start, exc))
+        return results
 
+    def _execute(
+        self, sbx, code: str, stdin: Optional[str] = None, on_line=None,
+        timeout: Optional[float] = None,
+    ) -> SandboxResult:
+        """One snippet on a checked-out sandbox (SDK errors propagate)."""
         full_code = SANDBOX_PRELUDE + "\n" + code
         start = time.monotonic()
+        out_dir = None
+        if hasattr(sbx.files, "make_dir"):
+            out_dir = f"/tmp/sandbox-out-{uuid.uuid4().hex[:16]}"
+            sbx.files.make_dir(out_dir)
+        # Output is captured from the streaming callbacks, within the cap,
+        # rather than read back from the SDK's whole ``execution.logs``
+        stdout, stderr = (
+            BoundedCapture(self.max_output_bytes, stream, on_line)
+            for stream in ("stdout", "stderr")
+        )
+        try:
+            execution = self._run_isolated(
+                sbx, full_code, stdin, (stdout, stderr), out_dir, timeout
+            )
+        except BaseException:
+            if out_dir:
+                self._remove(sbx, out_dir)
+            raise
+        finally:
+            stdout.close()
+            stderr.close()
+        elapsed_ms = int((time.monotonic() - start) * 1000)
+        output_files = self._download(sbx, out_dir) if out_dir else {}
+        # This job's run time, plus the pool's boot / idle time since the last job
+        cost = (elapsed_ms / 1000.0 + self._pool.take_overhead_s()) * _COST_PER_SECOND_USD
+
+        success = execution.error is None
+        error_msg = str(execution.error) if execution.error else None
+
+        logger.info(
+            "E2B execution: %dms $%.6f success=%s",
+            elapsed_ms, cost, success,
+        )
+
+        return SandboxResult(
+            success=success,
+            stdout=stdout.text().strip(),
+            stderr=stderr.text().strip(),
+            output_files=output_files,
+            execution_time_ms=elapsed_ms,
+            error=error_msg,
+            cost_estimate_usd=cost,
+            truncated=stdout.truncated or stderr.truncated,
+        )
 
+    def _download(self, sbx, out_dir: str) -> dict[str, ArtifactHandle]:
+        """Fetch the files a job left in *out_dir* into the artifact store."""
         try:
-            with Sandbox.create(timeout=self.timeout) as sbx:
-                execution = sbx.run_code(full_code)
-                elapsed_ms = int((time.monotonic() - start) * 1000)
-                elapsed_s = elapsed_ms / 1000.0
-                cost = elapsed_s * _COST_PER_SECOND_USD
-
-                logs_out = getattr(execution.logs, "stdout", [])
-                logs_err = getattr(execution.logs, "stderr", [])
-                stdout_full = "\n".join(logs_out)
-                stderr_full = "\n".join(logs_err)
-
-                success = execution.error is None
-                error_msg = str(execution.error) if execution.error else None
-
-                logger.info(
-                    "E2B execution: %dms $%.6f success=%s",
-                    elapsed_ms, cost, success,
-                )
+            entries = [
+                (entry.name, int(getattr(entry, "size", 0) or 0))
+                for entry in sbx.files.list(out_dir)
+                if getattr(entry.type, "value", entry.type) == "file"
+            ]
 
-                return SandboxResult(
-                    success=success,
-                    stdout=stdout_full.strip(),
-                    stderr=stderr_full.strip(),
-                    output_files={},
-                    execution_time_ms=elapsed_ms,
-                    error=error_msg,
-                    cost_estimate_usd=cost,
-                )
+            def read(name: str) -> bytes:
+                data = sbx.files.read(f"{out_dir}/{name}", format="bytes")
+                return data.encode() if isinstance(data, str) else bytes(data)
 
+            if not entries:
+                return {}
+            return self.artifacts.download(self.artifacts.job_dir(), entries, read)
         except Exception as exc:
-            elapsed_ms = int((time.monotonic() - start) * 1000)
-            logger.error("E2B execution failed: %s", exc)
-            return SandboxResult(
-                success=False,
-                stdout="",
-                stderr=traceback.format_exc(),
-                output_files={},
-                execution_time_ms=elapsed_ms,
-                error=str(exc),
-                cost_estimate_usd=0.0,
-            )
+            logger.warning("E2B artifact download from %s failed (%s)", out_dir, exc)
+            return {}
+        finally:
+            self._remove(sbx, out_dir)
+
+    @staticmethod
+    def _remove(sbx, path: str) -> None:
+        try:
+            sbx.files.remove(path)
+        except Exception as exc:
+            logger.debug("E2B could not remove %s (%s)", path, exc)
+
+    @staticmethod
+    def _failed(start: float, exc: Exception) -> SandboxResult:
+        elapsed_ms = int((time.monotonic() - start) * 1000)
+        logger.error("E2B execution failed: %s", exc)
+        return SandboxResult(
+            success=False,
+            stdout="",
+            stderr=traceback.format_exc(),
+            output_files={},
+            execution_time_ms=elapsed_ms,
+            error=str(exc),
+            cost_estimate_usd=0.0,
+        )
+
+
+# ---------------------------------------------------------------------------
+# Per-backend execution slots (shared by threads and asyncio tasks)
+# ---------------------------------------------------------------------------
+class _Slots:
+    """
+    A counting semaphore that threads (``acquire``) and coroutines
+    (``await aacquire``) can wait on together, first come first served —
+    an asyncio waiter parks on a future instead of occupying a thread.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._free = size
+        self._lock = threading.Lock()
+        self._waiters: deque = deque()  # threading.Event | (loop, asyncio.Future)
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self._free > 0 and not self._waiters:
+                self._free -= 1
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+        event.wait()  # release() hands the slot over directly
+
+    async def aacquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._free > 0 and not self._waiters:
+                self._free -= 1
+                return
+            future = loop.create_future()
+            self._waiters.append((loop, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove((loop, future))
+                    handed_over = False
+                except ValueError:
+                    handed_over = True
+            if handed_over:
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            if not self._waiters:
+                self._free += 1
+                return
+            waiter = self._waiters.popleft()
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+        else:
+            loop, future = waiter
+            loop.call_soon_threadsafe(self._wake, future)
+
+    def _wake(self, future: asyncio.Future) -> None:
+        if future.cancelled():
+            self.release()  # its task gave up after the hand-over
+        else:
+            future.set_result(None)
+
+    @property
+    def in_use(self) -> int:
+        with self._lock:
+            return self.size - self._free
+
+
+_slots: dict[str, _Slots] = {}
+_slots_lock = threading.Lock()
+
+
+def _backend_slots(mode: str) -> _Slots:
+    """Process-wide execution limit for backend *mode* (``SANDBOX_MAX_CONCURRENCY``)."""
+    with _slots_lock:
+        slots = _slots.get(mode)
+        if slots is None:
+            slots = _slots[mode] = _Slots(_env_int("SANDBOX_MAX_CONCURRENCY", 4, minimum=1))
+        return slots
+
+
+# ---------------------------------------------------------------------------
+# Run history (feeds cost / success forecasts for scheduling)
+# ---------------------------------------------------------------------------
+# Assumed for code that hasn't run yet in this process
+_PRIOR_EXECUTION_MS = 1000
+_PRIOR_SUCCESS_RATE = 0.9
+_PRIOR_WEIGHT = 2  # pseudo-runs behind the prior success rate
+_EWMA_ALPHA = 0.3
+
+
+@dataclass
+class SandboxForecast:
+    """Predicted outcome of running one snippet (see ``SandboxExecutor.forecast``)."""
+    cost_usd: float
+    execution_time_ms: float
+    success_rate: float
+    samples: int          # past runs of this code behind the figures (0 = prior)
+    cached: bool = False  # a cached result exists — free and certain
+
+
+class _RunHistory:
+    """
+    Moving averages of execution time, cost and success per backend, code
+    and stdin size.  Templates run the same code on every payload, so the
+    payload's size (in power-of-two buckets: a template's input grows with
+    e.g. its paper count) separates a 5-paper run from a 500-paper one.
+    """
+
+    def __init__(self):
+        self._stats: dict[tuple[str, str, int], list[float]] = {}  # [runs, successes, ms, usd]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(mode: str, code: str, stdin: Optional[str]) -> tuple[str, str, int]:
+        size = len(stdin.encode()) if stdin else 0
+        return mode, hashlib.sha256(code.encode()).hexdigest(), size.bit_length()
+
+    def record(self, mode: str, code: str, stdin: Optional[str], result: SandboxResult) -> None:
+        key = self._key(mode, code, stdin)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                self._stats[key] = [
+                    1, int(result.success), result.execution_time_ms, result.cost_estimate_usd
+                ]
+                return
+            stats[0] += 1
+            stats[1] += int(result.success)
+            stats[2] += _EWMA_ALPHA * (result.execution_time_ms - stats[2])
+            stats[3] += _EWMA_ALPHA * (result.cost_estimate_usd - stats[3])
+
+    def get(self, mode: str, code: str, stdin: Optional[str]) -> Optional[list[float]]:
+        with self._lock:
+            stats = self._stats.get(self._key(mode, code, stdin))
+            return list(stats) if stats else None
+
+
+_history = _RunHistory()
 
 
 # ---------------------------------------------------------------------------
@@ -214,27 +847,93 @@ class SandboxExecutor:
 
     Auto-detects E2B_API_KEY. Falls back to local subprocess when absent.
     Tracks cumulative spend so callers can enforce a budget cap.
+    Safe to share between threads and asyncio tasks (e.g. parallel graph
+    nodes, or topics in a batch run):
+
+    - at most ``SANDBOX_MAX_CONCURRENCY`` (default 4) executions run per
+      backend at once, process-wide; further callers queue for a slot.
+      An explicit *max_concurrency* gives this executor its own limit
+      instead of the shared one;
+    - before launch, the worst-case cost (every snippet running to the
+      timeout) is reserved against the budget under a lock, and the
+      reservation is swapped for the actual cost afterwards — concurrent
+      callers can't overshoot the budget between check and spend.
+
+    Successful results are cached by prelude, code and runtime versions
+    (see ``cache.py``); hits cost nothing and are served even when the
+    budget is spent.  *cache* is a ``SandboxResultCache``, None to disable,
+    or ``"env"`` (default) to resolve ``get_sandbox_cache()`` per run.
+
+    stdout and stderr are each capped at *max_output_bytes*
+    (``SANDBOX_MAX_OUTPUT_BYTES``, default 256 KiB); past the cap output
+    is dropped as it streams in, the text ends with a truncation marker
+    and ``result.truncated`` is set.  A local snippet is also killed once
+    either stream passes the cap, and fails.
+
+    Files a snippet writes to its working directory (or
+    ``$SANDBOX_OUTPUT_DIR``) come back as ``ArtifactHandle``s in
+    ``output_files``, stored under this executor's run directory in
+    *artifact_dir* (``SANDBOX_ARTIFACT_DIR``; see ``artifacts.py``).
     """
 
-    def __init__(self, timeout_seconds: int = 60, budget_usd: float = 1.0):
+    def __init__(
+        self,
+        timeout_seconds: int = 60,
+        budget_usd: float = 1.0,
+        cache="env",
+        max_concurrency: Optional[int] = None,
+        max_output_bytes: Optional[int] = None,
+        artifact_dir: Optional[str] = None,
+    ):
+        if max_output_bytes is None:
+            max_output_bytes = _env_int(
+                "SANDBOX_MAX_OUTPUT_BYTES", DEFAULT_MAX_OUTPUT_BYTES, minimum=1
+            )
         self.budget_usd = budget_usd
         self._spent_usd = 0.0
+        self._reserved_usd = 0.0
+        self._lock = threading.Lock()
+        self._cache = cache
+        self.artifacts = ArtifactStore(artifact_dir)
+        backend_kwargs = {"max_output_bytes": max_output_bytes, "artifacts": self.artifacts}
 
         if os.getenv("E2B_API_KEY") and not os.getenv("E2B_API_KEY", "").startswith("your_"):
             try:
                 self._backend: _E2BExecutor | _LocalExecutor = _E2BExecutor(
-                    timeout_seconds=timeout_seconds
+                    timeout_seconds=timeout_seconds, **backend_kwargs
                 )
                 self._mode = "e2b"
                 logger.info("SandboxExecutor: using E2B cloud sandbox")
             except Exception as exc:
                 logger.warning("E2B init failed (%s); falling back to local executor", exc)
-                self._backend = _LocalExecutor(timeout_seconds=min(timeout_seconds, 30))
+                self._backend = _LocalExecutor(
+                    timeout_seconds=min(timeout_seconds, 30), **backend_kwargs
+                )
                 self._mode = "local"
         else:
-            self._backend = _LocalExecutor(timeout_seconds=min(timeout_seconds, 30))
+            self._backend = _LocalExecutor(
+                timeout_seconds=min(timeout_seconds, 30), **backend_kwargs
+            )
             self._mode = "local"
             logger.info("SandboxExecutor: using local subprocess (no E2B key)")
+        if max_concurrency is not None:
+            self._slots = _Slots(max(1, max_concurrency))
+        else:
+            self._slots = _backend_slots(self._mode)
+
+    def close(self) -> None:
+        """
+        Release the backend's idle pooled workers or sessions.  Runs still in
+        flight finish normally, and the executor stays usable (pools restart
+        on demand).  Also a context manager.
+        """
+        self._backend.close()
+
+    def __enter__(self) -> "SandboxExecutor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
 
     @property
     def mode(self) -> str:
@@ -245,37 +944,237 @@ class SandboxExecutor:
     def spent_usd(self) -> float:
         return self._spent_usd
 
+    @property
+    def reserved_usd(self) -> float:
+        """Worst-case cost held for executions still in flight."""
+        return self._reserved_usd
+
     def budget_remaining_usd(self) -> float:
-        return max(0.0, self.budget_usd - self._spent_usd)
+        return max(0.0, self.budget_usd - self._spent_usd - self._reserved_usd)
+
+    def max_cost_usd(self, n: int = 1) -> float:
+        """Worst-case cost of *n* snippets — what ``run_batch`` reserves for them."""
+        return self._backend.max_cost_usd(n)
+
+    def forecast(self, code: str, stdin: Optional[str] = None) -> SandboxForecast:
+        """
+        Expected cost, duration and success of running *code* (on *stdin*),
+        from this process's past runs of the same code on similarly sized
+        stdin on this backend (moving averages; a fixed prior before the
+        first run).  A cached result whose artifacts are still on disk
+        forecasts as free and certain.
+        """
+        store = self._result_cache()
+        if store is not None:
+            key = SandboxResultCache.make_key(
+                SANDBOX_PRELUDE, code, runtime_fingerprint(self._mode), stdin
+            )
+            if store.peek(key):
+                return SandboxForecast(0.0, 0.0, 1.0, samples=0, cached=True)
+        stats = _history.get(self._mode, code, stdin)
+        if stats is None:
+            return SandboxForecast(
+                cost_usd=self._backend.expected_cost_usd(_PRIOR_EXECUTION_MS),
+                execution_time_ms=_PRIOR_EXECUTION_MS,
+                success_rate=_PRIOR_SUCCESS_RATE,
+                samples=0,
+            )
+        runs, successes, ms, usd = stats
+        return SandboxForecast(
+            cost_usd=usd,
+            execution_time_ms=ms,
+            success_rate=(successes + _PRIOR_SUCCESS_RATE * _PRIOR_WEIGHT) / (runs + _PRIOR_WEIGHT),
+            samples=int(runs),
+        )
 
-    def run(self, code: str) -> SandboxResult:
+    def run(
+        self,
+        code: str,
+        cache: bool = True,
+        stdin: Optional[str] = None,
+        on_line: Optional[Callable[[str, str], None]] = None,
+    ) -> SandboxResult:
         """
         Execute Python *code* in the sandbox.
 
         Args:
             code: Python source to run. SANDBOX_PRELUDE is auto-prepended.
+            cache: False for snippets whose output isn't a pure function of
+                their code and stdin (clock, network, files) — never read
+                or stored.
+            stdin: Text fed to the snippet's standard input (the JSON
+                payload of an analysis template).
+            on_line: Called as ``on_line(stream, line)`` ("stdout" or
+                "stderr") for each captured line while the snippet runs —
+                live progress.  Not called for cached results.
 
         Returns:
             SandboxResult with stdout, stderr, timing, and cost.
 
         Raises:
-            RuntimeError: if budget is exhausted.
+            RuntimeError: if budget is exhausted (and the result isn't cached).
         """
-        if self._spent_usd >= self.budget_usd:
-            raise RuntimeError(
-                f"Sandbox budget exhausted: ${self._spent_usd:.4f} spent, "
-                f"${self.budget_usd:.4f} limit"
-            )
+        return self.run_batch([code], cache=cache, stdins=[stdin], on_line=on_line)[0]
 
-        result = self._backend.run(code)
-        self._spent_usd += result.cost_estimate_usd
-        logger.debug("Sandbox: %s", result.summary())
-        return result
+    async def arun(
+        self,
+        code: str,
+        cache: bool = True,
+        stdin: Optional[str] = None,
+        on_line: Optional[Callable[[str, str], None]] = None,
+    ) -> SandboxResult:
+        """
+        Asyncio counterpart of ``run``: waits for an execution slot without
+        blocking a thread, then runs the snippet on a worker thread (which
+        is also where *on_line* is called from).
 
-    def run_analysis(self, description: str, code: str) -> SandboxResult:
+        Cancelling the task once the snippet has started doesn't stop it:
+        the worker thread keeps the slot and the budget reservation until
+        the snippet finishes, then records its actual cost.
+        """
+        stdins = [stdin]
+        results, keys, store = await asyncio.to_thread(self._lookup, [code], stdins, cache)
+        if results[0] is not None:
+            return results[0]
+        reserved = self._reserve(1)
+        try:
+            await self._slots.aacquire()
+        except BaseException:
+            self._settle(reserved, [])
+            raise
+
+        def work() -> SandboxResult:
+            # Settles on the worker thread, whether or not anyone still awaits it
+            ran: list[SandboxResult] = []
+            try:
+                ran.append(self._backend.run(code, stdin, on_line))
+            finally:
+                self._slots.release()
+                self._settle(reserved, ran)
+            _history.record(self._mode, code, stdin, ran[0])
+            self._store(store, keys[0], ran[0])
+            logger.debug("Sandbox: %s", ran[0].summary())
+            return ran[0]
+
+        return await asyncio.shield(asyncio.to_thread(work))
+
+    def run_batch(
+        self,
+        snippets: list[str],
+        cache: bool = True,
+        stdins: Optional[list[Optional[str]]] = None,
+        on_line: Optional[Callable[[str, str], None]] = None,
+        deadline: Optional[float] = None,
+    ) -> list[SandboxResult]:
+        """
+        Execute many snippets in one sandbox session; results keep *snippets*' order.
+
+        Each snippet runs in its own namespace with the full timeout, and a
+        failing or hung snippet doesn't affect the others.  Cached snippets
+        are served without touching the sandbox.  The uncached ones share
+        one execution slot and one budget reservation.  *stdins*, if given,
+        is one stdin text (or None) per snippet; *on_line* is as for ``run``.
+        With a *deadline* (``time.monotonic()``) no snippet runs past it:
+        each one's timeout is cut to the time left, and those that can't
+        start in time come back as failed results with ``skipped`` set.
+
+        Raises:
+            RuntimeError: if budget is exhausted and any snippet is uncached.
+        """
+        stdins = stdins if stdins is not None else [None] * len(snippets)
+        results, keys, store = self._lookup(snippets, stdins, cache)
+        misses = [i for i, r in enumerate(results) if r is None]
+        if misses:
+            reserved = self._reserve(len(misses))
+            ran: list[SandboxResult] = []
+            try:
+                self._slots.acquire()
+                try:
+                    ran = self._backend.run_batch(
+                        [snippets[i] for i in misses], [stdins[i] for i in misses], on_line,
+                        deadline=deadline,
+                    )
+                finally:
+                    self._slots.release()
+            finally:
+                self._settle(reserved, ran)
+            for i, result in zip(misses, ran):
+                results[i] = result
+                _history.record(self._mode, snippets[i], stdins[i], result)
+                self._store(store, keys[i], result)
+            for i in misses[len(ran):]:
+                results[i] = SandboxResult(
+                    success=False, stdout="", stderr="", output_files={},
+                    execution_time_ms=0, error="Skipped: batch deadline reached", skipped=True,
+                )
+        for result in results:
+            logger.debug("Sandbox: %s", result.summary())
+        return results
+
+    def _lookup(self, snippets: list[str], stdins: list[Optional[str]], cache: bool):
+        """Cached results (None where missing), their keys, and the store."""
+        store = self._result_cache() if cache else None
+        results: list[Optional[SandboxResult]] = [None] * len(snippets)
+        keys: list[Optional[str]] = [None] * len(snippets)
+        if store is not None:
+            runtime = runtime_fingerprint(self._mode)
+            for i, code in enumerate(snippets):
+                keys[i] = SandboxResultCache.make_key(SANDBOX_PRELUDE, code, runtime, stdins[i])
+                hit = store.get(keys[i])
+                if hit is None:
+                    continue
+                output_files = ArtifactStore.restore(hit.get("output_files") or {})
+                if not ArtifactStore.intact(output_files):
+                    continue  # its artifacts were cleaned up — run it again
+                results[i] = SandboxResult(**{
+                    **hit, "output_files": output_files, "cost_estimate_usd": 0.0, "cached": True,
+                })
+        return results, keys, store
+
+    def _reserve(self, n: int) -> float:
+        """Atomically hold the worst-case cost of *n* snippets; raises if it doesn't fit."""
+        estimate = self._backend.max_cost_usd(n)
+        with self._lock:
+            committed = self._spent_usd + self._reserved_usd
+            if committed >= self.budget_usd or committed + estimate > self.budget_usd:
+                raise RuntimeError(
+                    f"Sandbox budget exhausted: ${self._spent_usd:.4f} spent, "
+                    f"${self._reserved_usd:.4f} reserved, ${self.budget_usd:.4f} limit"
+                )
+            self._reserved_usd += estimate
+        return estimate
+
+    def _settle(self, reserved: float, results: list[SandboxResult]) -> None:
+        """Swap a reservation for the actual cost of *results*."""
+        with self._lock:
+            # round away float drift so an idle executor holds exactly 0
+            self._reserved_usd = max(0.0, round(self._reserved_usd - reserved, 9))
+            self._spent_usd += sum(r.cost_estimate_usd for r in results)
+
+    @staticmethod
+    def _store(
+        store: Optional[SandboxResultCache], key: Optional[str], result: SandboxResult
+    ) -> None:
+        if store is not None and result.success:
+            try:
+                store.set(key, result)
+            except Exception as exc:
+                logger.warning("Sandbox cache write failed (%s)", exc)
+
+    def run_template(self, name: str, data, cache: bool = True) -> SandboxResult:
+        """Run the registered analysis template *name* on *data* (see ``templates.py``)."""
+        template = get_template(name)
+        return self.run(template.code, cache=cache, stdin=template.payload(data))
+
+    def run_analysis(
+        self, description: str, code: str, cache: bool = True, stdin: Optional[str] = None
+    ) -> SandboxResult:
         """
         Convenience wrapper: logs the description, runs code, returns result.
         Used by tree nodes that want labelled executions.
         """
         logger.info("Sandbox analysis: %s", description)
-        return self.run(code)
\ No newline at end of file
+        return self.run(code, cache=cache, stdin=stdin)
+
+    def _result_cache(self) -> Optional[SandboxResultCache]:
+        return get_sandbox_cache() if self._cache == "env" else self._cache
\ No newline at end of file
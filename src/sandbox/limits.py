@@ -0,0 +1,137 @@
+"""
+src/sandbox/limits.py
+---------------------
+Per-job resource limits and usage accounting for the local sandbox.
+
+The local backend runs snippets as plain child processes on the host, so
+without limits one runaway snippet (an infinite loop, a huge allocation,
+a file-writing loop) starves every other pipeline on the machine.  Each
+job's process gets POSIX rlimits set between fork and the snippet — in the
+warm pool's forked child or ahead of the prelude in a fresh subprocess —
+and is reaped with ``os.wait4`` so its CPU time and peak RSS are measured.
+
+Hard limits are set too, so a snippet can't raise them again:
+
+- address space  → ``MemoryError`` inside the snippet
+- CPU seconds    → killed with SIGXCPU (SIGKILL a second later)
+- open files     → ``OSError: Too many open files``
+- file size      → ``OSError: File too large`` (SIGXFSZ is ignored by Python)
+
+Configuration (environment)
+---------------------------
+    SANDBOX_MEMORY_MB       address-space cap per job (default 4096)
+    SANDBOX_CPU_SECONDS     CPU-time cap per job (default: the executor timeout)
+    SANDBOX_MAX_OPEN_FILES  file-descriptor cap per job (default 256)
+    SANDBOX_MAX_FILE_MB     largest file a job may write (default 64)
+
+A value of 0 leaves that limit unset, and a malformed one is logged and
+replaced by the default.  Windows has no rlimits; jobs there run unlimited
+and report no usage.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+from dataclasses import dataclass
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+
+
+def _env_int(name: str, default: int, minimum: int = 0) -> int:
+    """Integer env var *name* (at least *minimum*), or *default* (logged) if unset or invalid."""
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        value = int(raw)
+        if value < minimum:
+            raise ValueError(f"must be >= {minimum}")
+    except ValueError:
+        logger.warning("Ignoring %s=%r (expected an integer >= %d); using %d", name, raw, minimum, default)
+        return default
+    return value
+
+
+def limits_supported() -> bool:
+    """True where rlimits can be set and children reaped with their rusage."""
+    return resource is not None and hasattr(os, "wait4")
+
+
+@dataclass(frozen=True)
+class ResourceLimits:
+    """Caps applied to every local sandbox job (0 = unset)."""
+    memory_mb: int = 4096
+    cpu_seconds: int = 0
+    open_files: int = 256
+    file_size_mb: int = 64
+
+    @classmethod
+    def from_env(cls, cpu_seconds: int = 0) -> "ResourceLimits":
+        """Limits from ``SANDBOX_*`` variables; *cpu_seconds* is the default CPU cap."""
+        return cls(
+            memory_mb=_env_int("SANDBOX_MEMORY_MB", cls.memory_mb),
+            cpu_seconds=_env_int("SANDBOX_CPU_SECONDS", cpu_seconds),
+            open_files=_env_int("SANDBOX_MAX_OPEN_FILES", cls.open_files),
+            file_size_mb=_env_int("SANDBOX_MAX_FILE_MB", cls.file_size_mb),
+        )
+
+    def rlimits(self) -> list[tuple[str, int, int]]:
+        """
+        ``(RLIMIT_* name, soft, hard)`` to set in a job's process, clamped
+        to this process's hard limits (which the job inherits and can't
+        exceed).  Empty where rlimits aren't supported.
+        """
+        if not limits_supported():
+            return []
+        wanted = [
+            ("RLIMIT_AS", self.memory_mb * _MB),
+            ("RLIMIT_CPU", self.cpu_seconds),
+            ("RLIMIT_NOFILE", self.open_files),
+            ("RLIMIT_FSIZE", self.file_size_mb * _MB),
+        ]
+        triples = []
+        for name, value in wanted:
+            if value <= 0 or not hasattr(resource, name):
+                continue
+            # At the soft CPU limit the kernel sends SIGXCPU; at the hard one, SIGKILL
+            limit = value + 1 if name == "RLIMIT_CPU" else value
+            _, hard = resource.getrlimit(getattr(resource, name))
+            if hard != resource.RLIM_INFINITY:
+                value, limit = min(value, hard), min(limit, hard)
+            triples.append((name, value, limit))
+        return triples
+
+
+def rlimit_statement(rlimits: list[tuple[str, int, int]]) -> str:
+    """
+    One line of Python that applies *rlimits* and leaves no names behind.
+    It ends in ``"; "`` so it can precede a snippet's first line without
+    shifting the line numbers in its tracebacks.
+    """
+    if not rlimits:
+        return ""
+    return (
+        "import resource as _rl; "
+        f"[_rl.setrlimit(getattr(_rl, n), (s, h)) for n, s, h in {rlimits!r}]; "
+        "del _rl; "
+    )
+
+
+def usage_from_rusage(usage) -> dict[str, Optional[int]]:
+    """CPU milliseconds (user + system) and peak RSS in KiB from ``os.wait4``."""
+    if usage is None:
+        return {"cpu_ms": None, "maxrss_kb": None}
+    maxrss = usage.ru_maxrss
+    if sys.platform == "darwin":
+        maxrss //= 1024  # bytes on macOS, KiB elsewhere
+    return {"cpu_ms": int((usage.ru_utime + usage.ru_stime) * 1000), "maxrss_kb": int(maxrss)}
@@ -0,0 +1,742 @@
+"""
+Warm worker pool for the local sandbox.
+
+Starting ``sys.executable -c`` and importing NumPy costs 100–300 ms per
+snippet, far more than the snippets themselves.  The pool keeps a few
+"zygote" processes that have already run ``SANDBOX_PRELUDE`` (so NumPy is
+imported) and forks a fresh child from one of them for every job, so each
+snippet still runs in its own process with its own globals.
+
+Protocol (over a Unix socket pair; the job's stdout/stderr pipes travel
+as SCM_RIGHTS file descriptors with the job header)::
+
+    parent → zygote   {"size": len(code), "rlimits": [...], "cwd": ..., "env": {...}}\n
+                      + [stdin_r, stdout_w, stderr_w], then the code
+    zygote → parent   {"pid": 1234}\n                  child forked
+    zygote → parent   {"returncode": 0, "cpu_ms": 12, "maxrss_kb": 40960}\n
+                                                     child reaped (os.wait4)
+
+The parent feeds the job's stdin (e.g. a template's JSON payload) from a
+helper thread and drains both output pipes into ``BoundedCapture`` buffers
+while it waits and enforces the timeout: if the child hasn't exited in
+time, or (by default) floods past the output cap, it is SIGKILLed and the
+zygote reports the kill as usual.  Zygotes compile each distinct source
+once and fork with the code object, so a constant template body isn't
+re-parsed per job.  The child sets the job's rlimits (see ``limits.py``),
+working directory and extra environment (its artifact directory, see
+``artifacts.py``) before running it.
+
+POSIX only — ``warm_pool_available()`` is False where ``os.fork`` doesn't
+exist, and ``_LocalExecutor`` falls back to one subprocess per snippet.
+
+Session pool
+------------
+``SessionPool`` does the same for E2B: booting a cloud sandbox per snippet
+costs seconds, billed to the run.  Sessions are kept alive and reused; one
+is health-checked (``is_running()``) before each checkout and killed once
+older than ``max_lifetime_s`` or idle longer than ``max_idle_s`` — at
+checkout, or by a background reaper while sessions sit idle (idle
+sandboxes are billed too).  Boot and idle time are not part of any job,
+so the pool accrues them as overhead that the executor charges to the
+next job it runs (``take_overhead_s``).  Resetting interpreter state
+between jobs is the executor's job.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import queue
+import select
+import signal
+import socket
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+_STARTUP_TIMEOUT_S = 30.0
+_PROTOCOL_TIMEOUT_S = 5.0
+
+# Bytes of stdout (and, separately, stderr) kept per job
+DEFAULT_MAX_OUTPUT_BYTES = 256 * 1024
+
+# Forking a process with live BLAS/OpenMP threads can deadlock the child
+_SINGLE_THREADED_ENV = {
+    "OMP_NUM_THREADS": "1",
+    "OPENBLAS_NUM_THREADS": "1",
+    "MKL_NUM_THREADS": "1",
+}
+
+# Runs inside each zygote process; argv[1] is the prelude to pre-import,
+# argv[2] the control socket's fd
+_ZYGOTE_SOURCE = textwrap.dedent("""\
+    import json, os, socket, sys, traceback
+    exec(compile(sys.argv[1], "<prelude>", "exec"), {"__name__": "__zygote__"})
+    ctl = socket.socket(fileno=int(sys.argv[2]))
+    compiled = {}  # source -> code object, inherited by every fork
+
+    def reply(**msg):
+        ctl.sendall((json.dumps(msg) + "\\n").encode())
+
+    def receive():
+        data, fds, _, _ = socket.recv_fds(ctl, 65536, 3)
+        if not data:
+            return None, {}, fds
+        header, code = data.split(b"\\n", 1)
+        job = json.loads(header)
+        while len(code) < job["size"]:
+            chunk = ctl.recv(job["size"] - len(code))
+            if not chunk:
+                return None, {}, fds
+            code += chunk
+        return code.decode(), job, fds
+
+    def compile_once(code):
+        if code not in compiled:
+            if len(compiled) >= 256:
+                compiled.clear()
+            try:
+                compiled[code] = compile(code, "<string>", "exec")
+            except BaseException:
+                return None  # the child recompiles and reports the error
+        return compiled[code]
+
+    def child(code, code_obj, job, fds):
+        ctl.close()
+        for fd, target in zip(fds, (0, 1, 2)):
+            os.dup2(fd, target)
+        sys.stdin = open(0, "r", closefd=False)
+        sys.stdout = open(1, "w", closefd=False)
+        sys.stderr = open(2, "w", closefd=False)
+        status = 0
+        try:
+            os.environ.update(job["env"])
+            if job["cwd"]:
+                os.chdir(job["cwd"])
+            if job["rlimits"]:
+                import resource
+                for name, soft, hard in job["rlimits"]:
+                    resource.setrlimit(getattr(resource, name), (soft, hard))
+            exec(code_obj or compile(code, "<string>", "exec"), {"__name__": "__main__"})
+        except SystemExit as exc:
+            if exc.code is None or isinstance(exc.code, int):
+                status = exc.code or 0
+            else:
+                print(exc.code, file=sys.stderr)
+                status = 1
+        except BaseException as exc:
+            # Drop this frame so tracebacks match ``python -c``
+            traceback.print_exception(type(exc), exc, exc.__traceback__.tb_next)
+            status = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        os._exit(status)
+
+    reply(ready=True)
+    while True:
+        code, job, fds = receive()
+        if code is None:
+            break
+        code_obj = compile_once(code)
+        pid = os.fork()
+        if pid == 0:
+            try:
+                child(code, code_obj, job, fds)
+            finally:
+                os._exit(1)
+        for fd in fds:
+            os.close(fd)
+        reply(pid=pid)
+        _, status, usage = os.wait4(pid, 0)
+        returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+        maxrss = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+        reply(
+            returncode=returncode,
+            cpu_ms=int((usage.ru_utime + usage.ru_stime) * 1000),
+            maxrss_kb=int(maxrss),
+        )
+""")
+
+
+class WarmPoolError(RuntimeError):
+    """A zygote died or broke protocol; the caller should fall back."""
+
+
+def warm_pool_available() -> bool:
+    """True where zygotes can fork, pass pipes over a Unix socket and reap with rusage."""
+    return (
+        hasattr(os, "fork")
+        and hasattr(os, "wait4")
+        and hasattr(socket, "send_fds")
+        and sys.platform != "win32"
+    )
+
+
+class BoundedCapture:
+    """
+    The first *limit* bytes of one output stream, plus a count of the rest.
+
+    Once the cap is hit, further chunks are still read from the pipe (so
+    the child never blocks on a full pipe) but dropped, and ``text()`` ends
+    with a truncation marker.  *on_line*, if given, is called as
+    ``on_line(stream, line)`` for each captured line as it arrives;
+    *on_overflow*, once, when the cap is first exceeded (executors use it
+    to kill the child).
+    """
+
+    def __init__(
+        self,
+        limit: int = DEFAULT_MAX_OUTPUT_BYTES,
+        stream: str = "stdout",
+        on_line: Optional[Callable[[str, str], None]] = None,
+        on_overflow: Optional[Callable[[], None]] = None,
+    ):
+        self.limit = limit
+        self.stream = stream
+        self.on_line = on_line
+        self.on_overflow = on_overflow
+        self.size = 0
+        self.dropped = 0
+        self._chunks: list[bytes] = []
+        self._partial = b""
+
+    @property
+    def truncated(self) -> bool:
+        return self.dropped > 0
+
+    def feed(self, chunk: bytes) -> None:
+        room = self.limit - self.size
+        if len(chunk) > room:
+            first = not self.dropped
+            self.dropped += len(chunk) - max(room, 0)
+            chunk = chunk[:max(room, 0)]
+            if first and self.on_overflow is not None:
+                self.on_overflow()
+        if not chunk:
+            return
+        self._chunks.append(chunk)
+        self.size += len(chunk)
+        if self.on_line is not None:
+            *lines, self._partial = (self._partial + chunk).split(b"\n")
+            for line in lines:
+                self._emit(line)
+
+    def close(self) -> None:
+        """Report a trailing line without a newline (call once, at EOF)."""
+        if self.on_line is not None and self._partial:
+            self._emit(self._partial)
+        self._partial = b""
+
+    def _emit(self, line: bytes) -> None:
+        try:
+            self.on_line(self.stream, line.decode("utf-8", errors="replace"))
+        except Exception as exc:
+            logger.warning("Sandbox on_line callback failed (%s)", exc)
+
+    def text(self) -> str:
+        text = b"".join(self._chunks).decode("utf-8", errors="replace")
+        if self.dropped:
+            text += f"\n[... {self.stream} truncated: {self.dropped} more bytes]\n"
+        return text
+
+
+def _kill_pid(pid: int) -> None:
+    try:
+        os.kill(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def _feed(fd: int, data: bytes) -> None:
+    """Write *data* to a child's stdin pipe and close it (EOF)."""
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    except OSError:
+        pass  # child exited without reading everything
+    finally:
+        os.close(fd)
+
+
+class _Zygote:
+    """One pre-warmed process that forks a child per job."""
+
+    def __init__(self, prelude: str):
+        env = {**os.environ, **_SINGLE_THREADED_ENV}
+        self._ctl, remote = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._proc = subprocess.Popen(
+                [sys.executable, "-c", _ZYGOTE_SOURCE, prelude, str(remote.fileno())],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                env=env,
+                pass_fds=(remote.fileno(),),
+            )
+        except Exception:
+            self._ctl.close()
+            raise
+        finally:
+            remote.close()
+        self._buf = b""
+        if self._read(time.monotonic() + _STARTUP_TIMEOUT_S) != {"ready": True}:
+            self.close()
+            raise WarmPoolError("zygote failed to start")
+
+    @property
+    def alive(self) -> bool:
+        return self._proc.poll() is None
+
+    def _read(self, deadline: float) -> Optional[dict]:
+        """Next control message, or None if *deadline* passes first."""
+        while b"\n" not in self._buf:
+            wait = deadline - time.monotonic()
+            if wait <= 0:
+                return None
+            ready, _, _ = select.select([self._ctl], [], [], wait)
+            if not ready:
+                return None
+            self._recv()
+        line, self._buf = self._buf.split(b"\n", 1)
+        return json.loads(line)
+
+    def _recv(self) -> None:
+        chunk = self._ctl.recv(4096)
+        if not chunk:
+            raise WarmPoolError("zygote exited")
+        self._buf += chunk
+
+    def run(
+        self,
+        code: str,
+        timeout: float,
+        stdin: Optional[str] = None,
+        max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+        on_line: Optional[Callable[[str, str], None]] = None,
+        rlimits: Optional[list[tuple[str, int, int]]] = None,
+        cwd: Optional[str] = None,
+        env: Optional[dict[str, str]] = None,
+        kill_on_overflow: bool = True,
+    ) -> tuple[int, BoundedCapture, BoundedCapture, bool, dict]:
+        """
+        Run *code* in a forked child with *rlimits* (``limits.py``), in
+        *cwd* and with *env* added to its environment:
+        ``(returncode, stdout, stderr, timed_out, usage)``, where *usage*
+        holds the child's ``cpu_ms`` and ``maxrss_kb``.  With
+        *kill_on_overflow* the child is SIGKILLed as soon as either stream
+        passes *max_output_bytes*.
+        """
+        in_r, in_w = os.pipe()
+        out_r, out_w = os.pipe()
+        err_r, err_w = os.pipe()
+        try:
+            source = code.encode()
+            try:
+                header = json.dumps({
+                    "size": len(source), "rlimits": rlimits or [], "cwd": cwd, "env": env or {},
+                }) + "\n"
+                socket.send_fds(self._ctl, [header.encode()], [in_r, out_w, err_w])
+                self._ctl.sendall(source)
+            except OSError as exc:
+                os.close(in_w)
+                raise WarmPoolError(f"zygote unreachable: {exc}") from exc
+            finally:
+                for fd in (in_r, out_w, err_w):
+                    os.close(fd)
+            threading.Thread(
+                target=_feed, args=(in_w, (stdin or "").encode()), daemon=True
+            ).start()
+
+            started = self._read(time.monotonic() + _PROTOCOL_TIMEOUT_S)
+            if not started or "pid" not in started:
+                raise WarmPoolError("zygote did not fork")
+            pid = started["pid"]
+            on_overflow = (lambda: _kill_pid(pid)) if kill_on_overflow else None
+            output = {
+                out_r: BoundedCapture(max_output_bytes, "stdout", on_line, on_overflow),
+                err_r: BoundedCapture(max_output_bytes, "stderr", on_line, on_overflow),
+            }
+            output, done = self._drain(pid, output, time.monotonic() + timeout)
+            timed_out = done is None
+            if timed_out:
+                done = self._read(time.monotonic() + _PROTOCOL_TIMEOUT_S)
+                if done is None:
+                    raise WarmPoolError("zygote did not reap a killed child")
+            for capture in output.values():
+                capture.close()
+            usage = {"cpu_ms": done.get("cpu_ms"), "maxrss_kb": done.get("maxrss_kb")}
+            return done["returncode"], output[out_r], output[err_r], timed_out, usage
+        finally:
+            os.close(out_r)
+            os.close(err_r)
+
+    def _drain(self, pid: int, output: dict[int, BoundedCapture], deadline: float):
+        """
+        Collect the child's output until it exits; ``(output, done message)``,
+        or ``(output, None)`` after killing it at *deadline*.
+        """
+        open_fds = set(output)
+        done = None
+        while open_fds or (done is None and b"\n" not in self._buf):
+            if done is None and b"\n" in self._buf:
+                done = self._read(deadline)
+                continue
+            wait = deadline - time.monotonic()
+            if wait <= 0 and done is not None:
+                return output, done  # exited, but a grandchild holds the pipes open
+            if wait <= 0:
+                _kill_pid(pid)
+                return output, None
+            watch = list(open_fds) + ([self._ctl] if done is None else [])
+            ready, _, _ = select.select(watch, [], [], wait)
+            for source in ready:
+                if source is self._ctl:
+                    self._recv()
+                    continue
+                chunk = os.read(source, 65536)
+                if chunk:
+                    output[source].feed(chunk)
+                else:
+                    open_fds.discard(source)
+        if done is None:
+            done = self._read(deadline)
+        return output, done
+
+    def close(self) -> None:
+        try:
+            self._ctl.close()
+        except OSError:
+            pass
+        try:
+            self._proc.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+
+
+class WarmPool:
+    """
+    Up to *size* zygotes, started on demand and reused across jobs.
+
+    Thread-safe: each job checks a zygote out for its duration; a zygote
+    that dies or breaks protocol is discarded and replaced on next use.
+    """
+
+    def __init__(self, prelude: str, size: int = 2):
+        self.prelude = prelude
+        self.size = size
+        self._idle: queue.LifoQueue[_Zygote] = queue.LifoQueue()
+        self._started = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _acquire(self) -> _Zygote:
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                if self._started < self.size:
+                    self._started += 1
+                    break
+            try:
+                return self._idle.get(timeout=0.05)
+            except queue.Empty:
+                pass
+        try:
+            return _Zygote(self.prelude)
+        except Exception:
+            with self._lock:
+                self._started -= 1
+            raise
+
+    def _discard(self, zygote: _Zygote) -> None:
+        zygote.close()
+        with self._lock:
+            self._started -= 1
+
+    @contextmanager
+    def checkout(self) -> Iterator[_Zygote]:
+        """
+        Hold one zygote for a series of jobs (a batch); raises
+        ``WarmPoolError`` if the pool can't provide one.
+        """
+        if self._closed:
+            raise WarmPoolError("pool closed")
+        try:
+            zygote = self._acquire()
+        except WarmPoolError:
+            raise
+        except Exception as exc:
+            raise WarmPoolError(f"could not start zygote: {exc}") from exc
+        try:
+            yield zygote
+        except BaseException:
+            self._discard(zygote)
+            raise
+        if zygote.alive:
+            self._idle.put(zygote)
+        else:
+            self._discard(zygote)
+
+    def run(
+        self, code: str, timeout: float, stdin: Optional[str] = None, **options
+    ) -> tuple[int, BoundedCapture, BoundedCapture, bool, dict]:
+        """
+        Run *code* on a warm zygote (*options*: ``max_output_bytes``,
+        ``on_line``, ``rlimits``, ``cwd``, ``env``, ``kill_on_overflow``);
+        raises ``WarmPoolError`` if the pool can't.
+        """
+        with self.checkout() as zygote:
+            return zygote.run(code, timeout, stdin, **options)
+
+    def drain(self) -> None:
+        """Stop the idle zygotes; the pool stays open and starts new ones on demand."""
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+    def close(self) -> None:
+        self._closed = True
+        self.drain()
+
+
+class _Session:
+    """A live sandbox plus the bookkeeping the pool recycles it by."""
+
+    def __init__(self, sandbox):
+        self.sandbox = sandbox
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.billed_at = self.created_at  # sandbox time before this is accounted for
+        self.jobs = 0
+
+
+class SessionPool:
+    """
+    Up to *size* long-lived sandboxes made by *factory*, reused across jobs.
+
+    Thread-safe.  ``session()`` is a context manager yielding a healthy
+    sandbox; raise out of it (or call ``discard``) to drop a sandbox whose
+    infrastructure failed instead of returning it to the pool.  Remote calls
+    (health checks, kills) are made outside the pool's lock, so one slow
+    round-trip doesn't hold up other checkouts and releases.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], object],
+        size: int = 2,
+        max_lifetime_s: float = 300.0,
+        max_idle_s: float = 60.0,
+    ):
+        self.factory = factory
+        self.size = size
+        self.max_lifetime_s = max_lifetime_s
+        self.max_idle_s = max_idle_s
+        self.created = 0
+        self.recycled = 0
+        self._idle: list[_Session] = []
+        self._live = 0
+        self._overhead_s = 0.0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._reaping = False
+
+    def _expired(self, session: _Session, now: float) -> bool:
+        return (
+            now - session.created_at > self.max_lifetime_s
+            or now - session.last_used > self.max_idle_s
+        )
+
+    @staticmethod
+    def _healthy(session: _Session) -> bool:
+        """Remote health check (call without holding ``_cond``)."""
+        try:
+            is_running = getattr(session.sandbox, "is_running", None)
+            return bool(is_running()) if is_running is not None else True
+        except Exception:
+            return False
+
+    def _acquire(self) -> _Session:
+        while True:
+            with self._cond:
+                while not self._idle and self._live >= self.size and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    raise RuntimeError("session pool closed")
+                if not self._idle:
+                    self._live += 1
+                    break
+                session = self._idle.pop()  # still counted live while it's checked
+                expired = self._expired(session, time.monotonic())
+                if expired:
+                    self._retire(session)
+            if not expired and self._healthy(session):
+                with self._cond:
+                    self._bill(session)
+                return session
+            if not expired:
+                with self._cond:
+                    self._retire(session)
+            self._kill(session)
+        boot_start = time.monotonic()
+        try:
+            session = _Session(self.factory())
+        except Exception:
+            with self._cond:
+                self._live -= 1
+                self._overhead_s += time.monotonic() - boot_start
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.created += 1
+            self._overhead_s += session.created_at - boot_start
+        logger.info("SessionPool: started sandbox %d (%d live)", self.created, self._live)
+        return session
+
+    def _bill(self, session: _Session) -> None:
+        """Accrue *session*'s unaccounted (idle) time as overhead (caller holds ``_cond``)."""
+        now = time.monotonic()
+        self._overhead_s += max(0.0, now - session.billed_at)
+        session.billed_at = now
+
+    def _retire(self, session: _Session) -> None:
+        """Stop counting *session* as live (caller holds ``_cond``; ``_kill`` it after)."""
+        self._bill(session)
+        self._live -= 1
+        self.recycled += 1
+        self._cond.notify()
+
+    @staticmethod
+    def _kill(session: _Session) -> None:
+        """Shut down a retired session's sandbox (call without holding ``_cond``)."""
+        try:
+            session.sandbox.kill()
+        except Exception as exc:
+            logger.debug("SessionPool: kill failed (%s)", exc)
+
+    def _release(self, session: _Session) -> None:
+        # The job's own run time is billed by the executor
+        session.last_used = session.billed_at = time.monotonic()
+        session.jobs += 1
+        with self._cond:
+            closed = self._closed
+            if closed:
+                self._retire(session)
+            else:
+                self._idle.append(session)
+                self._cond.notify()
+                self._start_reaper()
+        if closed:
+            self._kill(session)
+
+    def discard(self, session: _Session) -> None:
+        session.billed_at = time.monotonic()
+        with self._cond:
+            self._retire(session)
+        self._kill(session)
+
+    def take_overhead_s(self) -> float:
+        """Return, and reset, the boot and idle seconds accrued since the last call."""
+        with self._cond:
+            overhead, self._overhead_s = self._overhead_s, 0.0
+        return overhead
+
+    def pending_overhead_s(self) -> float:
+        """Overhead the next ``take_overhead_s`` would return if idle sessions were used now."""
+        now = time.monotonic()
+        with self._cond:
+            return self._overhead_s + sum(max(0.0, now - s.billed_at) for s in self._idle)
+
+    def _start_reaper(self) -> None:
+        """Run ``_reap`` while sessions sit idle (caller holds ``_cond``)."""
+        if not self._reaping:
+            self._reaping = True
+            threading.Thread(target=self._reap, name="session-pool-reaper", daemon=True).start()
+
+    def _reap(self) -> None:
+        """Kill idle sessions past their lifetime or idle limit; exit once none are idle."""
+        interval = max(0.05, min(self.max_idle_s, self.max_lifetime_s) / 4)
+        while True:
+            with self._cond:
+                if not self._idle or self._closed:
+                    self._reaping = False
+                    return
+                now = time.monotonic()
+                expired = [s for s in self._idle if self._expired(s, now)]
+                for session in expired:
+                    self._idle.remove(session)
+                    self._retire(session)
+                if not expired:
+                    self._cond.wait(interval)
+            for session in expired:
+                self._kill(session)
+                logger.info("SessionPool: reaped idle sandbox (%d live)", self._live)
+
+    @contextmanager
+    def session(self) -> Iterator[object]:
+        """Check out a healthy sandbox for one job."""
+        session = self._acquire()
+        try:
+            yield session.sandbox
+        except BaseException:
+            self.discard(session)
+            raise
+        self._release(session)
+
+    def drain(self) -> None:
+        """Kill the idle sessions; the pool stays open and boots new ones on demand."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            for session in idle:
+                self._retire(session)
+        for session in idle:
+            self._kill(session)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self.drain()
+
+
+_pools: dict[tuple, WarmPool | SessionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_warm_pool(prelude: str, size: int) -> WarmPool:
+    """Process-wide pool for *prelude* (shared by every local executor)."""
+    with _pools_lock:
+        pool = _pools.get((prelude, size))
+        if pool is None:
+            pool = _pools[(prelude, size)] = WarmPool(prelude, size)
+        return pool
+
+
+def get_session_pool(key: tuple, factory: Callable[[], object], **kwargs) -> SessionPool:
+    """Process-wide session pool for *key*, created with *factory* on first use."""
+    with _pools_lock:
+        pool = _pools.get(("session",) + key)
+        if pool is None:
+            pool = _pools[("session",) + key] = SessionPool(factory, **kwargs)
+        return pool
+
+
+@atexit.register
+def _close_pools() -> None:
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
@@ -0,0 +1,132 @@
+"""
+src/sandbox/templates.py
+------------------------
+Pre-registered, parameterised sandbox analyses.
+
+Rendering data into Python source makes every snippet unique (no cache
+sharing between runs that differ by one paper, no compile reuse) and makes
+the code grow with the data.  A template's code is constant; its data
+travels as a JSON payload on the snippet's stdin — or, on E2B, where the
+kernel has no stdin, in an uploaded file named by ``PAYLOAD_ENV``.  The
+warm local pool compiles each distinct source once per worker, so a
+template is parsed once and then only forked.
+
+Usage::
+
+    executor.run_template("citation_summary", {"angle_id": "a1", ...})
+
+    # or, for batches
+    t = get_template("citation_summary")
+    executor.run_batch([t.code] * n, stdins=[t.payload(d) for d in data])
+
+Templates read their payload with ``load_payload()``, defined by the
+header every template's code starts with.
+"""
+
+from __future__ import annotations
+
+import json
+import textwrap
+from dataclasses import dataclass
+from typing import Any
+
+# Set to a payload file's path when stdin can't carry it (E2B)
+PAYLOAD_ENV = "SANDBOX_PAYLOAD_PATH"
+
+_TEMPLATE_HEADER = textwrap.dedent(f"""\
+    def load_payload():
+        path = os.environ.get({PAYLOAD_ENV!r})
+        if path:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        return json.load(sys.stdin)
+""")
+
+
+@dataclass(frozen=True)
+class AnalysisTemplate:
+    """A named analysis whose code is fixed and whose data is a JSON payload."""
+    name: str
+    body: str
+    description: str = ""
+
+    @property
+    def code(self) -> str:
+        """The constant snippet (``SANDBOX_PRELUDE`` is prepended by the executor)."""
+        return _TEMPLATE_HEADER + "\n" + self.body
+
+    @staticmethod
+    def payload(data: Any) -> str:
+        """Canonical JSON, so equal data gives equal cache keys."""
+        return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+_TEMPLATES: dict[str, AnalysisTemplate] = {}
+
+
+def register_template(name: str, body: str, description: str = "") -> AnalysisTemplate:
+    """Add a template; raises ValueError if *name* is already registered."""
+    if name in _TEMPLATES:
+        raise ValueError(f"Analysis template {name!r} is already registered")
+    template = AnalysisTemplate(name=name, body=textwrap.dedent(body), description=description)
+    _TEMPLATES[name] = template
+    return template
+
+
+def get_template(name: str) -> AnalysisTemplate:
+    """The registered template *name*; raises KeyError listing the known ones."""
+    try:
+        return _TEMPLATES[name]
+    except KeyError:
+        raise KeyError(
+            f"Unknown analysis template {name!r}; registered: {sorted(_TEMPLATES)}"
+        ) from None
+
+
+def template_names() -> list[str]:
+    return sorted(_TEMPLATES)
+
+
+# ---------------------------------------------------------------------------
+# Built-in templates
+# ---------------------------------------------------------------------------
+
+register_template(
+    "citation_summary",
+    """\
+    data = load_payload()
+    citations = data["citations"]
+    titles = data["titles"]
+    total = sum(citations)
+    avg = total / len(citations) if citations else 0
+    top = max(citations) if citations else 0
+    print(f"angle: {data['angle_id']}")
+    print(f"papers analysed: {len(citations)}")
+    print(f"total citations: {total}")
+    print(f"avg citations: {avg:.1f}")
+    print(f"top paper citations: {top}")
+    print(f"top paper: {titles[citations.index(top)] if citations else 'n/a'}")
+    """,
+    description="Citation totals for one angle's papers.  "
+                "Payload: {angle_id, citations: [int], titles: [str]}",
+)
+
+register_template(
+    "corpus_citation_stats",
+    """\
+    data = load_payload()
+    citations = np.asarray(data["citations"], dtype=float)
+    years = np.asarray([y or 0 for y in data["years"]], dtype=int)
+    print(f"papers: {citations.size}")
+    if citations.size:
+        p50, p90 = np.percentile(citations, [50, 90])
+        print(f"citations: total={citations.sum():.0f} mean={citations.mean():.1f} "
+              f"median={p50:.1f} p90={p90:.1f}")
+        known = years > 0
+        for year in np.unique(years[known]):
+            mask = years == year
+            print(f"{year}: papers={mask.sum()} citations={citations[mask].sum():.0f}")
+    """,
+    description="Vectorised citation distribution over a whole corpus.  "
+                "Payload: {citations: [int], years: [int | null]}",
+)
@@ -5,8 +5,10 @@ Public API
 ----------
     from src.tree.graph import ResearchGraph
     from src.tree.state import ResearchState
+    from src.tree.events import GraphEvent
 """
+from .events import GraphEvent
 from .graph import ResearchGraph
 from .state import ResearchState
 
-__all__ = ["ResearchGraph", "ResearchState"]
+__all__ = ["GraphEvent", "ResearchGraph", "ResearchState"]
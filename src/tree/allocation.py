@@ -0,0 +1,118 @@
+"""
+src/tree/allocation.py
+----------------------
+Expected-value allocation of sandbox runs across research angles.
+
+Handing the sandbox to angles in planner order until the budget runs out
+starves later angles even when they would gain the most from a
+quantitative check.  Instead the executor scores every eligible angle up
+front:
+
+    gain  = P(run succeeds) × (verifier score with the check − without it)
+    cost  = predicted spend, from past runs' execution time (SandboxForecast)
+
+and picks the set of angles with the largest total expected gain whose
+total predicted cost fits the remaining budget (and whose count fits what
+the executor can reserve at worst-case cost).  That is a 0/1 knapsack:
+solved exactly by enumeration for up to ``EXACT_MAX_CANDIDATES`` angles,
+and by gain-per-dollar greedy — kept only if it beats the single best
+angle — beyond that.  Every angle left out gets a reason.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from itertools import combinations
+from typing import Optional
+
+EXACT_MAX_CANDIDATES = 12
+
+
+@dataclass
+class SandboxCandidate:
+    """One angle that could get a sandbox run, with its forecast."""
+    angle_id: str
+    gain: float            # expected verifier-score gain
+    cost_usd: float        # predicted spend
+    success_rate: float
+    execution_time_ms: float
+    scheduled: bool = False
+    reason: str = ""
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["gain"] = round(self.gain, 4)
+        data["execution_time_ms"] = round(self.execution_time_ms, 1)
+        return data
+
+
+def allocate(
+    candidates: list[SandboxCandidate],
+    budget_usd: float,
+    max_runs: Optional[int] = None,
+) -> list[SandboxCandidate]:
+    """
+    Mark the candidates to run (``scheduled``) and give every candidate a
+    ``reason``; returns *candidates* in their original order.
+    """
+    limit = len(candidates) if max_runs is None else max(0, max_runs)
+    eligible = [c for c in candidates if c.gain > 0 and c.cost_usd <= budget_usd]
+    if len(eligible) <= EXACT_MAX_CANDIDATES:
+        chosen = _best_subset(eligible, budget_usd, limit)
+    else:
+        chosen = _greedy(eligible, budget_usd, limit)
+
+    chosen_ids = {c.angle_id for c in chosen}
+    for c in candidates:
+        c.scheduled = c.angle_id in chosen_ids
+        if c.scheduled:
+            c.reason = f"expected gain {c.gain:.3f} for ${c.cost_usd:.6f}"
+        elif c.gain <= 0:
+            c.reason = "no expected score gain"
+        elif c.cost_usd > budget_usd:
+            c.reason = f"predicted cost ${c.cost_usd:.6f} exceeds remaining ${budget_usd:.6f}"
+        elif len(chosen) >= limit:
+            c.reason = f"run limit reached ({limit} affordable at worst-case cost)"
+        else:
+            c.reason = (
+                f"lower value per dollar: gain {c.gain:.3f} for ${c.cost_usd:.6f} "
+                f"didn't fit beside the scheduled angles"
+            )
+    return candidates
+
+
+def _best_subset(
+    candidates: list[SandboxCandidate], budget_usd: float, limit: int
+) -> list[SandboxCandidate]:
+    """Exhaustive search: max total gain, then min cost, then planner order."""
+    best: tuple = (0.0, 0.0)
+    best_set: tuple = ()
+    for size in range(1, min(limit, len(candidates)) + 1):
+        for subset in combinations(candidates, size):
+            cost = sum(c.cost_usd for c in subset)
+            if cost > budget_usd:
+                continue
+            value = (round(sum(c.gain for c in subset), 9), -cost)
+            if value > best:
+                best, best_set = value, subset
+    return list(best_set)
+
+
+def _greedy(
+    candidates: list[SandboxCandidate], budget_usd: float, limit: int
+) -> list[SandboxCandidate]:
+    """Gain per dollar, falling back to the single best angle if that's worth more."""
+    ranked = sorted(
+        candidates,
+        key=lambda c: c.gain / c.cost_usd if c.cost_usd > 0 else float("inf"),
+        reverse=True,
+    )
+    chosen, spent = [], 0.0
+    for c in ranked:
+        if len(chosen) < limit and spent + c.cost_usd <= budget_usd:
+            chosen.append(c)
+            spent += c.cost_usd
+    best_single = max(candidates, key=lambda c: c.gain, default=None)
+    if best_single is not None and limit > 0 and best_single.gain > sum(c.gain for c in chosen):
+        return [best_single]
+    return chosen
@@ -0,0 +1,197 @@
+"""
+src/tree/checkpoint.py
+----------------------
+Node-level checkpoints for ``ResearchGraph`` runs.
+
+After every node that completes, the graph writes the whole
+``ResearchState`` (inputs, node outputs, spend, errors) for that run so a
+crash in ``fact_checker_node`` doesn't cost the planner's and executor's
+LLM and sandbox calls again.  ``ResearchGraph.resume(run_id)`` restores the
+state and continues from the first node that had not completed.
+
+Format
+------
+One gzip-compressed JSON file per run under ``CHECKPOINT_DIR`` (default
+``cache/checkpoints``), replaced atomically on every write::
+
+    {
+      "version":    CHECKPOINT_VERSION,
+      "run_id":     "...",
+      "input_hash": sha256 of topic, papers, result-affecting config, pipeline,
+      "pipeline":   ["planner", "executor", ...],
+      "completed":  2,          # leading pipeline steps that finished cleanly
+      "state":      {...}       # ResearchState data fields
+    }
+
+Staleness
+---------
+A checkpoint is rejected (``ValueError``) when its ``version`` differs from
+``CHECKPOINT_VERSION`` or when the input hash recomputed under the resuming
+graph's configuration differs — e.g. a different threshold, scheduler or
+corpus would make the saved intermediate outputs wrong.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, fields, is_dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Optional
+
+from .state import (
+    Claim,
+    ClaimVerification,
+    Evidence,
+    ResearchAngle,
+    ResearchState,
+    VerificationScore,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the state layout or node semantics change incompatibly
+CHECKPOINT_VERSION = 1
+
+# Dataclass type of each list field in ResearchState
+_LIST_TYPES = {
+    "angles": ResearchAngle,
+    "evidence": Evidence,
+    "scores": VerificationScore,
+    "claims": Claim,
+    "verifications": ClaimVerification,
+}
+
+# Config fields that change node outputs (concurrency / timeouts do not)
+_HASHED_CONFIG = (
+    "budget_usd",
+    "max_angles",
+    "evidence_score_threshold",
+    "fact_check_batch_size",
+    "verdict_reuse_threshold",
+)
+
+
+def _data_fields(state: ResearchState) -> list[str]:
+    """Serialisable fields: everything except locks, caches and callbacks."""
+    return [f.name for f in fields(state) if f.init and f.compare]
+
+
+def dump_field(name: str, value):
+    """JSON-ready form of one ResearchState field."""
+    if name == "papers":
+        return [asdict(p) if is_dataclass(p) else dict(vars(p)) for p in value]
+    if name in _LIST_TYPES:
+        return [asdict(item) for item in value]
+    return value
+
+
+def load_field(name: str, data):
+    """Inverse of ``dump_field``."""
+    if name == "papers":
+        return [_restore_paper(p) for p in data]
+    if name in _LIST_TYPES:
+        return [_LIST_TYPES[name](**item) for item in data]
+    return data
+
+
+def state_to_dict(state: ResearchState) -> dict:
+    """JSON-ready snapshot of *state*'s data fields."""
+    return {name: dump_field(name, getattr(state, name)) for name in _data_fields(state)}
+
+
+def state_from_dict(data: dict) -> ResearchState:
+    """Inverse of ``state_to_dict``."""
+    return ResearchState(**{name: load_field(name, value) for name, value in data.items()})
+
+
+def _restore_paper(data: dict):
+    from src.literature.fetcher import Paper
+
+    try:
+        return Paper(**data)
+    except TypeError:
+        return SimpleNamespace(**data)
+
+
+def input_hash(state: ResearchState, pipeline: list[str]) -> str:
+    """Hash of everything that determines the pipeline's outputs for *state*."""
+    payload = {
+        "version": CHECKPOINT_VERSION,
+        "topic": state.topic,
+        # every field, in order: citation counts and ranking change the outputs
+        "papers": dump_field("papers", state.papers),
+        "config": {name: getattr(state, name) for name in _HASHED_CONFIG},
+        "pipeline": pipeline,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class CheckpointStore:
+    """
+    Directory of per-run checkpoint files.
+
+    Parameters
+    ----------
+    checkpoint_dir : str
+        Where ``<run_id>.json.gz`` files are written.
+    """
+
+    def __init__(self, checkpoint_dir: str = "cache/checkpoints"):
+        self.checkpoint_dir = Path(checkpoint_dir)
+
+    def path(self, run_id: str) -> Path:
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in run_id)
+        return self.checkpoint_dir / f"{safe}.json.gz"
+
+    def save(self, run_id: str, state: ResearchState, pipeline: list[str], completed: int) -> None:
+        """Atomically write the checkpoint for *run_id*."""
+        record = {
+            "version": CHECKPOINT_VERSION,
+            "run_id": run_id,
+            "input_hash": input_hash(state, pipeline),
+            "pipeline": pipeline,
+            "completed": completed,
+            "written_at": time.time(),
+            "state": state_to_dict(state),
+        }
+        path = self.path(run_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(record, f, separators=(",", ":"))
+        os.replace(tmp, path)
+        logger.debug("Checkpoint: %s after %s (%d bytes)", run_id, pipeline[completed - 1], path.stat().st_size)
+
+    def load(self, run_id: str) -> dict:
+        """
+        Read the checkpoint for *run_id*.
+
+        Raises FileNotFoundError if there is none and ValueError if it was
+        written by an incompatible version.
+        """
+        path = self.path(run_id)
+        if not path.exists():
+            raise FileNotFoundError(f"No checkpoint for run '{run_id}' in {self.checkpoint_dir}")
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            record = json.load(f)
+        if record.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(
+                f"Checkpoint for run '{run_id}' has version {record.get('version')}, "
+                f"expected {CHECKPOINT_VERSION}"
+            )
+        return record
+
+    def delete(self, run_id: str) -> None:
+        self.path(run_id).unlink(missing_ok=True)
+
+
+def get_checkpoint_store(checkpoint_dir: Optional[str] = None) -> CheckpointStore:
+    """Store for *checkpoint_dir*, else ``CHECKPOINT_DIR`` (default cache/checkpoints)."""
+    return CheckpointStore(checkpoint_dir or os.getenv("CHECKPOINT_DIR", "cache/checkpoints"))
@@ -0,0 +1,31 @@
+"""
+src/tree/concurrency.py
+-----------------------
+Thread-pool helpers shared by the nodes and the graph.
+
+Nodes fan out over angles and claims, and ``ResearchGraph.run_many`` fans
+out over topics; both need results back in input order so outputs stay
+deterministic whatever order the workers finish in.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, TypeVar
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+
+def map_ordered(fn: Callable[[_T], _R], items: Iterable[_T], max_workers: int) -> list[_R]:
+    """
+    Apply *fn* to every item on a bounded thread pool.
+
+    Results come back in input order regardless of completion order, so node
+    outputs stay deterministic.  ``max_workers <= 1`` runs serially.
+    """
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(fn, items))
@@ -0,0 +1,235 @@
+"""
+src/tree/corpus.py
+------------------
+Precomputed lookup structures over the paper corpus.
+
+The heuristic scorers in ``nodes.py`` used to lowercase and split every
+abstract once per claim (and once per angle).  ``CorpusIndex`` does that
+work a single time per run and is cached on ``ResearchState`` — every
+heuristic path reads from it instead of touching raw paper text.
+
+Batch scoring
+-------------
+Besides per-paper token sets the index keeps two binary term-document
+matrices (title+abstract for relevance, abstract only for support) as
+term → paper posting lists in CSR layout.  ``overlap_matrix`` turns a
+batch of claims into a sparse claim × term matrix and computes every
+claim × paper overlap with one gather + ``np.bincount`` — no Python loop
+over papers.  Claims are processed in blocks so memory stays bounded on
+large corpora.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+# Words whose presence in an abstract flags a potential contradiction
+NEGATION_WORDS: tuple[str, ...] = ("however", "contrary", "disagree", "refute")
+
+# Per-block limits: (claim, term, paper) triples gathered, and dense output cells
+_BLOCK_PAIRS = 4_000_000
+_BLOCK_CELLS = 8_000_000
+
+
+@dataclass
+class _Postings:
+    """Binary term → paper incidence in CSR layout (one row per term)."""
+    indptr: np.ndarray     # int64, len = n_terms + 1
+    indices: np.ndarray    # int64 paper positions, sorted within each term
+
+    @classmethod
+    def from_docs(cls, docs: list[Iterable[int]], n_terms: int) -> "_Postings":
+        doc_ids: list[int] = []
+        term_ids: list[int] = []
+        for d, terms in enumerate(docs):
+            for t in terms:
+                doc_ids.append(d)
+                term_ids.append(t)
+        terms_arr = np.asarray(term_ids, dtype=np.int64)
+        docs_arr = np.asarray(doc_ids, dtype=np.int64)
+        order = np.argsort(terms_arr, kind="stable")
+        counts = np.bincount(terms_arr, minlength=n_terms)
+        indptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        return cls(indptr=indptr, indices=docs_arr[order])
+
+
+@dataclass
+class CorpusIndex:
+    """
+    Token sets, negation flags and a title map for one paper corpus.
+
+    All per-paper lists are aligned with ``papers`` (same order, same length).
+    """
+    papers: list                                   # the corpus this index was built from
+    titles: list[str] = field(default_factory=list)
+    search_texts: list[str] = field(default_factory=list)          # lower("title abstract")
+    abstract_tokens: list[frozenset[str]] = field(default_factory=list)
+    has_negation: list[bool] = field(default_factory=list)
+    title_to_indices: dict[str, list[int]] = field(default_factory=dict)
+    vocabulary: dict[str, int] = field(default_factory=dict)
+    _search_postings: Optional[_Postings] = field(default=None, repr=False)
+    _abstract_postings: Optional[_Postings] = field(default=None, repr=False)
+    _fingerprint: Optional[str] = field(default=None, repr=False)
+
+    @classmethod
+    def build(cls, papers: list) -> "CorpusIndex":
+        """Tokenise every paper once."""
+        index = cls(papers=papers)
+        vocab = index.vocabulary
+        search_docs: list[set[int]] = []
+        abstract_docs: list[set[int]] = []
+        for i, paper in enumerate(papers):
+            title = getattr(paper, "title", "")
+            abstract = getattr(paper, "abstract", "").lower()
+            search_text = (title + " " + abstract).lower()
+            abstract_tokens = frozenset(abstract.split())
+            index.titles.append(title)
+            index.search_texts.append(search_text)
+            index.abstract_tokens.append(abstract_tokens)
+            index.has_negation.append(any(neg in abstract for neg in NEGATION_WORDS))
+            index.title_to_indices.setdefault(title, []).append(i)
+            search_docs.append({vocab.setdefault(w, len(vocab)) for w in search_text.split()})
+            abstract_docs.append({vocab[w] for w in abstract_tokens})
+        index._search_postings = _Postings.from_docs(search_docs, len(vocab))
+        index._abstract_postings = _Postings.from_docs(abstract_docs, len(vocab))
+        return index
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    @property
+    def fingerprint(self) -> str:
+        """Order-independent content hash of the corpus (its "version")."""
+        if self._fingerprint is None:
+            digests = sorted(
+                hashlib.sha256(
+                    f"{getattr(p, 'paper_id', '')}\x1f{t}\x1f{getattr(p, 'abstract', '')}".encode()
+                ).hexdigest()
+                for p, t in zip(self.papers, self.titles)
+            )
+            self._fingerprint = hashlib.sha256("".join(digests).encode()).hexdigest()[:16]
+        return self._fingerprint
+
+    def is_current(self, papers: list) -> bool:
+        """True if this index was built from *papers* and it hasn't changed size."""
+        return self.papers is papers and len(self.titles) == len(papers)
+
+    def indices_for_titles(self, titles: Iterable[str]) -> list[int]:
+        """Corpus positions of papers whose title is in *titles* (corpus order)."""
+        found: list[int] = []
+        for title in set(titles):
+            found.extend(self.title_to_indices.get(title, ()))
+        return sorted(found)
+
+    def papers_for_titles(self, titles: Iterable[str]) -> list[Any]:
+        """Papers whose title is in *titles*, in corpus order."""
+        return [self.papers[i] for i in self.indices_for_titles(titles)]
+
+    # ------------------------------------------------------------------
+    # Vectorised claim × paper scoring
+    # ------------------------------------------------------------------
+
+    def overlap_matrix(self, texts: list[str], on: str = "search") -> np.ndarray:
+        """
+        Distinct-token overlap of every text with every paper.
+
+        Parameters
+        ----------
+        texts : list[str]
+            Claims / queries; tokenised as ``text.lower().split()``.
+        on : str
+            ``"search"`` (title + abstract) or ``"abstract"``.
+
+        Returns
+        -------
+        np.ndarray
+            int32 array of shape ``(len(texts), len(papers))``.
+        """
+        out = np.zeros((len(texts), len(self)), dtype=np.int32)
+        for start, stop, block in self._overlap_blocks(texts, on):
+            out[start:stop] = block
+        return out
+
+    def top_k(self, texts: list[str], k: int, on: str = "search") -> list[list[int]]:
+        """
+        Corpus positions of the *k* best-overlapping papers for each text.
+
+        Ties keep corpus order; papers with zero overlap are dropped.  When a
+        text overlaps nothing, the first *k* papers are returned (the same
+        fallback the single-query ranker has always used).
+        """
+        n = len(self)
+        k = min(k, n)
+        fallback = list(range(k))
+        results: list[list[int]] = []
+        if k == 0:
+            return [[] for _ in texts]
+        for _, _, block in self._overlap_blocks(texts, on):
+            # Unique sort key: higher overlap first, then lower corpus position
+            keys = block.astype(np.int64) * n + (n - 1 - np.arange(n, dtype=np.int64))
+            top = np.argpartition(-keys, k - 1, axis=1)[:, :k]
+            top_keys = np.take_along_axis(keys, top, axis=1)
+            top = np.take_along_axis(top, np.argsort(-top_keys, axis=1), axis=1)
+            top_counts = np.take_along_axis(block, top, axis=1)
+            for row, counts in zip(top.tolist(), top_counts.tolist()):
+                picked = [i for i, c in zip(row, counts) if c > 0]
+                results.append(picked or fallback)
+        return results
+
+    def _overlap_blocks(self, texts: list[str], on: str):
+        """Yield ``(start, stop, overlaps)`` for consecutive blocks of texts."""
+        postings = {"search": self._search_postings, "abstract": self._abstract_postings}.get(on)
+        if postings is None:
+            raise ValueError(f"Unknown overlap field: {on!r}")
+        n_docs = len(self)
+        max_rows = max(1, _BLOCK_CELLS // max(n_docs, 1))
+
+        # Sparse text × term matrix: term ids for each text, concatenated
+        term_lists = [
+            sorted({self.vocabulary[w] for w in t.lower().split() if w in self.vocabulary})
+            for t in texts
+        ]
+        q_indptr = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum([len(tl) for tl in term_lists], out=q_indptr[1:])
+        q_indices = np.fromiter(
+            (t for tl in term_lists for t in tl), dtype=np.int64, count=int(q_indptr[-1])
+        )
+
+        # Number of (term, paper) pairs each text expands to
+        post_len = np.diff(postings.indptr)
+        pair_cum = np.concatenate(([0], np.cumsum(post_len[q_indices])))
+        row_pairs = pair_cum[q_indptr]
+
+        start = 0
+        while start < len(texts):
+            stop = int(np.searchsorted(row_pairs, row_pairs[start] + _BLOCK_PAIRS, side="right")) - 1
+            stop = min(max(stop, start + 1), start + max_rows, len(texts))
+            yield start, stop, self._block_overlaps(
+                q_indptr[start:stop + 1], q_indices, postings, n_docs
+            )
+            start = stop
+
+    @staticmethod
+    def _block_overlaps(
+        q_indptr: np.ndarray, q_indices: np.ndarray, postings: _Postings, n_docs: int
+    ) -> np.ndarray:
+        """Dense overlap counts for one block of texts (sparse product via bincount)."""
+        n_rows = len(q_indptr) - 1
+        terms = q_indices[q_indptr[0]:q_indptr[-1]]
+        rows = np.repeat(np.arange(n_rows, dtype=np.int64), np.diff(q_indptr))
+        starts = postings.indptr[terms]
+        lens = postings.indptr[terms + 1] - starts
+        total = int(lens.sum())
+        if total == 0:
+            return np.zeros((n_rows, n_docs), dtype=np.int32)
+        # Flattened positions of every posting touched by every (text, term)
+        offsets = np.repeat(starts - (np.cumsum(lens) - lens), lens) + np.arange(total)
+        docs = postings.indices[offsets]
+        flat = np.repeat(rows, lens) * n_docs + docs
+        counts = np.bincount(flat, minlength=n_rows * n_docs)
+        return counts.reshape(n_rows, n_docs).astype(np.int32)
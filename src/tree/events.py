@@ -0,0 +1,45 @@
+"""
+src/tree/events.py
+------------------
+Progress events emitted while the graph runs.
+
+Nodes report each intermediate result through ``ResearchState.emit`` as soon
+as it exists (an angle planned, one angle's evidence gathered, one claim
+verified) instead of only at the end of the run.  ``ResearchGraph.arun``
+turns those callbacks into an async stream suitable for SSE.
+
+Event kinds
+-----------
+    node_started       {"node"}
+    angle_planned      ResearchAngle fields
+    sandbox_scheduled  {"plan": [SandboxCandidate fields]} (executor's sandbox allocation)
+    evidence_gathered  Evidence fields
+    angle_scored       VerificationScore fields
+    claim_extracted    Claim fields
+    claim_verified     ClaimVerification fields
+    claim_reconciled   ClaimVerification fields (late LLM verdict replacing a
+                       speculative heuristic one)
+    node_finished      {"node", "elapsed_s"}
+    error              {"node", "message"}
+    completed          the structured evidence map (``to_output_dict()``)
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable
+
+
+@dataclass
+class GraphEvent:
+    """One progress event.  ``data`` is always JSON-serialisable."""
+    kind: str
+    data: dict = field(default_factory=dict)
+    timestamp: float = field(default_factory=time.time)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+EventCallback = Callable[[GraphEvent], Any]
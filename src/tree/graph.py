@@ -26,6 +26,15 @@ Flow
           ↓
     structured evidence map  (consumed by Stage 5 writer)
 
+Scheduling
+----------
+``scheduler="barrier"`` (default) runs each node over every angle before the
+next node starts.  ``scheduler="dataflow"`` runs the planner, then lets each
+angle flow through executor → verifier → claim extractor → fact checker on
+its own (``angle_dataflow_node``), so end-to-end latency tracks the slowest
+angle rather than the sum of every stage's slowest angle.  Both modes
+produce the same evidence map.
+
 Usage
 -----
     from src.tree.graph import ResearchGraph
@@ -37,14 +46,74 @@ Usage
     graph = ResearchGraph()
     output = graph.run(topic="attention mechanism transformers", papers=papers)
     # output is a dict with keys: angles, evidence, scores, claims, verifications
+
+Checkpointing
+-------------
+``run(topic, papers, run_id="...")`` writes the state after every node that
+completes (see ``checkpoint.py``); ``resume(run_id)`` restores it and runs
+only the remaining nodes.
+
+Memoisation
+-----------
+Each ``NodeSpec`` in ``_PIPELINE`` declares the state fields it reads and
+writes.  With ``memoize=True`` a node whose inputs hash the same as in an
+earlier run is skipped and its outputs restored, so a threshold sweep::
+
+    for t in (0.2, 0.3, 0.4):
+        ResearchGraph(evidence_score_threshold=t, memoize=True).run(topic, papers)
+
+pays for the planner and executor once.  A node that served any item from
+a heuristic fallback (no API key, a failed or late LLM call) or recorded
+an error is not memoised, so its outputs aren't replayed once the LLM is
+back.
+
+Latency budget
+--------------
+``run(..., deadline_s=20)`` splits the time left between the remaining
+nodes by ``NodeSpec.time_weight``.  LLM calls are capped at the node's
+share; once it is spent, nodes switch to their heuristic fallbacks and the
+affected items are reported under ``degraded``.
+
+Speculation
+-----------
+``speculative_latency_s`` races every per-item LLM call against its
+heuristic fallback: the heuristic is computed while the LLM call runs and
+is served if the LLM misses the target, which bounds each item's latency
+(and so the run's p99) at roughly the target.  Late fact-check verdicts are
+swapped in at the end of the run if they arrive within
+``speculation_grace_s``; counts are reported under ``speculation``.
+Batched verification prompts are not raced.
+
+Batch runs
+----------
+``run_many(topics)`` schedules many topics on a worker pool sharing one
+sandbox, the LLM client and every cache, and returns a ``BatchResult``
+with per-topic outputs, isolated failures and a throughput report.
+
+Streaming
+---------
+``arun`` is the asyncio entry point for the SSE API: it yields a
+``GraphEvent`` for every intermediate result as soon as a node produces it,
+then a final ``completed`` event carrying the same map ``run`` returns::
+
+    async for event in graph.arun(topic, papers):
+        yield f"data: {json.dumps(event.to_dict())}\n\n"
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import threading
 import time
-from typing import Any
+from dataclasses import dataclass, field, fields
+from typing import AsyncIterator, Callable, Optional
 
+from src.llm.client import get_llm_client
+from .checkpoint import get_checkpoint_store, input_hash, state_from_dict
+from .concurrency import map_ordered
+from .events import GraphEvent
+from .memo import NodeMemo, get_node_memo, memo_key
 from .state import ResearchState
 from .nodes import (
     planner_node,
@@ -52,25 +121,102 @@ from .nodes import (
     verifier_node,
     claim_extractor_node,
     fact_checker_node,
+    angle_dataflow_node,
+    reconcile_late_results,
 )
 
 logger = logging.getLogger(__name__)
 
+
+@dataclass(frozen=True)
+class NodeSpec:
+    """
+    One pipeline step and the ResearchState fields it depends on.
+
+    ``reads`` must list every field whose value can change the node's
+    output; ``writes`` every field it produces.  Memoisation relies on both.
+    ``time_weight`` is the node's relative share of a run deadline.
+    """
+    name: str
+    fn: Callable[[ResearchState], ResearchState]
+    reads: tuple[str, ...]
+    writes: tuple[str, ...]
+    time_weight: float = 1.0
+
+
+_PLANNER = NodeSpec(
+    "planner", planner_node,
+    reads=("topic", "papers", "max_angles"),
+    writes=("angles",),
+    time_weight=1.0,
+)
+_EXECUTOR = NodeSpec(
+    "executor", executor_node,
+    reads=("topic", "papers", "angles", "budget_usd"),
+    writes=("evidence",),
+    time_weight=3.0,
+)
+_VERIFIER = NodeSpec(
+    "verifier", verifier_node,
+    reads=("papers", "angles", "evidence", "evidence_score_threshold"),
+    writes=("scores",),
+    time_weight=0.25,
+)
+_CLAIM_EXTRACTOR = NodeSpec(
+    "claim_extractor", claim_extractor_node,
+    reads=("topic", "evidence", "scores"),
+    writes=("claims",),
+    time_weight=2.0,
+)
+_FACT_CHECKER = NodeSpec(
+    "fact_checker", fact_checker_node,
+    reads=("topic", "papers", "claims", "fact_check_batch_size", "verdict_reuse_threshold"),
+    writes=("verifications",),
+    time_weight=3.0,
+)
+_ANGLE_DATAFLOW = NodeSpec(
+    "angle_dataflow", angle_dataflow_node,
+    reads=("topic", "papers", "angles", "budget_usd", "evidence_score_threshold",
+           "fact_check_batch_size", "verdict_reuse_threshold"),
+    writes=("evidence", "scores", "claims", "verifications"),
+    time_weight=8.25,
+)
+
 # Full 5-node pipeline (Mode 1 — Research Scaffold)
-_PIPELINE: list[tuple[str, Any]] = [
-    ("planner",         planner_node),
-    ("executor",        executor_node),
-    ("verifier",        verifier_node),
-    ("claim_extractor", claim_extractor_node),
-    ("fact_checker",    fact_checker_node),
-]
+_PIPELINE: list[NodeSpec] = [_PLANNER, _EXECUTOR, _VERIFIER, _CLAIM_EXTRACTOR, _FACT_CHECKER]
+
+# Same pipeline, scheduled per angle instead of per stage
+_DATAFLOW_PIPELINE: list[NodeSpec] = [_PLANNER, _ANGLE_DATAFLOW]
+
+_SCHEDULERS = {"barrier": _PIPELINE, "dataflow": _DATAFLOW_PIPELINE}
 
 # Fact-check-only pipeline (Mode 3 — Fact Check uploaded document)
 # Skips planner/executor/verifier; claims are pre-populated by IngestionPipeline.
-_FACT_CHECK_PIPELINE: list[tuple[str, Any]] = [
-    ("claim_extractor", claim_extractor_node),
-    ("fact_checker",    fact_checker_node),
-]
+_FACT_CHECK_PIPELINE: list[NodeSpec] = [_CLAIM_EXTRACTOR, _FACT_CHECKER]
+
+# Graph settings run_fact_check_only applies to states that leave them at the default
+_FACT_CHECK_SETTINGS = (
+    "max_workers", "fact_check_concurrency", "llm_timeout_s",
+    "fact_check_batch_size", "verdict_reuse_threshold", "speculative_latency_s",
+)
+_STATE_DEFAULTS = {f.name: f.default for f in fields(ResearchState) if f.name in _FACT_CHECK_SETTINGS}
+
+# Progress event replayed for each item of a memoised output field
+_FIELD_EVENTS = {
+    "angles": "angle_planned",
+    "evidence": "evidence_gathered",
+    "scores": "angle_scored",
+    "claims": "claim_extracted",
+    "verifications": "claim_verified",
+}
+
+
+@dataclass
+class BatchResult:
+    """Outcome of ``ResearchGraph.run_many``."""
+    outputs: dict[str, dict] = field(default_factory=dict)    # topic → evidence map
+    failures: dict[str, str] = field(default_factory=dict)    # topic → error message
+    report: dict = field(default_factory=dict)                # throughput / resource summary
 
 
 class ResearchGraph:
@@ -85,6 +231,34 @@ class ResearchGraph:
         How many research angles the planner generates.  Defaults to 3.
     evidence_score_threshold : float
         Minimum verifier score (0–1) for an angle to be considered strong.
+    max_workers : int
+        Thread pool size for per-angle work (angles in flight under the
+        dataflow scheduler).  1 = serial.
+    fact_check_concurrency : int
+        How many claims the fact checker verifies in parallel.  1 = serial.
+    llm_timeout_s : float
+        Per-call timeout for fact-checker LLM requests.
+    fact_check_batch_size : int
+        Max claims per batched verification prompt.  1 = one prompt per claim.
+    verdict_reuse_threshold : float | None
+        Cosine similarity above which a stored verdict for a paraphrased
+        claim (same corpus) is reused without an LLM call.  None disables.
+    scheduler : str
+        ``"barrier"`` (stage by stage) or ``"dataflow"`` (angle by angle).
+    checkpoint_dir : str | None
+        Where ``run(..., run_id=...)`` writes per-node checkpoints.
+        Defaults to ``CHECKPOINT_DIR`` or ``cache/checkpoints``.
+    memoize : bool
+        Skip any node whose declared inputs match a previous run and reuse
+        its stored outputs (see ``memo.py``).
+    memo_dir : str | None
+        Memo store location.  Defaults to ``NODE_MEMO_DIR`` or
+        ``cache/node_memo``.
+    speculative_latency_s : float | None
+        Per-item LLM latency target; slower calls lose to the heuristic
+        fallback.  None disables racing.
+    speculation_grace_s : float
+        How long the end of a run waits for late LLM verdicts to reconcile.
     """
 
     def __init__(
@@ -92,12 +266,44 @@ class ResearchGraph:
         budget_usd: float = 0.50,
         max_angles: int = 3,
         evidence_score_threshold: float = 0.3,
+        max_workers: int = 4,
+        fact_check_concurrency: int = 4,
+        llm_timeout_s: float = 30.0,
+        fact_check_batch_size: int = 1,
+        verdict_reuse_threshold: Optional[float] = None,
+        scheduler: str = "barrier",
+        checkpoint_dir: Optional[str] = None,
+        memoize: bool = False,
+        memo_dir: Optional[str] = None,
+        speculative_latency_s: Optional[float] = None,
+        speculation_grace_s: float = 0.0,
     ):
+        if scheduler not in _SCHEDULERS:
+            raise ValueError(
+                f"Unknown scheduler {scheduler!r}; expected one of {sorted(_SCHEDULERS)}"
+            )
         self.budget_usd = budget_usd
         self.max_angles = max_angles
         self.evidence_score_threshold = evidence_score_threshold
+        self.max_workers = max_workers
+        self.fact_check_concurrency = fact_check_concurrency
+        self.llm_timeout_s = llm_timeout_s
+        self.fact_check_batch_size = fact_check_batch_size
+        self.verdict_reuse_threshold = verdict_reuse_threshold
+        self.scheduler = scheduler
+        self.checkpoint_dir = checkpoint_dir
+        self.memoize = memoize
+        self.memo_dir = memo_dir
+        self.speculative_latency_s = speculative_latency_s
+        self.speculation_grace_s = speculation_grace_s
 
-    def run(self, topic: str, papers: list) -> dict:
+    def run(
+        self,
+        topic: str,
+        papers: list,
+        run_id: Optional[str] = None,
+        deadline_s: Optional[float] = None,
+    ) -> dict:
         """
         Execute the full pipeline and return the structured evidence map.
 
@@ -107,41 +313,261 @@ class ResearchGraph:
             Research topic / question.
         papers : list[Paper]
             Papers returned by LiteraturePipeline.fetch() (Stage 1).
+        run_id : str | None
+            If given, the state is checkpointed after every node so the run
+            can be continued with ``resume(run_id)``.
+        deadline_s : float | None
+            Wall-clock budget for the run.  Each node gets a weighted share
+            of the time left; once a node's share is spent it uses the
+            heuristic fallbacks instead of LLM / sandbox calls, and the
+            affected items are listed under ``degraded`` in the output.
 
         Returns
         -------
         dict
             Structured evidence map.  Keys: topic, angles, evidence,
-            scores, claims, verifications, budget, errors.
+            scores, claims, verifications, budget, degraded, errors.
+        """
+        state = self._new_state(topic, papers)
+        _start_deadline(state, deadline_s)
+        return self._execute(state, run_id=run_id)
+
+    def resume(self, run_id: str, deadline_s: Optional[float] = None) -> dict:
+        """
+        Continue a checkpointed run, skipping the nodes that completed.
+
+        The graph's current configuration applies to the remaining nodes;
+        raises ValueError if the checkpoint is stale (other version, or
+        inputs / configuration that would have produced different outputs)
+        and FileNotFoundError if there is no checkpoint for *run_id*.
+        """
+        store = get_checkpoint_store(self.checkpoint_dir)
+        record = store.load(run_id)
+        restored = state_from_dict(record["state"])
+        state = self._new_state(restored.topic, restored.papers)
+        for name in ("angles", "evidence", "scores", "claims", "verifications",
+                     "spent_usd", "errors", "output"):
+            setattr(state, name, getattr(restored, name))
+
+        pipeline = self._step_names()
+        if record["pipeline"] != pipeline or record["input_hash"] != input_hash(state, pipeline):
+            raise ValueError(
+                f"Checkpoint for run '{run_id}' is stale: its inputs or configuration "
+                f"differ from this graph's"
+            )
+        completed = record["completed"]
+        logger.info(
+            "ResearchGraph: resuming run '%s' after %s",
+            run_id, pipeline[completed - 1] if completed else "nothing",
+        )
+        _start_deadline(state, deadline_s)
+        return self._execute(state, run_id=run_id, start_at=completed)
+
+    def run_many(
+        self,
+        topics: list[str],
+        papers_by_topic: Optional[dict[str, list]] = None,
+        max_parallel_topics: int = 4,
+        literature=None,
+    ) -> BatchResult:
         """
-        state = ResearchState(
+        Run many topics across a worker pool with shared resources.
+
+        Topics missing from *papers_by_topic* are fetched first with
+        ``literature.fetch_many`` (a new ``LiteraturePipeline`` if None).
+        Every run shares one SandboxExecutor (per-topic budgets still apply
+        through each state), the process-wide LLM client and caches, and
+        the verdict store's embedder.  A topic that fails is recorded in
+        ``failures`` and never stops the others.
+
+        Returns
+        -------
+        BatchResult
+            Per-topic outputs, failures, and a throughput report.
+        """
+        topics = list(dict.fromkeys(topics))
+        t0 = time.monotonic()
+        llm_before = get_llm_client().stats()
+        result = BatchResult()
+        papers_by_topic = dict(papers_by_topic or {})
+
+        missing = [t for t in topics if t not in papers_by_topic]
+        if missing:
+            if literature is None:
+                from src.literature.fetcher import LiteraturePipeline
+                literature = LiteraturePipeline()
+            papers_by_topic.update(literature.fetch_many(missing, max_workers=max_parallel_topics))
+        fetch_s = time.monotonic() - t0
+
+        sandbox = None
+        try:
+            from src.sandbox.executor import SandboxExecutor
+            sandbox = SandboxExecutor(timeout_seconds=30, budget_usd=self.budget_usd * len(topics))
+        except Exception as exc:
+            logger.warning("ResearchGraph.run_many: sandbox disabled (%s)", exc)
+
+        def run_topic(topic: str) -> tuple[Optional[dict], Optional[str], float]:
+            start = time.monotonic()
+            if topic not in papers_by_topic:
+                return None, "literature fetch failed", 0.0
+            try:
+                state = self._new_state(topic, papers_by_topic[topic])
+                state.sandbox = sandbox
+                return self._execute(state), None, time.monotonic() - start
+            except Exception as exc:
+                logger.error("ResearchGraph.run_many: topic '%s' failed", topic, exc_info=True)
+                return None, f"{type(exc).__name__}: {exc}", time.monotonic() - start
+
+        latencies = []
+        try:
+            for topic, (output, error, elapsed) in zip(
+                topics, map_ordered(run_topic, topics, max_parallel_topics)
+            ):
+                if error is None:
+                    result.outputs[topic] = output
+                    latencies.append(elapsed)
+                else:
+                    result.failures[topic] = error
+        finally:
+            if sandbox is not None:
+                sandbox.close()
+
+        elapsed = time.monotonic() - t0
+        llm = get_llm_client().stats()
+        result.report = {
+            "topics": len(topics),
+            "succeeded": len(result.outputs),
+            "failed": len(result.failures),
+            "elapsed_s": round(elapsed, 3),
+            "fetch_s": round(fetch_s, 3),
+            "topics_per_minute": round(60 * len(result.outputs) / elapsed, 2) if elapsed else 0.0,
+            "mean_topic_s": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "max_topic_s": round(max(latencies), 3) if latencies else 0.0,
+            "sandbox_spent_usd": round(sandbox.spent_usd, 6) if sandbox else 0.0,
+            "llm_calls": llm["calls"] - llm_before["calls"],
+            "llm_cached": llm["cached"] - llm_before["cached"],
+        }
+        logger.info(
+            "ResearchGraph.run_many: %d/%d topics in %.2fs (%.1f topics/min, %d failed)",
+            len(result.outputs), len(topics), elapsed,
+            result.report["topics_per_minute"], len(result.failures),
+        )
+        return result
+
+    async def arun(
+        self, topic: str, papers: list, deadline_s: Optional[float] = None
+    ) -> AsyncIterator[GraphEvent]:
+        """
+        Async counterpart of ``run`` that streams progress.
+
+        Yields ``GraphEvent`` objects as nodes produce them (``angle_planned``
+        right after the planner's LLM call, ``claim_verified`` per claim, ...)
+        and finally ``completed`` with the structured evidence map.
+
+        The nodes run on a worker thread so the event loop is never blocked;
+        their LLM calls share the process-wide client's quota with every
+        other caller.  Closing the generator early stops the run after the
+        node currently executing.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[Optional[GraphEvent]] = asyncio.Queue()
+        stop = threading.Event()
+
+        def publish(event: Optional[GraphEvent]) -> None:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+        state = self._new_state(topic, papers)
+        state.on_event = publish
+        _start_deadline(state, deadline_s)
+
+        def work() -> dict:
+            try:
+                return self._execute(state, stop)
+            finally:
+                try:
+                    publish(None)
+                except RuntimeError:
+                    pass  # loop already closed — consumer went away
+
+        future = loop.run_in_executor(None, work)
+        try:
+            while (event := await queue.get()) is not None:
+                yield event
+            output = await future
+            yield GraphEvent(kind="completed", data=output)
+        finally:
+            stop.set()
+            state.on_event = None
+
+    def _new_state(self, topic: str, papers: list) -> ResearchState:
+        return ResearchState(
             topic=topic,
             papers=papers,
             budget_usd=self.budget_usd,
             max_angles=self.max_angles,
             evidence_score_threshold=self.evidence_score_threshold,
+            max_workers=self.max_workers,
+            fact_check_concurrency=self.fact_check_concurrency,
+            llm_timeout_s=self.llm_timeout_s,
+            fact_check_batch_size=self.fact_check_batch_size,
+            verdict_reuse_threshold=self.verdict_reuse_threshold,
+            speculative_latency_s=self.speculative_latency_s,
         )
 
+    def _step_names(self) -> list[str]:
+        return [spec.name for spec in _SCHEDULERS[self.scheduler]]
+
+    def _execute(
+        self,
+        state: ResearchState,
+        stop: Optional[threading.Event] = None,
+        run_id: Optional[str] = None,
+        start_at: int = 0,
+    ) -> dict:
+        """
+        Run the scheduler's pipeline over *state* from step *start_at*,
+        emitting node events (and checkpoints when *run_id* is set);
+        return the output map.
+        """
         logger.info(
-            "ResearchGraph: starting run | topic='%s' papers=%d budget=$%.2f",
-            topic, len(papers), self.budget_usd,
+            "ResearchGraph: starting run | topic='%s' papers=%d budget=$%.2f scheduler=%s",
+            state.topic, len(state.papers), state.budget_usd, self.scheduler,
         )
         t0 = time.monotonic()
+        pipeline = _SCHEDULERS[self.scheduler]
+        store = get_checkpoint_store(self.checkpoint_dir) if run_id else None
+        memo = get_node_memo(self.memo_dir) if self.memoize else None
+        completed = start_at
 
-        for step_name, node_fn in _PIPELINE:
+        for position, spec in enumerate(pipeline[start_at:], start=start_at):
+            step_name = spec.name
+            if stop is not None and stop.is_set():
+                logger.info("ResearchGraph: run cancelled before %s", step_name)
+                break
             logger.info("ResearchGraph: → %s", step_name)
+            _share_deadline(state, pipeline, position)
+            state.emit("node_started", node=step_name)
             step_start = time.monotonic()
             try:
-                state = node_fn(state)
+                state = self._run_node(spec, state, memo)
+                if completed == position:
+                    completed += 1
             except Exception as exc:
                 # Non-fatal: log and continue so downstream nodes still run
                 msg = f"Node '{step_name}' raised: {exc}"
                 state.errors.append(msg)
+                state.emit("error", node=step_name, message=msg)
                 logger.error("ResearchGraph: %s", msg, exc_info=True)
-            logger.info(
-                "ResearchGraph: ← %s (%.2fs)", step_name, time.monotonic() - step_start
-            )
+            if store is not None and completed == position + 1:
+                try:
+                    store.save(run_id, state, self._step_names(), completed)
+                except Exception as exc:
+                    logger.warning("ResearchGraph: checkpoint after %s failed (%s)", step_name, exc)
+            step_elapsed = time.monotonic() - step_start
+            state.emit("node_finished", node=step_name, elapsed_s=round(step_elapsed, 3))
+            logger.info("ResearchGraph: ← %s (%.2fs)", step_name, step_elapsed)
 
+        reconcile_late_results(state, self.speculation_grace_s)
         output = state.to_output_dict()
         elapsed = time.monotonic() - t0
         logger.info(
@@ -156,22 +582,51 @@ class ResearchGraph:
         state.output = output
         return output
 
+    @staticmethod
+    def _run_node(spec: NodeSpec, state: ResearchState, memo: Optional[NodeMemo]) -> ResearchState:
+        """Run one node, or restore its outputs from *memo* when its inputs are unchanged."""
+        if memo is None:
+            return spec.fn(state)
+        key = memo_key(spec.name, state, spec.reads)
+        cached = memo.get(key)
+        if cached is not None:
+            for name in spec.writes:
+                setattr(state, name, cached[name])
+                for item in cached[name] if name in _FIELD_EVENTS else ():
+                    state.emit(_FIELD_EVENTS[name], item)
+            state.current_node = spec.name
+            logger.info("ResearchGraph: %s inputs unchanged — reusing memoised outputs", spec.name)
+            return state
+        before = len(state.errors), len(state.degraded), len(state.fallbacks)
+        state = spec.fn(state)
+        # Outputs produced while something went wrong, degraded for a
+        # deadline, or served by a heuristic because the LLM was unavailable
+        # are not worth replaying — the next run may do better
+        if (len(state.errors), len(state.degraded), len(state.fallbacks)) == before:
+            memo.set(key, state, spec.writes)
+        else:
+            logger.info("ResearchGraph: %s used fallbacks — outputs not memoised", spec.name)
+        return state
+
     def run_from_state(self, state: ResearchState) -> ResearchState:
         """
         Lower-level entry point: accepts a pre-built ResearchState,
         runs the full pipeline, and returns the mutated state (not the dict).
         Useful for testing individual nodes or resuming partial runs.
         """
-        for step_name, node_fn in _PIPELINE:
+        for spec in _SCHEDULERS[self.scheduler]:
             try:
-                state = node_fn(state)
+                state = spec.fn(state)
             except Exception as exc:
-                state.errors.append(f"Node '{step_name}' raised: {exc}")
-                logger.error("ResearchGraph: %s raised: %s", step_name, exc, exc_info=True)
+                state.errors.append(f"Node '{spec.name}' raised: {exc}")
+                logger.error("ResearchGraph: %s raised: %s", spec.name, exc, exc_info=True)
+        reconcile_late_results(state, self.speculation_grace_s)
         state.output = state.to_output_dict()
         return state
 
-    def run_fact_check_only(self, state: ResearchState) -> ResearchState:
+    def run_fact_check_only(
+        self, state: ResearchState, deadline_s: Optional[float] = None
+    ) -> ResearchState:
         """
         Mode 3 — Fact Check an uploaded document.
 
@@ -186,26 +641,39 @@ class ResearchGraph:
             Must have ``state.claims`` populated before calling this method.
             ``state.papers`` should ideally contain a literature corpus for
             fact-checking context (can be empty; verdicts will be UNVERIFIABLE).
+        deadline_s : float | None
+            Wall-clock budget, shared between the two nodes as in ``run``.
 
         Returns
         -------
         ResearchState
             Mutated state with ``state.verifications`` and ``state.output`` set.
+
+        The graph's concurrency, timeout and verification settings fill in
+        any the state still has at their defaults; values the caller set
+        on the state are kept.
         """
+        for name in _FACT_CHECK_SETTINGS:
+            if getattr(state, name) == _STATE_DEFAULTS[name]:
+                setattr(state, name, getattr(self, name))
+        _start_deadline(state, deadline_s)
+
         logger.info(
             "ResearchGraph.run_fact_check_only: claims=%d papers=%d",
             len(state.claims), len(state.papers),
         )
         t0 = time.monotonic()
 
-        for step_name, node_fn in _FACT_CHECK_PIPELINE:
-            logger.info("ResearchGraph: → %s (fact-check-only)", step_name)
+        for position, spec in enumerate(_FACT_CHECK_PIPELINE):
+            logger.info("ResearchGraph: → %s (fact-check-only)", spec.name)
+            _share_deadline(state, _FACT_CHECK_PIPELINE, position)
             try:
-                state = node_fn(state)
+                state = spec.fn(state)
             except Exception as exc:
-                state.errors.append(f"Node '{step_name}' raised: {exc}")
-                logger.error("ResearchGraph: %s raised: %s", step_name, exc, exc_info=True)
+                state.errors.append(f"Node '{spec.name}' raised: {exc}")
+                logger.error("ResearchGraph: %s raised: %s", spec.name, exc, exc_info=True)
 
+        reconcile_late_results(state, self.speculation_grace_s)
         state.output = state.to_output_dict()
         logger.info(
             "ResearchGraph.run_fact_check_only: done in %.2fs | verified=%d errors=%d",
@@ -214,3 +682,26 @@ class ResearchGraph:
             len(state.errors),
         )
         return state
+
+
+def _start_deadline(state: ResearchState, deadline_s: Optional[float]) -> None:
+    state.deadline_at = time.monotonic() + deadline_s if deadline_s is not None else None
+    state.node_deadline_at = None
+
+
+def _share_deadline(state: ResearchState, pipeline: list[NodeSpec], position: int) -> None:
+    """
+    Give ``pipeline[position]`` its weighted share of the time left, so time
+    saved by fast nodes rolls over to the ones after them.
+    """
+    if state.deadline_at is None:
+        return
+    now = time.monotonic()
+    remaining = max(0.0, state.deadline_at - now)
+    weights = sum(spec.time_weight for spec in pipeline[position:])
+    share = remaining * pipeline[position].time_weight / weights if weights else remaining
+    state.node_deadline_at = now + share
+    logger.info(
+        "ResearchGraph: %s gets %.2fs of %.2fs remaining",
+        pipeline[position].name, share, remaining,
+    )
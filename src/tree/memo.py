@@ -0,0 +1,176 @@
+"""
+src/tree/memo.py
+----------------
+Memoised node outputs keyed by a hash of the node's inputs.
+
+Every graph node declares the ``ResearchState`` fields it reads and writes
+(``NodeSpec`` in ``graph.py``).  With memoisation on, the graph hashes the
+read fields before running a node; if an earlier run saw the same inputs,
+the node's written fields are restored from the store instead of calling
+the node.  A threshold sweep over one topic therefore reruns only the
+verifier and the nodes downstream of changed scores — the planner and
+executor (with their LLM and sandbox calls) hit the memo.
+
+Keys
+----
+SHA-256 of ``{version, node name, read fields}``, each field in its
+checkpoint serialisation.  ``papers`` is hashed in full and in order —
+citation counts, years and ranking feed the planner and verifier, so the
+corpus fingerprint (ids and text only) is not enough.
+
+What is stored
+--------------
+Only outputs worth replaying: the graph skips memoising a node that
+recorded errors, degraded items, or served any item from a heuristic
+because the LLM was unavailable or failed (``ResearchState.fallbacks``) —
+otherwise an offline run would pin heuristic outputs for good.
+
+Storage
+-------
+One gzip JSON file per key under ``NODE_MEMO_DIR`` (default
+``cache/node_memo``), sharded by the key's first two hex digits.  As in
+the LLM response cache, entries older than the TTL are misses (and
+deleted), and past the entry bound the least recently used are evicted
+(a hit refreshes the file's mtime).
+
+Configuration (environment)
+---------------------------
+    NODE_MEMO_DIR          memo root (default cache/node_memo)
+    NODE_MEMO_TTL_S        time-to-live in seconds (default 7 days)
+    NODE_MEMO_MAX_ENTRIES  eviction bound (default 2 000)
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from .checkpoint import CHECKPOINT_VERSION, dump_field, load_field
+from .state import ResearchState
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_TTL_S = 7 * 24 * 3600
+_DEFAULT_MAX_ENTRIES = 2_000
+
+
+def memo_key(node: str, state: ResearchState, reads: tuple[str, ...]) -> str:
+    """Hash of *node*'s identity and the current values of the fields it reads."""
+    inputs = {name: dump_field(name, getattr(state, name)) for name in reads}
+    payload = {"version": CHECKPOINT_VERSION, "node": node, "inputs": inputs}
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class NodeMemo:
+    """
+    Content-addressed store of node outputs.
+
+    Parameters
+    ----------
+    memo_dir : str
+        Root directory for the sharded ``<key>.json.gz`` files.
+    ttl_seconds : float
+        Entries older than this are ignored and deleted on access.
+    max_entries : int
+        Upper bound on stored entries; least recently used go first.
+    """
+
+    def __init__(
+        self,
+        memo_dir: str = "cache/node_memo",
+        ttl_seconds: float = _DEFAULT_TTL_S,
+        max_entries: int = _DEFAULT_MAX_ENTRIES,
+    ):
+        self.memo_dir = Path(memo_dir)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.memo_dir / key[:2] / f"{key}.json.gz"
+
+    def get(self, key: str) -> Optional[dict]:
+        """Stored outputs (field name → value) for *key*, or None."""
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+            if time.time() - entry["created"] > self.ttl_seconds:
+                path.unlink(missing_ok=True)
+                self.misses += 1
+                return None
+            outputs = {name: load_field(name, value) for name, value in entry["outputs"].items()}
+            os.utime(path)  # mtime is the LRU clock
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as exc:
+            logger.warning("NodeMemo: unreadable entry %s (%s)", path, exc)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return outputs
+
+    def set(self, key: str, state: ResearchState, writes: tuple[str, ...]) -> None:
+        """Store *state*'s values of the *writes* fields under *key*, evicting LRU entries."""
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "created": time.time(),
+                        "outputs": {name: dump_field(name, getattr(state, name)) for name in writes},
+                    },
+                    f, separators=(",", ":"),
+                )
+            os.replace(tmp, path)
+            self._evict()
+        except Exception as exc:
+            logger.warning("NodeMemo: could not persist %s (%s)", path, exc)
+
+    def _evict(self) -> None:
+        """Drop the least recently used entries past ``max_entries``."""
+        with self._lock:
+            entries = []
+            for path in self.memo_dir.glob("*/*.json.gz"):
+                try:
+                    entries.append((path.stat().st_mtime, path))
+                except FileNotFoundError:
+                    pass
+            excess = len(entries) - self.max_entries
+            if excess <= 0:
+                return
+            for _, path in sorted(entries)[:excess]:
+                path.unlink(missing_ok=True)
+            self.evictions += excess
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.memo_dir.glob("*/*.json.gz"))
+
+
+def get_node_memo(memo_dir: Optional[str] = None) -> NodeMemo:
+    """Memo for *memo_dir*, else ``NODE_MEMO_DIR`` (default cache/node_memo)."""
+    try:
+        ttl_seconds = float(os.getenv("NODE_MEMO_TTL_S", _DEFAULT_TTL_S))
+        max_entries = int(os.getenv("NODE_MEMO_MAX_ENTRIES", _DEFAULT_MAX_ENTRIES))
+    except ValueError as exc:
+        logger.warning("NodeMemo: bad NODE_MEMO_TTL_S / NODE_MEMO_MAX_ENTRIES (%s); using defaults", exc)
+        ttl_seconds, max_entries = _DEFAULT_TTL_S, _DEFAULT_MAX_ENTRIES
+    return NodeMemo(
+        memo_dir or os.getenv("NODE_MEMO_DIR", "cache/node_memo"),
+        ttl_seconds=ttl_seconds,
+        max_entries=max_entries,
+    )
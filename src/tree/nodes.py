@@ -4,14 +4,19 @@ from __future__ import annotations
 
 import json
 import logging
-import os
 import re
 import textwrap
+import threading
 import time
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from typing import Callable, Optional, TypeVar
 
-import requests
+import numpy as np
 
+from src.llm.client import PRIORITY_HIGH, PRIORITY_NORMAL, get_llm_client
+from .allocation import SandboxCandidate, allocate
+from .concurrency import map_ordered
+from .corpus import CorpusIndex
 from .state import (
     Claim,
     ClaimVerification,
@@ -19,44 +24,214 @@ from .state import (
     ResearchAngle,
     ResearchState,
     VerificationScore,
+    deferred_effects,
 )
 
 logger = logging.getLogger(__name__)
 
+_R = TypeVar("_R")
+
 # ---------------------------------------------------------------------------
-# Gemini REST helper
+# LLM helper
 # ---------------------------------------------------------------------------
 
-_GEMINI_URL = (
-    "https://generativelanguage.googleapis.com/v1beta/models/"
-    "gemini-1.5-flash:generateContent"
-)
+def _call_gemini(
+    prompt: str,
+    max_tokens: int = 1024,
+    timeout: float = 30,
+    priority: int = PRIORITY_NORMAL,
+    deadline: Optional[float] = None,
+) -> Optional[str]:
+    """
+    Call Gemini 1.5 Flash through the shared LLM client (cache, quota-aware
+    scheduling, retries).  *timeout* bounds the whole call — queueing and
+    retries included — as does *deadline* if it comes first.  Returns text
+    or None on failure.  Does NOT raise — callers fall back to heuristics
+    on None.
+    """
+    limit = time.monotonic() + timeout
+    deadline = limit if deadline is None else min(deadline, limit)
+    return get_llm_client().generate(
+        prompt,
+        max_tokens=max_tokens,
+        temperature=0.3,
+        timeout=timeout,
+        priority=priority,
+        deadline=deadline,
+    )
+
+
+# Below this many seconds left in a node's time share, LLM calls are skipped
+# (and sandbox runs below _MIN_SANDBOX_SECONDS) in favour of the heuristics
+_MIN_LLM_SECONDS = 0.5
+_MIN_SANDBOX_SECONDS = 2.0
 
+# Verifier score a successful sandbox check adds (see _score_evidence)
+_SANDBOX_SCORE_BONUS = 0.3
 
-def _call_gemini(prompt: str, max_tokens: int = 1024) -> Optional[str]:
+# Sandbox analysis run per angle (src/sandbox/templates.py)
+_ANALYSIS_TEMPLATE = "citation_summary"
+
+
+def _call_gemini_by_deadline(
+    state: Optional[ResearchState],
+    node: str,
+    item: Optional[str],
+    prompt: str,
+    timeout: float = 30,
+    **kwargs,
+) -> Optional[str]:
     """
-    Call Gemini 1.5 Flash via REST. Returns text or None on failure.
-    Does NOT raise — callers fall back to heuristics on None.
+    ``_call_gemini`` bounded by the current node's share of the run deadline.
+
+    Returns None — so the caller takes its heuristic path — when the share
+    is already spent, and records *item* in ``state.degraded`` when that, or
+    a call shortened to fit the deadline, is why the LLM result is missing.
+    Without a deadline (or *state*) this is a plain ``_call_gemini``.
     """
-    api_key = os.getenv("GEMINI_API_KEY", "")
-    if not api_key or api_key.startswith("your_"):
+    left = state.time_left() if state is not None else None
+    if left is None:
+        return _call_gemini(prompt, timeout=timeout, **kwargs)
+    if left < _MIN_LLM_SECONDS:
+        if item is not None:
+            state.mark_degraded(node, item, "deadline reached before LLM call")
         return None
+    text = _call_gemini(
+        prompt, timeout=min(timeout, left), deadline=time.monotonic() + left, **kwargs
+    )
+    if text is None and left < timeout and item is not None:
+        state.mark_degraded(node, item, "LLM call cut short by deadline")
+    return text
+
+
+# LLM calls that lose a speculative race keep running here (their responses
+# still land in the LLM cache, and late fact-check verdicts are reconciled);
+# calls still queued when the run ends are cancelled by reconcile_late_results
+_SPECULATION_WORKERS = 16
+_speculation_pool: Optional[ThreadPoolExecutor] = None
+_speculation_lock = threading.Lock()
 
+
+def _speculation_executor() -> ThreadPoolExecutor:
+    global _speculation_pool
+    with _speculation_lock:
+        if _speculation_pool is None:
+            _speculation_pool = ThreadPoolExecutor(
+                max_workers=_SPECULATION_WORKERS, thread_name_prefix="speculative-llm"
+            )
+        return _speculation_pool
+
+
+def _race(
+    state: Optional[ResearchState],
+    node: str,
+    item: str,
+    llm_fn: Callable[[], Optional[_R]],
+    heuristic_fn: Callable[[], _R],
+) -> tuple[_R, bool]:
+    """
+    LLM result with heuristic fallback; returns ``(result, from_llm)``.
+
+    Normally the heuristic only runs if *llm_fn* returns None.  With
+    ``state.speculative_latency_s`` set, *llm_fn* is started in the
+    background, the heuristic is computed meanwhile, and the LLM gets until
+    the latency target: if it misses, the heuristic result is served, the
+    item is recorded as degraded and the pending call is left on
+    ``state.pending_llm`` for ``reconcile_late_results``.  The background
+    call's own state changes (degraded entries, errors) are only applied if
+    it wins, so a losing call never touches the state after the node returns.
+    """
+    target = state.speculative_latency_s if state is not None else None
+    if target is None:
+        result = llm_fn()
+        if result is not None:
+            return result, True
+        if state is not None:
+            state.note_fallback(node, item)
+        return heuristic_fn(), False
+
+    effects: list = []
+
+    def speculate() -> Optional[_R]:
+        with deferred_effects(effects):
+            return llm_fn()
+
+    start = time.monotonic()
+    future = _speculation_executor().submit(speculate)
+    fallback = heuristic_fn()
     try:
-        resp = requests.post(
-            f"{_GEMINI_URL}?key={api_key}",
-            json={
-                "contents": [{"parts": [{"text": prompt}]}],
-                "generationConfig": {"maxOutputTokens": max_tokens, "temperature": 0.3},
-            },
-            timeout=30,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        return data["candidates"][0]["content"]["parts"][0]["text"]
-    except Exception as exc:
-        logger.warning("Gemini call failed: %s", exc)
-        return None
+        result = future.result(timeout=max(0.0, target - (time.monotonic() - start)))
+    except FutureTimeout:
+        state.mark_degraded(node, item, f"LLM missed {target:g}s latency target")
+        state.note_fallback(node, item)
+        state.pending_llm.append((node, item, future))
+        return fallback, False
+    state.apply_effects(effects)
+    if result is None:
+        state.note_fallback(node, item)
+        return fallback, False
+    return result, True
+
+
+def reconcile_late_results(state: ResearchState, wait_s: float = 0.0) -> ResearchState:
+    """
+    Fold LLM results that lost a speculative race back into *state*.
+
+    Waits up to *wait_s* for the calls on ``state.pending_llm``.  A late
+    fact-check verdict replaces the heuristic one it raced (and clears the
+    item's ``degraded`` entry) and is stored for verdict reuse; upstream
+    results (angles, summaries, claim texts) are discarded because
+    downstream nodes already consumed the heuristic — their responses still
+    warm the LLM cache for the next run.  Calls that haven't started yet are
+    cancelled so they don't spend LLM quota after the run.
+    """
+    pending, state.pending_llm = state.pending_llm, []
+    if not pending:
+        return state
+    if wait_s > 0:
+        wait([future for _, _, future in pending], timeout=wait_s)
+
+    reconciled = discarded = 0
+    late_claims: list[Claim] = []
+    late_verdicts: list[ClaimVerification] = []
+    claims = {c.claim_id: c for c in state.claims}
+    index = {v.claim_id: k for k, v in enumerate(state.verifications)}
+    for node, item, future in pending:
+        future.cancel()
+        done = future.done() and not future.cancelled()
+        late = future.result() if done and future.exception() is None else None
+        if node != "fact_checker" or late is None or item not in index:
+            discarded += 1
+            continue
+        state.verifications[index[item]] = late
+        state.degraded = [
+            d for d in state.degraded if (d["node"], d["item"]) != (node, item)
+        ]
+        state.emit("claim_reconciled", late)
+        reconciled += 1
+        if item in claims:
+            late_claims.append(claims[item])
+            late_verdicts.append(late)
+
+    if late_claims and state.verdict_reuse_threshold is not None:
+        from .verdicts import get_verdict_store
+
+        try:
+            embeddings = get_verdict_store().embed([c.text for c in late_claims])
+        except Exception as exc:
+            state.errors.append(f"FactChecker: could not store verdicts — {exc}")
+            logger.warning("FactChecker: could not store verdicts (%s)", exc)
+        else:
+            _remember_verdicts(state, state.corpus_index(), late_claims, late_verdicts, embeddings)
+
+    state.speculation = {
+        "reconciled": state.speculation.get("reconciled", 0) + reconciled,
+        "discarded": state.speculation.get("discarded", 0) + discarded,
+    }
+    logger.info(
+        "Speculation: %d late LLM result(s) reconciled, %d discarded", reconciled, discarded
+    )
+    return state
 
 
 # ---------------------------------------------------------------------------
@@ -157,23 +332,31 @@ def planner_node(state: ResearchState) -> ResearchState:
         ```
     """)
 
-    llm_text = _call_gemini(prompt, max_tokens=512)
-    angles: list[ResearchAngle] = []
-
-    if llm_text:
-        parsed = _parse_json_block(llm_text)
-        if isinstance(parsed, list):
-            for item in parsed[:max_angles]:
-                try:
-                    angles.append(ResearchAngle(**{k: item[k] for k in ResearchAngle.__dataclass_fields__}))
-                except Exception as exc:
-                    state.errors.append(f"Planner: bad angle item — {exc}")
-
-    if not angles:
-        logger.info("Planner: LLM unavailable/parse failed, using heuristic angles")
-        angles = _heuristic_angles(topic, state.papers, max_angles)
+    def llm_angles() -> Optional[list[ResearchAngle]]:
+        llm_text = _call_gemini_by_deadline(
+            state, "planner", "angles", prompt, max_tokens=512, priority=PRIORITY_HIGH
+        )
+        angles: list[ResearchAngle] = []
+        if llm_text:
+            parsed = _parse_json_block(llm_text)
+            if isinstance(parsed, list):
+                for item in parsed[:max_angles]:
+                    try:
+                        angles.append(ResearchAngle(**{k: item[k] for k in ResearchAngle.__dataclass_fields__}))
+                    except Exception as exc:
+                        state.add_error(f"Planner: bad angle item — {exc}")
+        return angles or None
+
+    angles, from_llm = _race(
+        state, "planner", "angles", llm_angles,
+        lambda: _heuristic_angles(topic, state.papers, max_angles),
+    )
+    if not from_llm:
+        logger.info("Planner: LLM unavailable/parse failed/too slow, using heuristic angles")
 
     state.angles = angles
+    for angle in angles:
+        state.emit("angle_planned", angle)
     logger.info("Planner: produced %d angles", len(angles))
     return state
 
@@ -187,75 +370,264 @@ def executor_node(state: ResearchState) -> ResearchState:
     For each angle, gather evidence from the paper corpus.
     Optionally runs a sandbox snippet for quantitative support.
 
+    Retrieval and summaries run concurrently on a pool of
+    ``state.max_workers`` threads.  Which angles get a sandbox snippet is
+    then decided by expected value within the remaining budget
+    (``_schedule_sandbox``), and those snippets run as one ``run_batch``
+    (a single sandbox session) bounded by the node's deadline: snippets
+    that can't start in time are skipped and their angles marked degraded.
+    Evidence keeps the planner's angle order.
+
     Output: state.evidence  (list[Evidence])
     """
     state.current_node = "executor"
-    evidence_list: list[Evidence] = []
+    sandbox = _make_sandbox(state)
+    corpus = state.corpus_index()
+    prepared = map_ordered(
+        lambda angle: _prepare_evidence(angle, state, corpus, sandbox),
+        state.angles,
+        state.max_workers,
+    )
+
+    _run_sandbox_checks(_schedule_sandbox(prepared, state, corpus, sandbox), state, sandbox)
+
+    evidence_list = [ev for ev, _ in prepared]
+    for ev in evidence_list:
+        state.emit("evidence_gathered", ev)
+    state.evidence = evidence_list
+    logger.info("Executor: produced evidence for %d angles", len(evidence_list))
+    return state
 
-    # Lazy-import SandboxExecutor (Stage 2); graceful if unavailable
-    sandbox = None
+
+def _schedule_sandbox(
+    prepared: list[tuple[Evidence, Optional[dict]]],
+    state: ResearchState,
+    corpus: CorpusIndex,
+    sandbox,
+) -> list[tuple[Evidence, dict, float]]:
+    """
+    The prepared angles that should get a sandbox run, each with its payload
+    and the worst-case cost reserved for it on *state* (0 for a cached
+    result; ``_run_sandbox_checks`` settles it).
+
+    Each angle's expected verifier-score gain (success rate × the score the
+    check would add) is weighed against its predicted cost from past runs
+    (``SandboxExecutor.forecast``), and ``allocation.allocate`` picks the
+    best set within the remaining budget.  Angles with a cached result are
+    free and always run.  The plan, including every skipped angle and the
+    reason, goes to ``state.sandbox_plan``.
+    """
+    wanted = [(ev, data) for ev, data in prepared if data is not None]
+    if not wanted:
+        return []
+    from src.sandbox.templates import get_template
+    template = get_template(_ANALYSIS_TEMPLATE)
+    angles = {a.angle_id: a for a in state.angles}
+
+    candidates, cached = [], []
+    for ev, data in wanted:
+        forecast = sandbox.forecast(template.code, template.payload(data))
+        base, _ = _score_evidence(ev, angles.get(ev.angle_id), corpus)
+        candidate = SandboxCandidate(
+            angle_id=ev.angle_id,
+            gain=forecast.success_rate * (min(1.0, base + _SANDBOX_SCORE_BONUS) - base),
+            cost_usd=forecast.cost_usd,
+            success_rate=forecast.success_rate,
+            execution_time_ms=forecast.execution_time_ms,
+        )
+        if forecast.cached:
+            candidate.scheduled, candidate.reason = True, "cached result (free)"
+            cached.append(candidate)
+        else:
+            candidates.append(candidate)
+
+    remaining = min(state.budget_remaining(), sandbox.budget_remaining_usd())
+    # Runs are reserved at worst-case cost per snippet; plan no more than that admits
+    worst = sandbox.max_cost_usd(1)
+    max_runs = int(remaining // worst) if worst > 0 else None
+    allocate(candidates, remaining, max_runs)
+    reserved = worst * sum(c.scheduled for c in candidates)
+    if reserved and not state.reserve_budget(reserved):
+        for c in candidates:
+            if c.scheduled:
+                c.scheduled, c.reason = False, "budget taken by concurrent runs"
+        reserved = 0.0
+
+    plan = {c.angle_id: c for c in cached + candidates}
+    state.sandbox_plan = [plan[ev.angle_id].to_dict() for ev, _ in wanted]
+    state.emit("sandbox_scheduled", plan=state.sandbox_plan)
+    for c in candidates:
+        if not c.scheduled:
+            logger.info("Executor: sandbox skipped for %s (%s)", c.angle_id, c.reason)
+    free = {c.angle_id for c in cached}
+    return [
+        (ev, data, 0.0 if ev.angle_id in free else worst)
+        for ev, data in wanted if plan[ev.angle_id].scheduled
+    ]
+
+
+def _run_sandbox_checks(
+    batch: list[tuple[Evidence, dict, float]], state: ResearchState, sandbox
+) -> None:
+    """
+    Run the scheduled analyses (``_schedule_sandbox``) as one ``run_batch``
+    bounded by the node's deadline, apply the results to their evidence and
+    settle the reservations.  Snippets that can't start in time are skipped
+    and their angles marked degraded.
+    """
+    if not batch:
+        return
+    reserved = sum(share for _, _, share in batch)
+    results = []
+    try:
+        from src.sandbox.templates import get_template
+        template = get_template(_ANALYSIS_TEMPLATE)
+        left = state.time_left()
+        results = sandbox.run_batch(
+            [template.code] * len(batch),
+            stdins=[template.payload(data) for _, data, _ in batch],
+            deadline=None if left is None else time.monotonic() + left,
+        )
+        for (ev, _, _), result in zip(batch, results):
+            if result.skipped:
+                state.mark_degraded("executor", ev.angle_id, "sandbox check skipped for deadline")
+            _apply_sandbox_result(ev, result)
+    except Exception as exc:
+        state.errors.append(f"Executor sandbox run failed: {exc}")
+    finally:
+        state.settle_budget(reserved, sum(r.cost_estimate_usd for r in results))
+
+
+def _make_sandbox(state: ResearchState):
+    """
+    The shared ``state.sandbox`` if set, else a fresh SandboxExecutor
+    (lazy-imported, Stage 2); None (and an error note) if unavailable.
+    """
+    if state.sandbox is not None:
+        return state.sandbox
     try:
         from src.sandbox.executor import SandboxExecutor
-        sandbox = SandboxExecutor(timeout_seconds=30, budget_usd=state.budget_usd)
+        return SandboxExecutor(timeout_seconds=30, budget_usd=state.budget_usd)
     except Exception as exc:
         state.errors.append(f"Executor: sandbox unavailable — {exc}")
         logger.warning("Executor: sandbox disabled (%s)", exc)
+        return None
+
 
+def _plan_sandbox(
+    state: ResearchState, corpus: CorpusIndex, sandbox
+) -> dict[str, tuple[dict, float]]:
+    """
+    ``_schedule_sandbox`` for every angle up front, for paths that gather
+    evidence one angle at a time: angle id → (payload, reserved share) for
+    the angles that should run.  The allocation only needs each angle's
+    retrieved papers, not its summary, so it matches the executor node's.
+    """
+    stubs = []
     for angle in state.angles:
-        logger.info("Executor: gathering evidence for '%s'", angle.title)
-
-        # Find relevant papers by keyword overlap
-        relevant = _find_relevant_papers(angle.query, state.papers, top_k=5)
-        source_titles = [getattr(p, "title", "") for p in relevant]
-
-        # Build summary from abstracts
-        summary = _summarise_evidence(angle, relevant, state.topic)
-
-        # Optional: run sandbox for quantitative check
-        sandbox_stdout = ""
-        sandbox_used = False
-
-        if sandbox and state.spent_usd < state.budget_usd and relevant:
-            code = _build_analysis_code(angle, relevant)
-            try:
-                result = sandbox.run_analysis(f"angle: {angle.title}", code)
-                state.spent_usd += result.cost_estimate_usd
-                if result.success and result.stdout:
-                    sandbox_stdout = result.stdout[:500]
-                    sandbox_used = True
-            except Exception as exc:
-                state.errors.append(f"Executor sandbox run failed: {exc}")
-
-        evidence_list.append(Evidence(
+        relevant = _find_relevant_papers(angle.query, corpus, top_k=5)
+        stub = Evidence(
             angle_id=angle.angle_id,
-            source_titles=source_titles,
-            summary=summary,
-            sandbox_stdout=sandbox_stdout,
-            sandbox_used=sandbox_used,
-        ))
+            source_titles=[getattr(p, "title", "") for p in relevant],
+            summary="",
+        )
+        stubs.append((stub, _sandbox_payload(angle, relevant, state, sandbox)))
+    return {
+        ev.angle_id: (data, share)
+        for ev, data, share in _schedule_sandbox(stubs, state, corpus, sandbox)
+    }
+
+
+def _gather_evidence(
+    angle: ResearchAngle,
+    state: ResearchState,
+    corpus: CorpusIndex,
+    sandbox,
+    planned: Optional[tuple[dict, float]] = None,
+) -> Evidence:
+    """
+    Retrieve and summarise one angle, then run its sandbox check if
+    ``_plan_sandbox`` scheduled it (*planned*: payload and reserved share).
+    """
+    try:
+        evidence, _ = _prepare_evidence(angle, state, corpus, None)
+    except BaseException:
+        if planned is not None:
+            state.settle_budget(planned[1], 0.0)
+        raise
+    if planned is not None:
+        data, reserved = planned
+        _run_sandbox_checks([(evidence, data, reserved)], state, sandbox)
+    state.emit("evidence_gathered", evidence)
+    return evidence
+
+
+def _prepare_evidence(
+    angle: ResearchAngle, state: ResearchState, corpus: CorpusIndex, sandbox
+) -> tuple[Evidence, Optional[dict]]:
+    """
+    Retrieve and summarise one angle; return its evidence (sandbox fields
+    unset) and the analysis template's payload, or None if the sandbox
+    shouldn't run.
+    """
+    logger.info("Executor: gathering evidence for '%s'", angle.title)
+
+    # Find relevant papers by keyword overlap
+    relevant = _find_relevant_papers(angle.query, corpus, top_k=5)
+    source_titles = [getattr(p, "title", "") for p in relevant]
+
+    # Build summary from abstracts
+    summary = _summarise_evidence(angle, relevant, state.topic, state=state)
+    evidence = Evidence(
+        angle_id=angle.angle_id,
+        source_titles=source_titles,
+        summary=summary,
+    )
+
+    return evidence, _sandbox_payload(angle, relevant, state, sandbox)
+
+
+def _sandbox_payload(
+    angle: ResearchAngle, relevant: list, state: ResearchState, sandbox
+) -> Optional[dict]:
+    """
+    The analysis template's payload for *angle*, or None if the sandbox
+    shouldn't run (no sandbox, budget or papers; too little time left).
+    """
+    time_left = state.time_left()
+    out_of_time = time_left is not None and time_left < _MIN_SANDBOX_SECONDS
+    if sandbox and state.budget_available() and relevant and out_of_time:
+        state.mark_degraded("executor", angle.angle_id, "sandbox check skipped for deadline")
+    elif sandbox and state.budget_available() and relevant:
+        return _analysis_payload(angle, relevant)
+    return None
 
-    state.evidence = evidence_list
-    logger.info("Executor: produced evidence for %d angles", len(evidence_list))
-    return state
 
+def _apply_sandbox_result(evidence: Evidence, result) -> None:
+    if result.success and result.stdout:
+        evidence.sandbox_stdout = result.stdout[:500]
+        evidence.sandbox_used = True
+    if result.success and result.output_files:
+        # Handles only — the files stay in the sandbox run directory
+        evidence.sandbox_artifacts = [h.to_dict() for h in result.output_files.values()]
 
-def _find_relevant_papers(query: str, papers: list, top_k: int = 5) -> list:
+
+def _find_relevant_papers(query: str, corpus: CorpusIndex, top_k: int = 5) -> list:
     """Keyword-overlap ranking — no embeddings needed here."""
-    query_words = set(query.lower().split())
-    scored = []
-    for paper in papers:
-        text = (
-            getattr(paper, "title", "") + " " + getattr(paper, "abstract", "")
-        ).lower()
-        overlap = sum(1 for w in query_words if w in text)
-        scored.append((overlap, paper))
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return [p for _, p in scored[:top_k] if _ > 0] or papers[:top_k]
+    return [corpus.papers[i] for i in _rank_relevant(query, corpus, top_k)]
+
+
+def _rank_relevant(query: str, corpus: CorpusIndex, top_k: int = 5) -> list[int]:
+    """Corpus positions of the *top_k* papers by keyword overlap with *query*."""
+    return corpus.top_k([query], top_k)[0]
 
 
-def _summarise_evidence(angle: ResearchAngle, papers: list, topic: str) -> str:
+def _summarise_evidence(
+    angle: ResearchAngle, papers: list, topic: str, state: Optional[ResearchState] = None
+) -> str:
     """
     Try Gemini summary; fall back to concatenated abstracts.
+    *state*, when given, bounds the LLM call by the run deadline.
     """
     if not papers:
         return f"No relevant papers found for angle: {angle.title}"
@@ -278,41 +650,35 @@ def _summarise_evidence(angle: ResearchAngle, papers: list, topic: str) -> str:
         Return plain text — no markdown, no JSON.
     """)
 
-    llm_text = _call_gemini(prompt, max_tokens=256)
-    if llm_text and len(llm_text.strip()) > 20:
-        return llm_text.strip()
+    def llm_summary() -> Optional[str]:
+        llm_text = _call_gemini_by_deadline(state, "executor", angle.angle_id, prompt, max_tokens=256)
+        if llm_text and len(llm_text.strip()) > 20:
+            return llm_text.strip()
+        return None
 
-    # Heuristic fallback
-    return (
-        f"Evidence for '{angle.title}': "
-        + " | ".join(
-            f"{getattr(p, 'title', '?')[:50]} ({getattr(p, 'year', '?')})"
-            for p in papers[:3]
+    def heuristic_summary() -> str:
+        return (
+            f"Evidence for '{angle.title}': "
+            + " | ".join(
+                f"{getattr(p, 'title', '?')[:50]} ({getattr(p, 'year', '?')})"
+                for p in papers[:3]
+            )
         )
-    )
+
+    summary, _ = _race(state, "executor", angle.angle_id, llm_summary, heuristic_summary)
+    return summary
 
 
-def _build_analysis_code(angle: ResearchAngle, papers: list) -> str:
+def _analysis_payload(angle: ResearchAngle, papers: list) -> dict:
     """
-    Build a simple Python snippet that quantifies evidence strength
-    using citation counts — safe to run in local or E2B sandbox.
+    Data for the ``citation_summary`` sandbox template, which quantifies
+    evidence strength using citation counts.
     """
-    citations = [getattr(p, "citation_count", 0) for p in papers]
-    titles = [getattr(p, "title", "")[:40] for p in papers]
-
-    return textwrap.dedent(f"""\
-        citations = {citations}
-        titles = {json.dumps(titles)}
-        total = sum(citations)
-        avg = total / len(citations) if citations else 0
-        top = max(citations) if citations else 0
-        print(f"angle: {angle.angle_id}")
-        print(f"papers analysed: {{len(citations)}}")
-        print(f"total citations: {{total}}")
-        print(f"avg citations: {{avg:.1f}}")
-        print(f"top paper citations: {{top}}")
-        print(f"top paper: {{titles[citations.index(top)] if citations else 'n/a'}}")
-    """)
+    return {
+        "angle_id": angle.angle_id,
+        "citations": [getattr(p, "citation_count", 0) for p in papers],
+        "titles": [getattr(p, "title", "")[:40] for p in papers],
+    }
 
 
 # ---------------------------------------------------------------------------
@@ -326,32 +692,41 @@ def verifier_node(state: ResearchState) -> ResearchState:
     Output: state.scores  (list[VerificationScore])
     """
     state.current_node = "verifier"
-    threshold = state.evidence_score_threshold
+    corpus = state.corpus_index()
     scores: list[VerificationScore] = []
 
     for ev in state.evidence:
         angle = next((a for a in state.angles if a.angle_id == ev.angle_id), None)
-        score, rationale = _score_evidence(ev, angle, state.papers)
-        passed = score >= threshold
-        scores.append(VerificationScore(
-            angle_id=ev.angle_id,
-            score=score,
-            rationale=rationale,
-            passed=passed,
-        ))
-        logger.info(
-            "Verifier: angle=%s score=%.2f passed=%s", ev.angle_id, score, passed
-        )
+        scores.append(_score_angle(ev, angle, state, corpus))
 
     state.scores = scores
     return state
 
 
-def _score_evidence(ev: Evidence, angle: Optional[ResearchAngle], papers: list) -> tuple[float, str]:
+def _score_angle(
+    ev: Evidence, angle: Optional[ResearchAngle], state: ResearchState, corpus: CorpusIndex
+) -> VerificationScore:
+    """Score one angle's evidence against ``state.evidence_score_threshold``."""
+    score, rationale = _score_evidence(ev, angle, corpus)
+    passed = score >= state.evidence_score_threshold
+    result = VerificationScore(
+        angle_id=ev.angle_id,
+        score=score,
+        rationale=rationale,
+        passed=passed,
+    )
+    state.emit("angle_scored", result)
+    logger.info(
+        "Verifier: angle=%s score=%.2f passed=%s", ev.angle_id, score, passed
+    )
+    return result
+
+
+def _score_evidence(ev: Evidence, angle: Optional[ResearchAngle], corpus: CorpusIndex) -> tuple[float, str]:
     """
     Heuristic scoring (0–1):
       • 0.4 points for having ≥ 2 source papers
-      • 0.3 points for sandbox confirmation
+      • 0.3 points for sandbox confirmation (``_SANDBOX_SCORE_BONUS``)
       • 0.3 points for high citation weight
     """
     score = 0.0
@@ -366,12 +741,11 @@ def _score_evidence(ev: Evidence, angle: Optional[ResearchAngle], papers: list)
         reasons.append(f"{n_sources} supporting paper(s)")
 
     if ev.sandbox_used and ev.sandbox_stdout:
-        score += 0.3
+        score += _SANDBOX_SCORE_BONUS
         reasons.append("quantitative sandbox confirmation")
 
     # Citation weight: look up papers by title
-    title_set = set(ev.source_titles)
-    relevant = [p for p in papers if getattr(p, "title", "") in title_set]
+    relevant = corpus.papers_for_titles(ev.source_titles)
     total_cites = sum(getattr(p, "citation_count", 0) for p in relevant)
     if total_cites > 10_000:
         score += 0.3
@@ -399,6 +773,11 @@ def claim_extractor_node(state: ResearchState) -> ResearchState:
     Output: state.claims  (list[Claim])
     """
     state.current_node = "claim_extractor"
+    if not state.evidence and state.claims:
+        # Fact-check-only mode: claims were pre-populated by IngestionPipeline
+        logger.info("ClaimExtractor: no evidence — keeping %d ingested claims", len(state.claims))
+        return state
+
     claims: list[Claim] = []
     claim_counter = 0
 
@@ -412,8 +791,10 @@ def claim_extractor_node(state: ResearchState) -> ResearchState:
         logger.info("ClaimExtractor: no angles passed threshold — extracting from all evidence")
 
     for ev in target_evidence:
-        extracted = _extract_claims(ev, state.topic, claim_counter)
+        extracted = _extract_claims(ev, state.topic, claim_counter, state=state)
         claims.extend(extracted)
+        for claim in extracted:
+            state.emit("claim_extracted", claim)
         claim_counter += len(extracted)
 
     state.claims = claims
@@ -421,10 +802,22 @@ def claim_extractor_node(state: ResearchState) -> ResearchState:
     return state
 
 
-def _extract_claims(ev: Evidence, topic: str, counter_start: int) -> list[Claim]:
+def _extract_claims(
+    ev: Evidence, topic: str, counter_start: int, state: Optional[ResearchState] = None
+) -> list[Claim]:
+    """
+    Extract 1–3 claims from an Evidence block, numbered from *counter_start*.
+    """
+    return _make_claims(ev, _extract_claim_texts(ev, topic, state), counter_start)
+
+
+def _extract_claim_texts(
+    ev: Evidence, topic: str, state: Optional[ResearchState] = None
+) -> list[str]:
     """
-    Extract 1–3 claims from an Evidence block.
-    Tries Gemini; falls back to sentence-splitting the summary.
+    Claim sentences for one Evidence block.
+    Tries Gemini (bounded by *state*'s deadline); falls back to
+    sentence-splitting the summary.
     """
     prompt = textwrap.dedent(f"""\
         Extract 1–3 short, verifiable factual claims from the evidence summary below.
@@ -438,22 +831,26 @@ def _extract_claims(ev: Evidence, topic: str, counter_start: int) -> list[Claim]
         Example: ["Transformers outperform RNNs on sequence tasks.", "Attention is O(n²) in sequence length."]
     """)
 
-    llm_text = _call_gemini(prompt, max_tokens=256)
-    raw_claims: list[str] = []
-
-    if llm_text:
-        parsed = _parse_json_block(llm_text)
-        if isinstance(parsed, list):
-            raw_claims = [str(c) for c in parsed[:3]]
+    def llm_claims() -> Optional[list[str]]:
+        llm_text = _call_gemini_by_deadline(
+            state, "claim_extractor", ev.angle_id, prompt, max_tokens=256
+        )
+        if llm_text:
+            parsed = _parse_json_block(llm_text)
+            if isinstance(parsed, list) and parsed:
+                return [str(c) for c in parsed[:3]]
+        return None
 
-    if not raw_claims:
-        # Fallback: split summary into sentences, take first 2
+    def heuristic_claims() -> list[str]:
+        # Split summary into sentences, take first 2
         sentences = [s.strip() for s in ev.summary.split(".") if len(s.strip()) > 20]
-        raw_claims = sentences[:2]
+        return sentences[:2] or [f"{topic} is studied via {ev.angle_id}."]
+
+    raw_claims, _ = _race(state, "claim_extractor", ev.angle_id, llm_claims, heuristic_claims)
+    return raw_claims
 
-    if not raw_claims:
-        raw_claims = [f"{topic} is studied via {ev.angle_id}."]
 
+def _make_claims(ev: Evidence, raw_claims: list[str], counter_start: int) -> list[Claim]:
     claims = []
     for i, text in enumerate(raw_claims):
         claims.append(Claim(
@@ -473,37 +870,270 @@ def fact_checker_node(state: ResearchState) -> ResearchState:
     """
     Cross-reference each claim against the paper corpus.
 
+    Up to ``state.fact_check_concurrency`` claims (or claim batches) are
+    verified at once; each LLM call is bounded by ``state.llm_timeout_s``.
+    With ``state.fact_check_batch_size > 1`` claims that share retrieved
+    papers are verified together in one prompt.  With
+    ``state.verdict_reuse_threshold`` set, paraphrases of claims already
+    verified against the same corpus reuse the stored verdict.
+    Verifications keep claim order and carry their own ``latency_ms``;
+    a ``claim_verified`` event is emitted as each one completes.
+
     Output: state.verifications  (list[ClaimVerification])
     """
     state.current_node = "fact_checker"
-    verifications: list[ClaimVerification] = []
+    corpus = state.corpus_index()
+    t0 = time.monotonic()
 
-    for claim in state.claims:
-        v = _verify_claim(claim, state.papers, state.topic)
-        verifications.append(v)
-        logger.info(
-            "FactChecker: claim=%s verdict=%s confidence=%.2f",
-            claim.claim_id, v.verdict, v.confidence,
-        )
+    verifications, embeddings = _check_claims(state, corpus, state.claims)
+    if embeddings is not None:
+        _remember_verdicts(state, corpus, state.claims, verifications, embeddings)
 
     state.verifications = verifications
+    logger.info(
+        "FactChecker: verified %d claims in %.2fs (reused=%d concurrency=%d batch=%d)",
+        len(verifications), time.monotonic() - t0,
+        sum(v.method == "reused" for v in verifications),
+        state.fact_check_concurrency, state.fact_check_batch_size,
+    )
     return state
 
 
-def _verify_claim(claim: Claim, papers: list, topic: str) -> ClaimVerification:
+def _check_claims(
+    state: ResearchState, corpus: CorpusIndex, claims: list[Claim]
+) -> tuple[list[ClaimVerification], Optional[np.ndarray]]:
     """
-    Attempt LLM cross-reference; fall back to keyword-overlap heuristic.
+    Verify *claims* (reusing stored verdicts when enabled), in claim order.
+
+    Also returns the claim embeddings when verdict reuse is on, so the
+    caller can store fresh verdicts without re-embedding.
     """
-    # Build a small context from papers whose titles are in the claim sources
-    title_set = set(claim.source_titles)
-    relevant = [p for p in papers if getattr(p, "title", "") in title_set]
-    if not relevant:
-        relevant = _find_relevant_papers(claim.text, papers, top_k=3)
+    contexts = _claim_contexts(claims, corpus)
+
+    reused: dict[int, ClaimVerification] = {}
+    embeddings = None
+    if state.verdict_reuse_threshold is not None and claims:
+        try:
+            reused, embeddings = _reuse_verdicts(state, corpus, claims)
+        except Exception as exc:
+            state.errors.append(f"FactChecker: verdict reuse failed — {exc}")
+            logger.warning("FactChecker: verdict reuse failed (%s)", exc)
+
+    todo = [i for i in range(len(claims)) if i not in reused]
+    fresh = _verify_claims(
+        state, corpus, [claims[i] for i in todo], [contexts[i] for i in todo]
+    )
+
+    by_position = dict(reused)
+    by_position.update(zip(todo, fresh))
+    verifications = [by_position[i] for i in range(len(claims))]
+
+    for v in verifications:
+        logger.info(
+            "FactChecker: claim=%s verdict=%s confidence=%.2f (%.0fms, %s)",
+            v.claim_id, v.verdict, v.confidence, v.latency_ms, v.method,
+        )
+    return verifications, embeddings
+
+
+def _verify_claims(
+    state: ResearchState,
+    corpus: CorpusIndex,
+    claims: list[Claim],
+    contexts: list[_ClaimContext],
+) -> list[ClaimVerification]:
+    """Verify *claims* (batched or one by one), preserving their order."""
+    if state.fact_check_batch_size > 1:
+        return _verify_batched(state, corpus, claims, contexts)
+
+    def check(item: tuple[Claim, _ClaimContext]) -> ClaimVerification:
+        claim, context = item
+        start = time.perf_counter()
+
+        def llm() -> Optional[ClaimVerification]:
+            v = _llm_verification(claim, corpus, context, state.llm_timeout_s, state)
+            if v is not None:
+                v.latency_ms = (time.perf_counter() - start) * 1000
+            return v
+
+        v, _ = _race(
+            state, "fact_checker", claim.claim_id, llm,
+            lambda: _heuristic_verification(claim, corpus, context),
+        )
+        v.latency_ms = (time.perf_counter() - start) * 1000
+        state.emit("claim_verified", v)
+        return v
+
+    return map_ordered(check, zip(claims, contexts), state.fact_check_concurrency)
+
+
+def _reuse_verdicts(
+    state: ResearchState, corpus: CorpusIndex, claims: list[Claim]
+) -> tuple[dict[int, ClaimVerification], np.ndarray]:
+    """
+    Match every claim against stored verdicts for this corpus version.
+
+    Returns reused verifications keyed by claim position, plus the claim
+    embeddings so fresh verdicts can be stored without re-embedding.
+    """
+    from .verdicts import get_verdict_store
+
+    store = get_verdict_store()
+    start = time.perf_counter()
+    embeddings = store.embed([c.text for c in claims])
+    matches = store.lookup(corpus.fingerprint, embeddings, state.verdict_reuse_threshold)
+    lookup_ms = (time.perf_counter() - start) * 1000 / max(len(claims), 1)
+
+    reused: dict[int, ClaimVerification] = {}
+    for i, (claim, match) in enumerate(zip(claims, matches)):
+        if match is None:
+            continue
+        entry, similarity = match
+        stored = dict(entry["verification"])
+        stored.update(
+            claim_id=claim.claim_id,
+            latency_ms=lookup_ms,
+            method="reused",
+            reused_from={
+                "claim_id": entry["verification"]["claim_id"],
+                "claim_text": entry["claim_text"],
+                "similarity": round(similarity, 4),
+                "corpus_version": corpus.fingerprint,
+                "verified_at": entry["verified_at"],
+            },
+        )
+        reused[i] = ClaimVerification(**stored)
+        state.emit("claim_verified", reused[i])
+    return reused, embeddings
+
+
+def _remember_verdicts(
+    state: ResearchState,
+    corpus: CorpusIndex,
+    claims: list[Claim],
+    verifications: list[ClaimVerification],
+    embeddings: np.ndarray,
+) -> None:
+    """Store fresh LLM verdicts (heuristic and reused ones are not stored)."""
+    from .verdicts import get_verdict_store
+
+    keep = [k for k, v in enumerate(verifications) if v.method == "llm"]
+    if not keep:
+        return
+    try:
+        get_verdict_store().add(
+            corpus.fingerprint,
+            [claims[k].text for k in keep],
+            [verifications[k] for k in keep],
+            embeddings[keep],
+        )
+    except Exception as exc:
+        state.errors.append(f"FactChecker: could not store verdicts — {exc}")
+        logger.warning("FactChecker: could not store verdicts (%s)", exc)
+
+
+# (relevant corpus positions, abstract-token overlap with each of them)
+_ClaimContext = tuple[list[int], list[int]]
 
-    context_lines = []
-    for p in relevant[:3]:
+_VERDICTS = ("SUPPORTED", "REFUTED", "UNVERIFIABLE")
+
+# Batched verification limits: rough prompt size (≈ 4 chars / token) and the
+# output tokens reserved per claim in the JSON reply
+_MAX_BATCH_PROMPT_TOKENS = 6000
+_BATCH_TOKENS_PER_VERDICT = 80
+
+
+def _claim_contexts(claims: list[Claim], corpus: CorpusIndex) -> list[_ClaimContext]:
+    """
+    Batch-score every claim against the corpus in one vectorised pass.
+
+    Returns, per claim, the corpus positions of its relevant papers (its own
+    source titles, else the top-3 by keyword overlap) and the abstract-token
+    overlap of the claim with each of those papers.
+    """
+    if not claims:
+        return []
+    texts = [c.text for c in claims]
+    relevant = [corpus.indices_for_titles(c.source_titles) for c in claims]
+    missing = [i for i, idx in enumerate(relevant) if not idx]
+    if missing:
+        ranked = corpus.top_k([texts[i] for i in missing], 3)
+        for i, idx in zip(missing, ranked):
+            relevant[i] = idx
+    overlaps = corpus.overlap_matrix(texts, on="abstract")
+    return [
+        (idx, overlaps[row, idx].tolist())
+        for row, idx in enumerate(relevant)
+    ]
+
+
+def _context_lines(corpus: CorpusIndex, relevant_idx: list[int]) -> list[str]:
+    """Literature context for a prompt: first three relevant papers."""
+    lines = []
+    for i in relevant_idx[:3]:
+        p = corpus.papers[i]
         abstract = getattr(p, "abstract", "")[:200]
-        context_lines.append(f"- {getattr(p, 'title', '?')}: {abstract}")
+        lines.append(f"- {getattr(p, 'title', '?')}: {abstract}")
+    return lines
+
+
+def _verification_from_llm(claim: Claim, parsed: object) -> Optional[ClaimVerification]:
+    """Build a ClaimVerification from one parsed LLM verdict object, or None."""
+    if not isinstance(parsed, dict) or "verdict" not in parsed:
+        return None
+    verdict = str(parsed.get("verdict", "UNVERIFIABLE")).upper()
+    if verdict not in _VERDICTS:
+        verdict = "UNVERIFIABLE"
+    try:
+        confidence = float(parsed.get("confidence", 0.5))
+    except (TypeError, ValueError):
+        return None
+    return ClaimVerification(
+        claim_id=claim.claim_id,
+        supported=verdict == "SUPPORTED",
+        confidence=confidence,
+        supporting_sources=[t for t in claim.source_titles if verdict == "SUPPORTED"],
+        contradicting_sources=[t for t in claim.source_titles if verdict == "REFUTED"],
+        verdict=verdict,
+        method="llm",
+    )
+
+
+def _verify_claim(
+    claim: Claim,
+    corpus: CorpusIndex,
+    topic: str,
+    context: Optional[_ClaimContext] = None,
+    timeout: float = 30,
+    state: Optional[ResearchState] = None,
+) -> ClaimVerification:
+    """
+    Attempt LLM cross-reference; fall back to keyword-overlap heuristic.
+
+    *context* is this claim's entry from ``_claim_contexts``; computed on the
+    fly when the caller verifies a single claim.  *state*, when given,
+    bounds the LLM call by the run deadline.
+    """
+    if context is None:
+        context = _claim_contexts([claim], corpus)[0]
+    verification = _llm_verification(claim, corpus, context, timeout, state)
+    if verification is not None:
+        return verification
+    if state is not None:
+        state.note_fallback("fact_checker", claim.claim_id)
+    return _heuristic_verification(claim, corpus, context)
+
+
+def _llm_verification(
+    claim: Claim,
+    corpus: CorpusIndex,
+    context: _ClaimContext,
+    timeout: float,
+    state: Optional[ResearchState] = None,
+) -> Optional[ClaimVerification]:
+    """The LLM half of ``_verify_claim``: a verdict, or None if unavailable."""
+    # Build a small context from papers whose titles are in the claim sources
+    context_lines = _context_lines(corpus, context[0])
 
     prompt = textwrap.dedent(f"""\
         You are a fact-checker.  Given the claim and supporting literature context,
@@ -522,40 +1152,33 @@ def _verify_claim(claim: Claim, papers: list, topic: str) -> ClaimVerification:
         Example: {{"verdict": "SUPPORTED", "confidence": 0.85, "rationale": "Multiple papers confirm this."}}
     """)
 
-    llm_text = _call_gemini(prompt, max_tokens=128)
+    llm_text = _call_gemini_by_deadline(
+        state, "fact_checker", claim.claim_id, prompt,
+        timeout=timeout, max_tokens=128, priority=PRIORITY_HIGH,
+    )
     if llm_text:
-        parsed = _parse_json_block(llm_text)
-        if isinstance(parsed, dict) and "verdict" in parsed:
-            verdict = str(parsed.get("verdict", "UNVERIFIABLE")).upper()
-            if verdict not in ("SUPPORTED", "REFUTED", "UNVERIFIABLE"):
-                verdict = "UNVERIFIABLE"
-            confidence = float(parsed.get("confidence", 0.5))
-            return ClaimVerification(
-                claim_id=claim.claim_id,
-                supported=verdict == "SUPPORTED",
-                confidence=confidence,
-                supporting_sources=[t for t in claim.source_titles if verdict == "SUPPORTED"],
-                contradicting_sources=[t for t in claim.source_titles if verdict == "REFUTED"],
-                verdict=verdict,
-            )
+        return _verification_from_llm(claim, _parse_json_block(llm_text))
+    return None
+
 
-    # Heuristic fallback: keyword overlap with abstracts
-    claim_words = set(claim.text.lower().split())
+def _heuristic_verification(
+    claim: Claim, corpus: CorpusIndex, context: _ClaimContext
+) -> ClaimVerification:
+    """Keyword-overlap verdict from precomputed abstract overlaps."""
+    relevant_idx, overlaps = context
     supporting = []
     contradicting = []
-    for p in relevant:
-        abstract_words = set(getattr(p, "abstract", "").lower().split())
-        overlap = len(claim_words & abstract_words)
+    for i, overlap in zip(relevant_idx, overlaps):
         if overlap >= 3:
-            supporting.append(getattr(p, "title", ""))
+            supporting.append(corpus.titles[i])
         # Simple negation heuristic
-        if any(neg in getattr(p, "abstract", "").lower() for neg in ["however", "contrary", "disagree", "refute"]):
-            contradicting.append(getattr(p, "title", ""))
+        if corpus.has_negation[i]:
+            contradicting.append(corpus.titles[i])
 
     if supporting:
         verdict = "SUPPORTED"
         confidence = min(0.5 + 0.1 * len(supporting), 0.85)
-    elif not relevant:
+    elif not relevant_idx:
         verdict = "UNVERIFIABLE"
         confidence = 0.2
     else:
@@ -570,3 +1193,260 @@ def _verify_claim(claim: Claim, papers: list, topic: str) -> ClaimVerification:
         contradicting_sources=contradicting[:2],
         verdict=verdict,
     )
+
+
+# ---------------------------------------------------------------------------
+# Batched verification (several claims per prompt)
+# ---------------------------------------------------------------------------
+
+def _verify_batched(
+    state: ResearchState,
+    corpus: CorpusIndex,
+    claims: list[Claim],
+    contexts: list[_ClaimContext],
+) -> list[ClaimVerification]:
+    """
+    Verify claims in shared-context batches; results come back in claim order.
+
+    Claims whose relevant papers are identical share one prompt (the context
+    is sent once).  Any claim whose verdict is missing or malformed in the
+    batch reply is re-verified on its own with ``_verify_claim``.
+    """
+    batches = _plan_batches(claims, contexts, corpus, state.fact_check_batch_size)
+    logger.info(
+        "FactChecker: %d claims → %d batched prompts", len(claims), len(batches)
+    )
+
+    def run(batch: list[int]) -> list[tuple[int, ClaimVerification]]:
+        start = time.perf_counter()
+        members = [claims[i] for i in batch]
+        verdicts = _verify_claim_batch(
+            members, _context_lines(corpus, contexts[batch[0]][0]), state.llm_timeout_s, state
+        )
+        batch_ms = (time.perf_counter() - start) * 1000
+        results = []
+        for i, claim in zip(batch, members):
+            v = verdicts.get(claim.claim_id)
+            if v is None:
+                item_start = time.perf_counter()
+                v = _verify_claim(
+                    claim, corpus, state.topic, contexts[i], timeout=state.llm_timeout_s, state=state
+                )
+                v.latency_ms = batch_ms + (time.perf_counter() - item_start) * 1000
+            else:
+                v.latency_ms = batch_ms
+            state.emit("claim_verified", v)
+            results.append((i, v))
+        return results
+
+    ordered: list[Optional[ClaimVerification]] = [None] * len(claims)
+    for results in map_ordered(run, batches, state.fact_check_concurrency):
+        for i, v in results:
+            ordered[i] = v
+    return [v for v in ordered if v is not None]
+
+
+def _plan_batches(
+    claims: list[Claim],
+    contexts: list[_ClaimContext],
+    corpus: CorpusIndex,
+    batch_size: int,
+) -> list[list[int]]:
+    """
+    Group claim positions by shared literature context, then split each group
+    so no batch exceeds *batch_size* claims or the prompt token budget.
+    """
+    groups: dict[tuple[int, ...], list[int]] = {}
+    for i, (relevant_idx, _) in enumerate(contexts):
+        groups.setdefault(tuple(relevant_idx[:3]), []).append(i)
+
+    batches: list[list[int]] = []
+    for key, members in groups.items():
+        base_tokens = _estimate_tokens("\n".join(_context_lines(corpus, list(key)))) + 200
+        current: list[int] = []
+        used = base_tokens
+        for i in members:
+            cost = _estimate_tokens(claims[i].text) + 20
+            if current and (len(current) >= batch_size or used + cost > _MAX_BATCH_PROMPT_TOKENS):
+                batches.append(current)
+                current, used = [], base_tokens
+            current.append(i)
+            used += cost
+        if current:
+            batches.append(current)
+    return batches
+
+
+def _estimate_tokens(text: str) -> int:
+    """Cheap token estimate (≈ 4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def _verify_claim_batch(
+    claims: list[Claim],
+    context_lines: list[str],
+    timeout: float,
+    state: Optional[ResearchState] = None,
+) -> dict[str, ClaimVerification]:
+    """
+    One LLM call for several claims sharing *context_lines*.
+
+    Returns verdicts keyed by claim id for every item that parsed cleanly;
+    callers fall back to per-claim verification for the rest.
+    """
+    claim_block = json.dumps(
+        [{"claim_id": c.claim_id, "claim": c.text} for c in claims], indent=2
+    )
+    prompt = textwrap.dedent(f"""\
+        You are a fact-checker.  For EACH claim below, decide using the shared
+        literature context whether it is SUPPORTED, REFUTED, or UNVERIFIABLE.
+
+        Literature context:
+        {chr(10).join(context_lines)}
+
+        Claims:
+        {claim_block}
+
+        Return ONLY a valid JSON array with one object per claim and keys:
+          claim_id      (copied from the input)
+          verdict       ("SUPPORTED" | "REFUTED" | "UNVERIFIABLE")
+          confidence    (float 0.0–1.0)
+          rationale     (one sentence)
+    """)
+
+    # Not recorded as degraded here: claims left without a verdict are
+    # re-verified one by one, and that call records the degradation
+    llm_text = _call_gemini_by_deadline(
+        state, "fact_checker", None, prompt,
+        timeout=timeout,
+        max_tokens=_BATCH_TOKENS_PER_VERDICT * len(claims) + 64,
+        priority=PRIORITY_HIGH,
+    )
+    if not llm_text:
+        return {}
+    parsed = _parse_json_block(llm_text)
+    if not isinstance(parsed, list):
+        return {}
+
+    by_id = {c.claim_id: c for c in claims}
+    verdicts: dict[str, ClaimVerification] = {}
+    for item in parsed:
+        claim = by_id.get(str(item.get("claim_id"))) if isinstance(item, dict) else None
+        if claim is None or claim.claim_id in verdicts:
+            continue
+        verification = _verification_from_llm(claim, item)
+        if verification is not None:
+            verdicts[claim.claim_id] = verification
+    return verdicts
+
+
+# ---------------------------------------------------------------------------
+# Dataflow scheduling — executor → verifier → extractor → fact checker per angle
+# ---------------------------------------------------------------------------
+
+class _ClaimIdAllocator:
+    """
+    Hands out claim-id ranges in angle order, whatever order angles finish in.
+
+    Claim ids are a running counter over passing angles (``claim_0``, ...),
+    so an angle can only be numbered once every earlier angle has reported
+    how many claims it produced.  Angles are submitted to the pool in order,
+    so every angle a caller waits on is already running — no deadlock.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._next_position = 0
+        self._next_id = 0
+
+    def reserve(self, position: int, count: int) -> int:
+        """Block until angles before *position* reserved; return the first id."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._next_position == position)
+            start = self._next_id
+            self._next_id += count
+            self._next_position += 1
+            self._cond.notify_all()
+            return start
+
+
+def angle_dataflow_node(state: ResearchState) -> ResearchState:
+    """
+    Run executor → verifier → claim extractor → fact checker for each angle
+    independently, up to ``state.max_workers`` angles at a time.
+
+    Produces the same evidence, scores, claims (same ids) and verifications,
+    in the same order, as the four barrier nodes: angles that fail the
+    threshold are deferred, and if none pass, extraction and fact-checking
+    fall back to all evidence exactly like ``claim_extractor_node``.
+    Verdict batches never span angles, and fresh verdicts are stored for
+    reuse only once every angle has finished.  Sandbox checks follow one
+    expected-value plan made up front (``_plan_sandbox``), as in the
+    executor node, and are bounded by the node's deadline.
+
+    Output: state.evidence, state.scores, state.claims, state.verifications
+    """
+    state.current_node = "angle_dataflow"
+    t0 = time.monotonic()
+    corpus = state.corpus_index()
+    sandbox = _make_sandbox(state)
+    plan = _plan_sandbox(state, corpus, sandbox)
+    allocator = _ClaimIdAllocator()
+
+    def flow(item: tuple[int, ResearchAngle]) -> dict:
+        position, angle = item
+        result: dict = {"evidence": None, "score": None, "claims": [], "verifications": [],
+                        "embeddings": None}
+        reserved = False
+        try:
+            ev = _gather_evidence(angle, state, corpus, sandbox, plan.pop(angle.angle_id, None))
+            result["evidence"] = ev
+            result["score"] = score = _score_angle(ev, angle, state, corpus)
+            if not score.passed:
+                return result  # deferred: only used if no angle passes
+
+            texts = _extract_claim_texts(ev, state.topic, state)
+            start = allocator.reserve(position, len(texts))
+            reserved = True
+            claims = _make_claims(ev, texts, start)
+            for claim in claims:
+                state.emit("claim_extracted", claim)
+            result["claims"] = claims
+            result["verifications"], result["embeddings"] = _check_claims(state, corpus, claims)
+        except Exception as exc:
+            msg = f"Angle '{angle.angle_id}' raised: {exc}"
+            state.errors.append(msg)
+            logger.error("Dataflow: %s", msg, exc_info=True)
+        finally:
+            if not reserved:
+                allocator.reserve(position, 0)
+        return result
+
+    results = map_ordered(flow, list(enumerate(state.angles)), state.max_workers)
+    for _, share in plan.values():  # planned for an angle whose flow never got to it
+        state.settle_budget(share, 0.0)
+
+    state.evidence = [r["evidence"] for r in results if r["evidence"] is not None]
+    state.scores = [r["score"] for r in results if r["score"] is not None]
+    if state.evidence and not any(s.passed for s in state.scores):
+        logger.info("Dataflow: no angles passed threshold — running deferred angles")
+        state = fact_checker_node(claim_extractor_node(state))
+    else:
+        state.claims = [c for r in results for c in r["claims"]]
+        state.verifications = [v for r in results for v in r["verifications"]]
+        embedded = [r for r in results if r["embeddings"] is not None and r["claims"]]
+        if embedded:
+            _remember_verdicts(
+                state, corpus,
+                [c for r in embedded for c in r["claims"]],
+                [v for r in embedded for v in r["verifications"]],
+                np.vstack([r["embeddings"] for r in embedded]),
+            )
+
+    state.current_node = "angle_dataflow"
+    logger.info(
+        "Dataflow: %d angles → %d claims, %d verified in %.2fs (workers=%d)",
+        len(state.angles), len(state.claims), len(state.verifications),
+        time.monotonic() - t0, state.max_workers,
+    )
+    return state
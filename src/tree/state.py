@@ -9,8 +9,33 @@ All fields have defaults so nodes can update only what they touch.
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import Optional
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field, is_dataclass
+from typing import Iterator, Optional
+
+from .corpus import CorpusIndex
+from .events import EventCallback, GraphEvent
+
+logger = logging.getLogger(__name__)
+
+# Set while a speculative LLM call runs in the background: the call's
+# degraded entries and errors are collected here instead of touching the
+# state, and applied only if the call wins its race (see nodes._race)
+_deferred_effects: ContextVar[Optional[list]] = ContextVar("deferred_effects", default=None)
+
+
+@contextmanager
+def deferred_effects(effects: list) -> Iterator[list]:
+    """Collect ``mark_degraded`` / ``add_error`` calls made in this context into *effects*."""
+    token = _deferred_effects.set(effects)
+    try:
+        yield effects
+    finally:
+        _deferred_effects.reset(token)
 
 
 # ---------------------------------------------------------------------------
@@ -34,6 +59,7 @@ class Evidence:
     summary: str                   # free-text summary of the evidence
     sandbox_stdout: str = ""       # quantitative output, if any
     sandbox_used: bool = False
+    sandbox_artifacts: list[dict] = field(default_factory=list)  # ArtifactHandle.to_dict()s
 
 
 @dataclass
@@ -63,6 +89,9 @@ class ClaimVerification:
     supporting_sources: list[str]
     contradicting_sources: list[str]
     verdict: str           # "SUPPORTED" | "REFUTED" | "UNVERIFIABLE"
+    latency_ms: float = 0.0  # wall time spent verifying this claim
+    method: str = "heuristic"  # "llm" | "heuristic" | "reused"
+    reused_from: Optional[dict] = None  # provenance when method == "reused"
 
 
 # ---------------------------------------------------------------------------
@@ -83,6 +112,18 @@ class ResearchState:
         claims        → written by ClaimExtractor node
         verifications → written by FactChecker node
         output        → written by graph after final node
+        corpus        → derived from papers on first corpus_index() call
+        on_event      → optional progress callback, see emit()
+        sandbox       → optional SandboxExecutor shared across runs (else one per node)
+        deadline_at   → set by graph when run with deadline_s; node_deadline_at per node
+        degraded      → appended by nodes that skip LLM work to meet the deadline
+                        or whose LLM call missed speculative_latency_s
+        fallbacks     → (node, item) for every item served by a heuristic instead
+                        of the LLM, for any reason (graph won't memoise those nodes)
+        pending_llm   → LLM calls still running after losing a speculative race
+        speculation   → counts of late LLM results reconciled / discarded
+        sandbox_plan  → executor's expected-value sandbox allocation: every
+                        eligible angle, whether it ran, and why (allocation.py)
     """
 
     # ---- Inputs (set before the graph runs) ----
@@ -106,18 +147,137 @@ class ResearchState:
 
     # ---- Budget tracking ----
     budget_usd: float = 0.50          # total sandbox budget for this run
-    spent_usd: float = 0.0            # accumulated sandbox spend
+    spent_usd: float = 0.0            # accumulated sandbox spend (use add_spend())
+    reserved_usd: float = field(default=0.0, init=False, compare=False)  # held by runs in flight
+    _budget_lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
 
     # ---- Final structured output ----
     output: Optional[dict] = None     # produced by graph after all nodes
 
+    # ---- Latency budget ----
+    degraded: list[dict] = field(default_factory=list)  # items that fell back to heuristics on time
+    deadline_at: Optional[float] = field(default=None, repr=False, compare=False)       # monotonic
+    node_deadline_at: Optional[float] = field(default=None, repr=False, compare=False)  # monotonic
+    pending_llm: list = field(default_factory=list, repr=False, compare=False)  # (node, item, Future)
+    speculation: dict = field(default_factory=dict)  # {"reconciled": n, "discarded": n}
+    fallbacks: list = field(default_factory=list, repr=False, compare=False)  # (node, item)
+
+    # ---- Sandbox scheduling ----
+    sandbox_plan: list[dict] = field(default_factory=list)  # per-angle SandboxCandidate.to_dict()
+
     # ---- Internal bookkeeping ----
     errors: list[str] = field(default_factory=list)   # non-fatal warnings / errors
     current_node: str = ""            # last node that touched state (for debugging)
+    corpus: Optional[CorpusIndex] = field(default=None, repr=False, compare=False)
+    on_event: Optional[EventCallback] = field(default=None, repr=False, compare=False)
+    sandbox: Optional[object] = field(default=None, repr=False, compare=False)  # shared SandboxExecutor
 
     # ---- Configurable thresholds ----
     evidence_score_threshold: float = 0.3   # minimum score for an angle to pass
     max_angles: int = 3                     # planner caps output at this many
+    max_workers: int = 4                    # per-node thread pool size (1 = serial)
+    fact_check_concurrency: int = 4         # claims verified in parallel (1 = serial)
+    fact_check_batch_size: int = 1          # claims per verification prompt (1 = unbatched)
+    verdict_reuse_threshold: Optional[float] = None  # cosine sim to reuse a stored verdict (None = off)
+    llm_timeout_s: float = 30.0             # per-call timeout for LLM requests
+    speculative_latency_s: Optional[float] = None  # per-item LLM latency target (None = no racing)
+
+    def corpus_index(self) -> CorpusIndex:
+        """Return the precomputed index over ``papers``, building it on first use."""
+        if self.corpus is None or not self.corpus.is_current(self.papers):
+            self.corpus = CorpusIndex.build(self.papers)
+        return self.corpus
+
+    def budget_available(self) -> bool:
+        """True while spend plus reservations is below the budget (thread-safe)."""
+        with self._budget_lock:
+            return self.spent_usd + self.reserved_usd < self.budget_usd
+
+    def budget_remaining(self) -> float:
+        """Budget not yet spent or reserved (thread-safe)."""
+        with self._budget_lock:
+            return max(0.0, self.budget_usd - self.spent_usd - self.reserved_usd)
+
+    def add_spend(self, amount_usd: float) -> None:
+        """Accumulate sandbox spend (thread-safe)."""
+        with self._budget_lock:
+            self.spent_usd += amount_usd
+
+    def reserve_budget(self, amount_usd: float) -> bool:
+        """
+        Hold *amount_usd* for a sandbox run about to launch; False (nothing
+        held) if it doesn't fit.  Check and hold are one step under the
+        lock, so concurrent angles can't all pass the check and overspend.
+        Pair every successful call with ``settle_budget``.
+        """
+        with self._budget_lock:
+            if self.spent_usd + self.reserved_usd + amount_usd > self.budget_usd:
+                return False
+            self.reserved_usd += amount_usd
+            return True
+
+    def settle_budget(self, reserved_usd: float, spent_usd: float) -> None:
+        """Swap a reservation for what the run actually cost (thread-safe)."""
+        with self._budget_lock:
+            # round away float drift so an idle state holds exactly 0
+            self.reserved_usd = max(0.0, round(self.reserved_usd - reserved_usd, 9))
+            self.spent_usd += spent_usd
+
+    def emit(self, kind: str, payload: object = None, **data) -> None:
+        """
+        Report a progress event to ``on_event`` (no-op when unset).
+
+        *payload* may be one of the pipeline dataclasses; its fields become
+        the event data.  Callback errors are logged, never raised — progress
+        reporting must not break a run.  May be called from worker threads.
+        """
+        if self.on_event is None:
+            return
+        if is_dataclass(payload):
+            data = {**asdict(payload), **data}
+        try:
+            self.on_event(GraphEvent(kind=kind, data=data))
+        except Exception as exc:
+            logger.warning("ResearchState: event callback failed for %s (%s)", kind, exc)
+
+    def time_left(self) -> Optional[float]:
+        """Seconds left in the current node's time share (None = no deadline)."""
+        ends = [t for t in (self.deadline_at, self.node_deadline_at) if t is not None]
+        if not ends:
+            return None
+        return min(ends) - time.monotonic()
+
+    def mark_degraded(self, node: str, item: str, reason: str) -> None:
+        """Record that *item* got a heuristic result because time ran out."""
+        entry = {"node": node, "item": item, "reason": reason}
+        deferred = _deferred_effects.get()
+        if deferred is not None:
+            deferred.append(("degraded", entry))
+            return
+        self.degraded.append(entry)
+        logger.info("ResearchState: degraded %s/%s (%s)", node, item, reason)
+
+    def add_error(self, message: str) -> None:
+        """Append a non-fatal error (deferred inside a speculative LLM call)."""
+        deferred = _deferred_effects.get()
+        if deferred is not None:
+            deferred.append(("error", message))
+            return
+        self.errors.append(message)
+
+    def apply_effects(self, effects: list) -> None:
+        """Apply effects collected by ``deferred_effects`` (a won speculative race)."""
+        for kind, value in effects:
+            if kind == "degraded":
+                self.mark_degraded(value["node"], value["item"], value["reason"])
+            else:
+                self.add_error(value)
+
+    def note_fallback(self, node: str, item: Optional[str]) -> None:
+        """Record that *item* got a heuristic result instead of an LLM one."""
+        self.fallbacks.append((node, item))
 
     def passed_angles(self) -> list[ResearchAngle]:
         """Return angles whose evidence score passed the threshold."""
@@ -146,6 +306,7 @@ class ResearchState:
                     "summary": e.summary,
                     "sandbox_used": e.sandbox_used,
                     "sources": e.source_titles,
+                    "artifacts": e.sandbox_artifacts,
                 }
                 for e in self.evidence
             ],
@@ -172,12 +333,18 @@ class ResearchState:
                     "verdict": v.verdict,
                     "confidence": v.confidence,
                     "supported_by": v.supporting_sources,
+                    "latency_ms": round(v.latency_ms, 1),
+                    "method": v.method,
+                    "reused_from": v.reused_from,
                 }
                 for v in self.verifications
             ],
             "budget": {
                 "allocated_usd": self.budget_usd,
                 "spent_usd": round(self.spent_usd, 6),
+                "sandbox_plan": self.sandbox_plan,
             },
+            "degraded": self.degraded,
+            "speculation": self.speculation,
             "errors": self.errors,
         }
@@ -0,0 +1,211 @@
+"""
+src/tree/verdicts.py
+--------------------
+Semantic near-duplicate cache for fact-check verdicts.
+
+Many claims we fact-check are paraphrases of claims already verified against
+the same corpus ("Transformers outperform RNNs" in three different drafts).
+``VerdictStore`` keeps every LLM verdict together with an embedding of its
+claim text.  Before calling the LLM, ``fact_checker_node`` looks for a stored
+claim within a cosine-similarity threshold **against the same corpus
+version** and, if found, reuses that verdict with a provenance pointer.
+
+Storage
+-------
+One directory per corpus fingerprint under ``VERDICT_CACHE_DIR`` (default
+``cache/verdicts``)::
+
+    <corpus_fingerprint>/entries.json     verdict records (+ provenance)
+    <corpus_fingerprint>/embeddings.npy   float32 matrix, one row per entry
+
+Embeddings
+----------
+Uses ``sentence-transformers`` (all-MiniLM-L6-v2, same model as the FAISS
+cache) when installed, else a dependency-free hashed bag-of-words embedder.
+Thresholds are not comparable between the two — configure accordingly.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .state import ClaimVerification
+
+logger = logging.getLogger(__name__)
+
+_HASH_DIM = 512
+
+
+class HashingEmbedder:
+    """Signed feature-hashing of lowercase tokens + bigrams, L2-normalised."""
+
+    name = "hashing-512"
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        out = np.zeros((len(texts), _HASH_DIM), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = [t.strip(".,;:!?()[]\"'") for t in text.lower().split()]
+            tokens = [t for t in tokens if t]
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for feat in features:
+                h = int.from_bytes(hashlib.blake2b(feat.encode(), digest_size=8).digest(), "little")
+                out[row, h % _HASH_DIM] += 1.0 if (h >> 63) else -1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.where(norms == 0, 1.0, norms)
+
+
+class _SentenceTransformerEmbedder:
+    name = "all-MiniLM-L6-v2"
+
+    def __init__(self):
+        from sentence_transformers import SentenceTransformer
+        self._model = SentenceTransformer(self.name)
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        return np.asarray(
+            self._model.encode(texts, show_progress_bar=False, normalize_embeddings=True),
+            dtype=np.float32,
+        )
+
+
+def default_embedder():
+    """sentence-transformers when available, hashed bag-of-words otherwise."""
+    try:
+        return _SentenceTransformerEmbedder()
+    except Exception as exc:
+        logger.info("VerdictStore: sentence-transformers unavailable (%s); using hashing embedder", exc)
+        return HashingEmbedder()
+
+
+class VerdictStore:
+    """
+    Embedding-indexed verdict cache, partitioned by corpus fingerprint.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Root directory; one sub-directory per corpus version.
+    embedder : object | None
+        Anything with ``encode(list[str]) -> np.ndarray`` (unit-norm rows)
+        and a ``name`` attribute.  Defaults to ``default_embedder()``.
+    """
+
+    def __init__(self, cache_dir: str = "cache/verdicts", embedder=None):
+        self.cache_dir = Path(cache_dir)
+        self._embedder = embedder
+        self._lock = threading.Lock()
+        # corpus fingerprint -> (entries, embedding matrix)
+        self._partitions: dict[str, tuple[list[dict], np.ndarray]] = {}
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            self._embedder = default_embedder()
+        return self._embedder
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self.embedder.encode(texts)
+
+    def lookup(
+        self, corpus_version: str, embeddings: np.ndarray, threshold: float
+    ) -> list[Optional[tuple[dict, float]]]:
+        """
+        For each embedding, the most similar stored entry at or above
+        *threshold* as ``(entry, similarity)``, else None.
+        """
+        with self._lock:
+            entries, matrix = self._partition(corpus_version)
+            if not entries or len(embeddings) == 0:
+                return [None] * len(embeddings)
+            sims = embeddings @ matrix.T
+        best = sims.argmax(axis=1)
+        results: list[Optional[tuple[dict, float]]] = []
+        for row, col in enumerate(best.tolist()):
+            sim = float(sims[row, col])
+            results.append((entries[col], sim) if sim >= threshold else None)
+        return results
+
+    def add(
+        self,
+        corpus_version: str,
+        claim_texts: list[str],
+        verifications: list[ClaimVerification],
+        embeddings: np.ndarray,
+    ) -> None:
+        """Record fresh verdicts (one per claim text) and persist the partition."""
+        if not verifications:
+            return
+        now = time.time()
+        new_entries = [
+            {
+                "claim_text": text,
+                "verification": asdict(v),
+                "verified_at": now,
+                "embedder": self.embedder.name,
+            }
+            for text, v in zip(claim_texts, verifications)
+        ]
+        with self._lock:
+            entries, matrix = self._partition(corpus_version)
+            entries = entries + new_entries
+            matrix = embeddings.astype(np.float32) if matrix.size == 0 else np.vstack(
+                [matrix, embeddings.astype(np.float32)]
+            )
+            self._partitions[corpus_version] = (entries, matrix)
+            self._save(corpus_version, entries, matrix)
+
+    def _partition(self, corpus_version: str) -> tuple[list[dict], np.ndarray]:
+        """Load (or return cached) entries for one corpus version.  Caller holds lock."""
+        if corpus_version not in self._partitions:
+            entries: list[dict] = []
+            matrix = np.zeros((0, 0), dtype=np.float32)
+            part_dir = self.cache_dir / corpus_version
+            try:
+                if (part_dir / "entries.json").exists():
+                    with open(part_dir / "entries.json") as f:
+                        entries = json.load(f)
+                    matrix = np.load(part_dir / "embeddings.npy")
+                    # Never compare vectors from a different embedder
+                    keep = [i for i, e in enumerate(entries) if e.get("embedder") == self.embedder.name]
+                    entries = [entries[i] for i in keep]
+                    matrix = matrix[keep] if keep else np.zeros((0, 0), dtype=np.float32)
+            except Exception as exc:
+                logger.warning("VerdictStore: could not load %s (%s)", part_dir, exc)
+                entries, matrix = [], np.zeros((0, 0), dtype=np.float32)
+            self._partitions[corpus_version] = (entries, matrix)
+        return self._partitions[corpus_version]
+
+    def _save(self, corpus_version: str, entries: list[dict], matrix: np.ndarray) -> None:
+        part_dir = self.cache_dir / corpus_version
+        try:
+            part_dir.mkdir(parents=True, exist_ok=True)
+            with open(part_dir / "entries.json", "w") as f:
+                json.dump(entries, f)
+            np.save(part_dir / "embeddings.npy", matrix)
+        except Exception as exc:
+            logger.warning("VerdictStore: could not persist %s (%s)", part_dir, exc)
+
+
+_stores: dict[str, VerdictStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_verdict_store() -> VerdictStore:
+    """Process-wide store for the configured ``VERDICT_CACHE_DIR``."""
+    cache_dir = os.getenv("VERDICT_CACHE_DIR", "cache/verdicts")
+    with _stores_lock:
+        if cache_dir not in _stores:
+            _stores[cache_dir] = VerdictStore(cache_dir)
+        return _stores[cache_dir]
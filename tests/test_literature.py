@@ -170,6 +170,22 @@ def test_full_pipeline():
     print(digest[:500])
 
 
+def test_fetch_many_isolates_failures(tmp_path):
+    print("\n--- TEST 5: fetch_many ---")
+    pipeline = LiteraturePipeline(cache_dir=str(tmp_path))
+
+    def fake_fetch(query, limit_per_source=25):
+        if query == "bad":
+            raise RuntimeError("boom")
+        return MOCK_PAPERS_SS if query == "ss" else MOCK_PAPERS_OA
+
+    pipeline.fetch = fake_fetch
+    results = pipeline.fetch_many(["ss", "bad", "oa", "ss"], max_workers=3)
+    assert set(results) == {"ss", "oa"}, "Failed query should be left out"
+    assert results["ss"] == MOCK_PAPERS_SS and results["oa"] == MOCK_PAPERS_OA
+    print(f"[OK] fetched {len(results)} of 3 queries concurrently")
+
+
 if __name__ == "__main__":
     print("=" * 50)
     print("STAGE 1: Literature Pipeline Tests")
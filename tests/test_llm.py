@@ -0,0 +1,256 @@
+"""
+tests/test_llm.py
+-----------------
+Unit tests for the shared LLM plumbing (response cache, client).
+
+All tests run offline — the Gemini REST endpoint is patched.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, ".")
+
+
+def _gemini_response(text: str) -> MagicMock:
+    resp = MagicMock()
+    resp.json.return_value = {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+    return resp
+
+
+# ---------------------------------------------------------------------------
+# LLMResponseCache
+# ---------------------------------------------------------------------------
+
+class TestLLMResponseCache:
+    def test_key_depends_on_model_config_and_prompt(self):
+        from src.llm.cache import LLMResponseCache
+        base = LLMResponseCache.make_key("m", {"temperature": 0.3}, "p")
+        assert base == LLMResponseCache.make_key("m", {"temperature": 0.3}, "p")
+        assert base != LLMResponseCache.make_key("m2", {"temperature": 0.3}, "p")
+        assert base != LLMResponseCache.make_key("m", {"temperature": 0.2}, "p")
+        assert base != LLMResponseCache.make_key("m", {"temperature": 0.3}, "p2")
+
+    def test_hit_miss_metrics_and_persistence(self, tmp_path):
+        from src.llm.cache import LLMResponseCache
+        cache = LLMResponseCache(str(tmp_path))
+        assert cache.get("k") is None
+        cache.set("k", "answer")
+        assert cache.get("k") == "answer"
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1 and stats["entries"] == 1
+
+        reopened = LLMResponseCache(str(tmp_path))
+        assert reopened.get("k") == "answer"
+
+    def test_ttl_expiry(self, tmp_path):
+        from src.llm.cache import LLMResponseCache
+        cache = LLMResponseCache(str(tmp_path), ttl_seconds=-1)
+        cache.set("k", "stale")
+        assert cache.get("k") is None
+        assert len(cache) == 0
+
+    def test_lru_eviction(self, tmp_path):
+        from src.llm.cache import LLMResponseCache
+        cache = LLMResponseCache(str(tmp_path), max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")            # refresh "a" so "b" is least recently used
+        cache.set("c", "3")
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.stats()["evictions"] == 1
+
+
+# ---------------------------------------------------------------------------
+# Call sites
+# ---------------------------------------------------------------------------
+
+class TestCachedCallSites:
+    @pytest.fixture(autouse=True)
+    def _env(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+        monkeypatch.setenv("LLM_CACHE_DIR", str(tmp_path / "llm"))
+
+    def test_nodes_call_gemini_uses_cache(self):
+        from src.tree import nodes
+        with patch("src.llm.client.requests.post", return_value=_gemini_response("hello")) as post:
+            assert nodes._call_gemini("same prompt", max_tokens=64) == "hello"
+            assert nodes._call_gemini("same prompt", max_tokens=64) == "hello"
+            assert post.call_count == 1
+            nodes._call_gemini("same prompt", max_tokens=65)
+            assert post.call_count == 2, "Different generation config must miss"
+
+    def test_claim_extractor_call_gemini_uses_cache(self):
+        from src.ingestion import claim_extractor
+        with patch(
+            "src.llm.client.requests.post",
+            return_value=_gemini_response('["A claim."]'),
+        ) as post:
+            claim_extractor._call_gemini("extract this")
+            claim_extractor._call_gemini("extract this")
+            assert post.call_count == 1
+
+    def test_cache_disabled(self, monkeypatch):
+        from src.llm.cache import get_llm_cache
+        monkeypatch.setenv("LLM_CACHE_DIR", "off")
+        assert get_llm_cache() is None
+
+
+# ---------------------------------------------------------------------------
+# LLMClient — scheduling, retries, accounting
+# ---------------------------------------------------------------------------
+
+class TestLLMClient:
+    @pytest.fixture(autouse=True)
+    def _env(self, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+
+    def _client(self, **limits):
+        from src.llm.client import LLMClient, ModelLimits
+        return LLMClient(
+            default_limits=ModelLimits(**limits), cache=None,
+            backoff_base_s=0.01, backoff_max_s=0.02,
+        )
+
+    def test_malformed_limits_env_falls_back(self, monkeypatch):
+        from src.llm.client import ModelLimits
+        monkeypatch.setenv("GEMINI_RPM", "fifteen")
+        monkeypatch.setenv("GEMINI_TPM", "-5")
+        monkeypatch.setenv("LLM_MAX_CONCURRENCY", "2")
+        assert ModelLimits.from_env() == ModelLimits(max_concurrency=2)
+
+    def test_no_api_key_returns_none(self, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY")
+        with patch("src.llm.client.requests.post") as post:
+            assert self._client().generate("p") is None
+            post.assert_not_called()
+
+    def test_retries_on_429_then_succeeds(self):
+        throttled = MagicMock(status_code=429, headers={})
+        ok = _gemini_response("done")
+        ok.json.return_value["usageMetadata"] = {"promptTokenCount": 11, "candidatesTokenCount": 3}
+        client = self._client()
+        with patch("src.llm.client.requests.post", side_effect=[throttled, throttled, ok]) as post:
+            assert client.generate("p") == "done"
+            assert post.call_count == 3
+        stats = client.stats()
+        assert stats["retries"] == 2
+        assert stats["prompt_tokens"] == 11 and stats["output_tokens"] == 3
+
+    def test_gives_up_after_max_retries(self):
+        client = self._client()
+        client.max_retries = 1
+        with patch("src.llm.client.requests.post",
+                   return_value=MagicMock(status_code=503, headers={})) as post:
+            assert client.generate("p") is None
+            assert post.call_count == 2
+        assert client.stats()["failures"] == 1
+
+    def test_concurrency_limit_and_priority_order(self):
+        client = self._client(max_concurrency=1)
+        in_flight, peak, order = [0], [0], []
+        started, gate = threading.Event(), threading.Event()
+        lock = threading.Lock()
+
+        def fake_post(url, json, timeout):
+            prompt = json["contents"][0]["parts"][0]["text"]
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+                order.append(prompt)
+            if prompt == "first":
+                started.set()
+                gate.wait(5)
+            with lock:
+                in_flight[0] -= 1
+            return _gemini_response(prompt)
+
+        with patch("src.llm.client.requests.post", side_effect=fake_post):
+            first = threading.Thread(target=client.generate, args=("first",))
+            first.start()
+            started.wait(5)
+            # Both queue behind "first"; the high-priority one must go next
+            low = threading.Thread(target=client.generate, args=("low",), kwargs={"priority": 10})
+            low.start()
+            high = threading.Thread(target=client.generate, args=("high",), kwargs={"priority": 0})
+            high.start()
+            time.sleep(0.1)
+            gate.set()
+            for t in (first, low, high):
+                t.join(5)
+
+        assert peak[0] == 1, "Concurrency limit exceeded"
+        assert order == ["first", "high", "low"], f"Priority order not respected: {order}"
+
+    def test_rpm_window_delays_admission(self):
+        from src.llm import client as client_module
+        client = self._client(rpm=1)
+        with patch.object(client_module, "_WINDOW_S", 0.2), \
+                patch("src.llm.client.requests.post", return_value=_gemini_response("x")):
+            start = time.monotonic()
+            client.generate("a")
+            client.generate("b")
+            assert time.monotonic() - start >= 0.15
+
+    def test_deadline_bounds_retries_and_attempt_timeout(self):
+        from src.llm.client import LLMClient, ModelLimits
+        client = LLMClient(default_limits=ModelLimits(), cache=None)   # real 1s–20s backoff
+        timeouts = []
+
+        def throttled(url, json, timeout):
+            timeouts.append(timeout)
+            return MagicMock(status_code=429, headers={"Retry-After": "5"})
+
+        with patch("src.llm.client.requests.post", side_effect=throttled):
+            start = time.monotonic()
+            assert client.generate("p", timeout=30, deadline=start + 0.5) is None
+            elapsed = time.monotonic() - start
+        assert elapsed < 0.5, f"Retries slept past the deadline ({elapsed:.2f}s)"
+        assert len(timeouts) == 1 and timeouts[0] <= 0.5
+        assert client.stats()["failures"] == 1
+
+    def test_deadline_bounds_queue_wait(self):
+        client = self._client(rpm=1)
+        with patch("src.llm.client.requests.post", return_value=_gemini_response("x")) as post:
+            assert client.generate("a") == "x"
+            start = time.monotonic()
+            # The RPM window is full for the next minute; give up at the deadline
+            assert client.generate("b", deadline=start + 0.2) is None
+            assert time.monotonic() - start < 1.0
+            assert post.call_count == 1
+        scheduler = client._scheduler("gemini-1.5-flash")
+        assert scheduler._queue == [] and scheduler._active == 0
+
+    def test_node_deadline_reaches_client(self):
+        from src.llm.client import LLMClient, ModelLimits
+        from src.tree import nodes
+        from src.tree.state import ResearchState
+        client = LLMClient(default_limits=ModelLimits(), cache=None)
+        state = ResearchState(topic="t")
+        state.deadline_at = time.monotonic() + 0.6
+        with patch("src.tree.nodes.get_llm_client", return_value=client), \
+                patch("src.llm.client.requests.post",
+                      return_value=MagicMock(status_code=429, headers={"Retry-After": "10"})):
+            start = time.monotonic()
+            assert nodes._call_gemini_by_deadline(state, "planner", "plan", "p") is None
+            assert time.monotonic() - start < 0.6
+        assert state.degraded and state.degraded[0]["item"] == "plan"
+
+    def test_call_timeout_bounds_whole_call(self):
+        import requests
+        from src.llm.client import LLMClient, ModelLimits
+        from src.tree import nodes
+        client = LLMClient(default_limits=ModelLimits(), cache=None)   # real 1s–20s backoff
+        with patch("src.tree.nodes.get_llm_client", return_value=client), \
+                patch("src.llm.client.requests.post", side_effect=requests.Timeout("slow")):
+            start = time.monotonic()
+            assert nodes._call_gemini("p", timeout=0.3) is None
+            assert time.monotonic() - start < 0.6, "timeouts were retried past the call's timeout"